@@ -0,0 +1,180 @@
+"""Tiered archival of old predictions and tracked positions.
+
+Items created more than ARCHIVE_AFTER_DAYS ago (and no longer in flight) are
+copied into gzip-compressed JSON-lines objects partitioned by creation date:
+
+  archive/{kind}/dt=YYYY-MM-DD/{batch}.jsonl.gz
+
+Every archived item also gets two small pointer objects so it can be found
+again by id (body = archive object key) or listed by user (the key encodes the
+archive object, so a listing needs no further reads):
+
+  archive/{kind}/by-id/{item_id}
+  archive/{kind}/by-user/{user_id}/{YYYY-MM-DD}/{batch}/{item_id}
+
+Once both are written the DynamoDB item is flagged with archived_at and an
+expires_at TTL ARCHIVE_TTL_GRACE_DAYS out, after which DynamoDB deletes it and
+reads fall back to get_archived / get_archived_by_user. The flag is only set
+if the item's updated_at is still the archived one and it has no expires_at
+yet. Updating an item drops its expires_at, so an item changed during the
+grace window is archived again on the next run rather than expiring with a
+stale copy. An item archived more than once has several by-user pointers; the
+by-id pointer names the latest.
+
+Only the worker holding ARCHIVAL_LEASE in the monitor-leases table runs the
+job.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from backend import async_db
+from backend.db import (
+    acquire_lease,
+    get_object,
+    get_presigned_url,
+    list_object_keys,
+    mark_archived,
+    put_object,
+    release_lease,
+    scan_archivable,
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_TTL_GRACE_DAYS = int(os.environ.get("ARCHIVE_TTL_GRACE_DAYS", "7"))
+ARCHIVAL_INTERVAL_SECONDS = int(os.environ.get("ARCHIVAL_INTERVAL_SECONDS", str(24 * 60 * 60)))
+ARCHIVE_BATCH_SIZE = 500  # items per archive object, so on-demand reads stay small
+ARCHIVE_PREFIX = "archive"
+ARCHIVAL_LEASE = "archival"
+# Held across runs, so the job stays in one worker while it is alive
+ARCHIVAL_LEASE_TTL_SECONDS = int(os.environ.get("ARCHIVAL_LEASE_TTL_SECONDS", str(2 * ARCHIVAL_INTERVAL_SECONDS + 60)))
+
+KEY_ATTRS = {"predictions": "prediction_id", "tracked_positions": "position_id"}
+
+
+def _archive_key(kind: str, date: str, batch: str) -> str:
+    return f"{ARCHIVE_PREFIX}/{kind}/dt={date}/{batch}.jsonl.gz"
+
+
+def _encode(items: list[dict]) -> bytes:
+    lines = "".join(json.dumps(item, default=str, separators=(",", ":")) + "\n" for item in items)
+    return gzip.compress(lines.encode("utf-8"))
+
+
+def _decode(body: bytes) -> list[dict]:
+    return [json.loads(line) for line in gzip.decompress(body).decode("utf-8").splitlines() if line]
+
+
+# ── Job ──
+
+
+def archive_batch(kind: str, items: list[dict], expires_at: int) -> int:
+    """Write one date-partitioned archive object for items, then their pointers,
+    then flag them in DynamoDB. Items must share a creation date. Returns how
+    many were flagged; one updated since it was read is left for the next run."""
+    key_attr = KEY_ATTRS[kind]
+    date, batch = items[0]["created_at"][:10], uuid.uuid4().hex
+    archive_key = _archive_key(kind, date, batch)
+    put_object(archive_key, _encode(items), "application/gzip")
+    for item in items:
+        item_id = item[key_attr]
+        put_object(f"{ARCHIVE_PREFIX}/{kind}/by-id/{item_id}", archive_key.encode("utf-8"), "text/plain")
+        if item.get("user_id"):
+            put_object(f"{ARCHIVE_PREFIX}/{kind}/by-user/{item['user_id']}/{date}/{batch}/{item_id}", b"", "text/plain")
+    return sum(
+        mark_archived(kind, item[key_attr], archive_key, expires_at, item.get("updated_at")) for item in items
+    )
+
+
+def run_archival(now: datetime | None = None) -> dict[str, int]:
+    """Archive everything past the cutoff. Returns items archived per kind."""
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=ARCHIVE_AFTER_DAYS)).isoformat()
+    expires_at = int((now + timedelta(days=ARCHIVE_TTL_GRACE_DAYS)).timestamp())
+    archived = {}
+    for kind in KEY_ATTRS:
+        count = 0
+        for page in scan_archivable(kind, cutoff):
+            by_date: dict[str, list[dict]] = {}
+            for item in page:
+                by_date.setdefault(item["created_at"][:10], []).append(item)
+            for items in by_date.values():
+                for start in range(0, len(items), ARCHIVE_BATCH_SIZE):
+                    count += archive_batch(kind, items[start:start + ARCHIVE_BATCH_SIZE], expires_at)
+        archived[kind] = count
+    return archived
+
+
+async def archival_loop():
+    """Run the archival job once per ARCHIVAL_INTERVAL_SECONDS in whichever
+    worker holds ARCHIVAL_LEASE; cancel to stop."""
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    try:
+        while True:
+            await asyncio.sleep(ARCHIVAL_INTERVAL_SECONDS)
+            started = time.monotonic()
+            try:
+                if await async_db.run(acquire_lease, ARCHIVAL_LEASE, owner, ARCHIVAL_LEASE_TTL_SECONDS, time.time()):
+                    archived = await async_db.run(run_archival)
+                    logger.info("Archival: %s in %.1fs", archived, time.monotonic() - started)
+            except Exception:
+                logger.exception("Archival run failed")
+    finally:
+        try:
+            await async_db.run(release_lease, ARCHIVAL_LEASE, owner)
+        except Exception:
+            logger.exception("Failed to release the archival lease")
+
+
+# ── Reads ──
+
+
+def _read_archive(archive_key: str) -> list[dict]:
+    body = get_object(archive_key)
+    return _decode(body) if body else []
+
+
+def _with_image_url(item: dict | None) -> dict | None:
+    # The archived image_url was presigned at creation and has long expired
+    if item and item.get("image_key"):
+        item["image_url"] = get_presigned_url(item["image_key"])
+    return item
+
+
+def get_archived(kind: str, item_id: str) -> dict | None:
+    """One archived item by id, or None."""
+    pointer = get_object(f"{ARCHIVE_PREFIX}/{kind}/by-id/{item_id}")
+    if not pointer:
+        return None
+    key_attr = KEY_ATTRS[kind]
+    return _with_image_url(next((i for i in _read_archive(pointer.decode("utf-8")) if i.get(key_attr) == item_id), None))
+
+
+def get_archived_by_user(kind: str, user_id: str) -> list[dict]:
+    """All of a user's archived items, once each, reading each archive object once."""
+    archives_by_item: dict[str, list[str]] = {}
+    for pointer_key in list_object_keys(f"{ARCHIVE_PREFIX}/{kind}/by-user/{user_id}/"):
+        date, batch, item_id = pointer_key.rsplit("/", 3)[-3:]
+        archives_by_item.setdefault(item_id, []).append(_archive_key(kind, date, batch))
+    item_ids_by_archive: dict[str, set[str]] = {}
+    for item_id, archive_keys in archives_by_item.items():
+        archive_key = archive_keys[0]
+        if len(archive_keys) > 1:
+            # Re-archived after an update, or left over from a batch that failed part way
+            pointer = get_object(f"{ARCHIVE_PREFIX}/{kind}/by-id/{item_id}")
+            if pointer:
+                archive_key = pointer.decode("utf-8")
+        item_ids_by_archive.setdefault(archive_key, set()).add(item_id)
+    key_attr = KEY_ATTRS[kind]
+    items = []
+    for archive_key, item_ids in item_ids_by_archive.items():
+        items.extend(_with_image_url(i) for i in _read_archive(archive_key) if i.get(key_attr) in item_ids)
+    return items
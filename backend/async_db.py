@@ -0,0 +1,93 @@
+"""Async variant of the backend.db API for async routes and background tasks.
+
+boto3 is blocking, so every call is dispatched to a dedicated, bounded thread
+pool. DynamoDB and S3 round trips then never stall the event loop, and a burst
+of slow storage calls can't take over the default executor that model runs and
+Kalshi fetches share.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import db
+
+DB_EXECUTOR_WORKERS = int(os.environ.get("DB_EXECUTOR_WORKERS", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+
+async def run(fn, *args, **kwargs):
+    """Run a blocking storage call on the db executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def _async(name: str):
+    # Look the function up on every call so tests and alternate storage
+    # backends that replace backend.db functions are honoured.
+    async def wrapper(*args, **kwargs):
+        return await run(getattr(db, name), *args, **kwargs)
+
+    wrapper.__name__ = wrapper.__qualname__ = name
+    wrapper.__doc__ = f"Async version of backend.db.{name}."
+    return wrapper
+
+
+# ── S3 ──
+
+upload_image = _async("upload_image")
+upload_image_stream = _async("upload_image_stream")
+image_exists = _async("image_exists")
+put_image_fingerprint = _async("put_image_fingerprint")
+get_image_bytes = _async("get_image_bytes")
+append_analysis_log = _async("append_analysis_log")
+get_analysis_log = _async("get_analysis_log")
+put_object = _async("put_object")
+get_object = _async("get_object")
+
+# ── Predictions ──
+
+put_prediction = _async("put_prediction")
+get_prediction = _async("get_prediction")
+update_prediction = _async("update_prediction")
+get_predictions_by_user = _async("get_predictions_by_user")
+
+# ── Integrations & push tokens ──
+
+get_integrations_by_user = _async("get_integrations_by_user")
+get_integrations_for_users = _async("get_integrations_for_users")
+get_push_token_for_user = _async("get_push_token_for_user")
+get_push_tokens_for_users = _async("get_push_tokens_for_users")
+remove_push_token = _async("remove_push_token")
+get_all_users_with_active_positions = _async("get_all_users_with_active_positions")
+
+# ── Tracked positions ──
+
+put_tracked_position = _async("put_tracked_position")
+get_tracked_position = _async("get_tracked_position")
+get_tracked_positions_by_user = _async("get_tracked_positions_by_user")
+update_tracked_position = _async("update_tracked_position")
+settle_tracked_position = _async("settle_tracked_position")
+clear_position_alert = _async("clear_position_alert")
+
+# ── User progress ──
+
+get_user_progress = _async("get_user_progress")
+update_user_progress = _async("update_user_progress")
+
+# ── Monitor checkpoints ──
+
+acquire_lease = _async("acquire_lease")
+get_monitor_checkpoint = _async("get_monitor_checkpoint")
+put_monitor_checkpoint = _async("put_monitor_checkpoint")
+
+
+def executor_stats() -> dict:
+    """Queue depth and size of the db executor, for diagnostics."""
+    return {
+        "max_workers": DB_EXECUTOR_WORKERS,
+        "threads": len(_executor._threads),
+        "queued": _executor._work_queue.qsize(),
+    }
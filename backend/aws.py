@@ -0,0 +1,204 @@
+"""Shared AWS session, client configuration and lazy client creation.
+
+Clients are created on first use rather than at import, all from one session
+and one botocore Config: a connection pool sized for the worker's concurrency
+(botocore's default is 10), adaptive retries and explicit timeouts. Every
+client's calls are counted so pool saturation shows up in GET /debug/aws.
+"""
+
+import logging
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_RETRY_MODE = os.environ.get("AWS_RETRY_MODE", "adaptive")
+AWS_MAX_ATTEMPTS = int(os.environ.get("AWS_MAX_ATTEMPTS", "5"))
+AWS_CONNECT_TIMEOUT = float(os.environ.get("AWS_CONNECT_TIMEOUT", "3"))
+AWS_READ_TIMEOUT = float(os.environ.get("AWS_READ_TIMEOUT", "20"))
+
+_lock = threading.Lock()
+_session: boto3.session.Session | None = None
+_clients: dict[str, object] = {}
+_resources: dict[str, object] = {}
+_stats: dict[str, "_PoolStats"] = {}
+
+
+def client_config() -> Config:
+    return Config(
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        retries={"mode": AWS_RETRY_MODE, "max_attempts": AWS_MAX_ATTEMPTS},
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=AWS_READ_TIMEOUT,
+    )
+
+
+def session() -> boto3.session.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            _session = boto3.session.Session()
+        return _session
+
+
+# ── Pool saturation ──
+
+
+class _PoolStats:
+    """In-flight API calls on one client, compared against its pool size.
+
+    Calls beyond the pool size either wait for a connection or open one that
+    is discarded afterwards, so saturated_calls > 0 means the pool is too small
+    for the load.
+    """
+
+    def __init__(self, service: str, pool_size: int):
+        self.service = service
+        self.pool_size = pool_size
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.saturated_calls = 0
+        self._lock = threading.Lock()
+
+    def before_call(self, **kwargs) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.in_flight > self.pool_size:
+                self.saturated_calls += 1
+
+    def after_call(self, **kwargs) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def after_call_error(self, **kwargs) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "saturated_calls": self.saturated_calls,
+        }
+
+
+def _instrument(service: str, botocore_client) -> None:
+    stats = _stats.setdefault(service, _PoolStats(service, AWS_MAX_POOL_CONNECTIONS))
+    events = botocore_client.meta.events
+    events.register("before-call.*.*", stats.before_call)
+    events.register("after-call.*.*", stats.after_call)
+    events.register("after-call-error.*.*", stats.after_call_error)
+
+
+def pool_stats() -> dict:
+    """Per-service call and pool-saturation counters, plus the active config."""
+    return {
+        "config": {
+            "max_pool_connections": AWS_MAX_POOL_CONNECTIONS,
+            "retry_mode": AWS_RETRY_MODE,
+            "max_attempts": AWS_MAX_ATTEMPTS,
+            "connect_timeout": AWS_CONNECT_TIMEOUT,
+            "read_timeout": AWS_READ_TIMEOUT,
+        },
+        "services": {service: stats.snapshot() for service, stats in _stats.items()},
+    }
+
+
+# ── Clients ──
+
+
+def client(service: str):
+    """The shared, instrumented client for a service, created on first use."""
+    with _lock:
+        existing = _clients.get(service)
+    if existing is not None:
+        return existing
+    new = session().client(service, config=client_config())
+    _instrument(service, new)
+    with _lock:
+        return _clients.setdefault(service, new)
+
+
+def resource(service: str, on_create=None):
+    """The shared resource for a service, created on first use. `on_create`
+    runs once on the new resource (e.g. to register event handlers)."""
+    with _lock:
+        existing = _resources.get(service)
+    if existing is not None:
+        return existing
+    new = session().resource(service, config=client_config())
+    _instrument(service, new.meta.client)
+    if on_create:
+        on_create(new)
+    with _lock:
+        return _resources.setdefault(service, new)
+
+
+def credentials_available() -> bool:
+    try:
+        creds = session().get_credentials()
+        return creds is not None and creds.access_key is not None
+    except Exception:
+        return False
+
+
+class Lazy:
+    """Module-level stand-in for an AWS object, created on first attribute access.
+
+    Lets modules keep `table.query(...)`-style globals without creating clients
+    or resolving credentials at import.
+    """
+
+    __slots__ = ("_factory", "_target", "_lock")
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __repr__(self) -> str:
+        state = "unresolved" if self._target is None else repr(self._target)
+        return f"<Lazy {state}>"
+
+
+class LazyFlag:
+    """Boolean evaluated once, on first use."""
+
+    __slots__ = ("_compute", "_value", "_lock")
+
+    def __init__(self, compute):
+        self._compute = compute
+        self._value = None
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = bool(self._compute())
+        return self._value
+
+    def __repr__(self) -> str:
+        return f"<LazyFlag {'unresolved' if self._value is None else self._value}>"
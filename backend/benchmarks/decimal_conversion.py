@@ -0,0 +1,114 @@
+"""Micro-benchmark: DynamoDB number handling, legacy vs native (de)serializers.
+
+Times the client-side work boto3 does for one put_item / get_item of a large
+prediction (request copy + serialization, and deserialization + float fixup).
+
+Run with:  python -m backend.benchmarks.decimal_conversion
+"""
+
+import json
+import os
+import random
+import timeit
+from decimal import Decimal
+
+from boto3.dynamodb.transform import copy_dynamodb_params
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from backend.db import _copy_request_params, _NativeDeserializer, _NativeSerializer  # noqa: E402
+
+
+def _legacy_floats_to_decimals(obj):
+    return json.loads(json.dumps(obj), parse_float=Decimal)
+
+
+def _legacy_decimals_to_floats(obj):
+    if isinstance(obj, list):
+        return [_legacy_decimals_to_floats(i) for i in obj]
+    if isinstance(obj, dict):
+        return {k: _legacy_decimals_to_floats(v) for k, v in obj.items()}
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == int(obj) else float(obj)
+    return obj
+
+
+def _sample_prediction(levels: int = 200) -> dict:
+    """A completed prediction with a deep orderbook and full factor list."""
+    rng = random.Random(42)
+    return {
+        "prediction_id": "bench",
+        "user_id": "user-1",
+        "image_key": "predictions/bench/photo.jpg",
+        "model": "gemini",
+        "status": "completed",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "recommendation": {
+            "ticker": "KXBENCH-26",
+            "side": "yes",
+            "confidence": 0.73,
+            "reasoning": "x" * 400,
+            "factors": [
+                {"stat": f"stat {i}", "source": "src", "direction": "favors_yes",
+                 "magnitude": "high", "detail": "d" * 120}
+                for i in range(5)
+            ],
+            "ev_analysis": [
+                {"probability": rng.random(), "ev_per_contract": rng.random(), "kelly_fraction": rng.random()}
+                for _ in range(3)
+            ],
+        },
+        "market_data": {
+            "status": "found",
+            "yes_bid": 41, "yes_ask": 43, "midpoint": 42.0, "spread": 2,
+            "volume": 120344, "volume_24h": 3121, "open_interest": 9120,
+            "orderbook_yes": [[p, rng.randint(1, 5000)] for p in range(1, levels)],
+            "orderbook_no": [[p, rng.randint(1, 5000)] for p in range(1, levels)],
+        },
+    }
+
+
+def _legacy_write(item: dict) -> dict:
+    params = copy_dynamodb_params({"Item": _legacy_floats_to_decimals(item)})
+    ser = TypeSerializer()
+    return {k: ser.serialize(v) for k, v in params["Item"].items()}
+
+
+def _native_write(item: dict) -> dict:
+    params = _copy_request_params({"Item": item})
+    ser = _NativeSerializer()
+    return {k: ser.serialize(v) for k, v in params["Item"].items()}
+
+
+def _legacy_read(wire: dict) -> dict:
+    de = TypeDeserializer()
+    return _legacy_decimals_to_floats({k: de.deserialize(v) for k, v in wire.items()})
+
+
+def _native_read(wire: dict) -> dict:
+    de = _NativeDeserializer()
+    return {k: de.deserialize(v) for k, v in wire.items()}
+
+
+def main(number: int = 500) -> None:
+    item = _sample_prediction()
+    wire = _legacy_write(item)
+    assert _native_write(item) == wire
+    assert _native_read(wire) == _legacy_read(wire)
+
+    def bench(label: str, fn, arg) -> float:
+        total = timeit.timeit(lambda: fn(arg), number=number)
+        print(f"{label:<16} {total / number * 1e6:9.1f} us/item")
+        return total
+
+    print(f"{number} iterations, orderbook levels={len(item['market_data']['orderbook_yes'])}")
+    old_w = bench("write (legacy)", _legacy_write, item)
+    new_w = bench("write (native)", _native_write, item)
+    old_r = bench("read (legacy)", _legacy_read, wire)
+    new_r = bench("read (native)", _native_read, wire)
+    print(f"write speedup {old_w / new_w:.1f}x, read speedup {old_r / new_r:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
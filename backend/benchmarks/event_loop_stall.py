@@ -0,0 +1,63 @@
+"""Benchmark: event-loop stall from blocking storage calls, direct vs async_db.
+
+Simulates concurrent requests that each make a few 50ms storage round trips
+while a LoopLagMonitor samples the loop, once calling the blocking function
+directly from the coroutine (the old route behaviour) and once through
+backend.async_db.run.
+
+Run with:  python -m backend.benchmarks.event_loop_stall
+"""
+
+import asyncio
+import os
+import time
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from backend import async_db  # noqa: E402
+from backend.loop_monitor import LoopLagMonitor  # noqa: E402
+
+ROUND_TRIP = 0.05  # seconds per simulated DynamoDB/S3 call
+CALLS_PER_REQUEST = 3
+CONCURRENT_REQUESTS = 20
+
+
+def _blocking_storage_call() -> None:
+    time.sleep(ROUND_TRIP)
+
+
+async def _request_direct() -> None:
+    for _ in range(CALLS_PER_REQUEST):
+        _blocking_storage_call()
+        await asyncio.sleep(0)
+
+
+async def _request_async() -> None:
+    for _ in range(CALLS_PER_REQUEST):
+        await async_db.run(_blocking_storage_call)
+
+
+async def _measure(label: str, request) -> None:
+    monitor = LoopLagMonitor(interval=0.01)
+    sampler = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+    monitor.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(CONCURRENT_REQUESTS)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    snap = monitor.snapshot()
+    print(
+        f"{label:<10} wall {elapsed:6.2f}s  max lag {snap['max_lag_ms']:8.1f}ms  "
+        f"stalled {snap['stalled_seconds']:6.2f}s  stalls {snap['stalls']}"
+    )
+
+
+async def main() -> None:
+    print(f"{CONCURRENT_REQUESTS} requests x {CALLS_PER_REQUEST} calls x {ROUND_TRIP * 1000:.0f}ms")
+    await _measure("direct", _request_direct)
+    await _measure("async_db", _request_async)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""Benchmark: peak Python memory for concurrent image uploads, buffered vs streamed.
+
+Each simulated request holds a Starlette-style spooled upload (as the multipart
+parser leaves it) and stores it to local storage, once via the old
+`await image.read()` + upload_image(bytes) path and once via
+backend.uploads.store_upload. Peak allocation is measured with tracemalloc.
+
+Run with:  python -m backend.benchmarks.upload_memory
+"""
+
+import asyncio
+import os
+import tempfile
+import tracemalloc
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from unittest.mock import patch
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from fastapi import UploadFile  # noqa: E402
+from starlette.datastructures import Headers  # noqa: E402
+
+from backend import async_db, db  # noqa: E402
+from backend.uploads import store_upload  # noqa: E402
+
+UPLOAD_BYTES = 8 * 1024 * 1024
+CONCURRENT_UPLOADS = 16
+PAYLOAD = b"\x89PNG\r\n\x1a\n" + os.urandom(UPLOAD_BYTES - 8)  # not decodable, so no dHash
+
+
+def _make_uploads() -> list[UploadFile]:
+    uploads = []
+    for i in range(CONCURRENT_UPLOADS):
+        spooled = SpooledTemporaryFile(max_size=1024 * 1024)
+        spooled.write(PAYLOAD)
+        spooled.seek(0)
+        uploads.append(UploadFile(spooled, size=UPLOAD_BYTES, filename=f"shot{i}.png",
+                                  headers=Headers({"content-type": "image/png"})))
+    return uploads
+
+
+async def _buffered(image: UploadFile, i: int) -> None:
+    contents = await image.read()
+    await async_db.upload_image(contents, f"bench/buffered/{i}/{image.filename}", "image/png")
+
+
+async def _streamed(image: UploadFile, i: int) -> None:
+    await store_upload(image)
+
+
+async def _measure(label: str, handler) -> None:
+    uploads = _make_uploads()
+    tracemalloc.start()
+    await asyncio.gather(*(handler(image, i) for i, image in enumerate(uploads)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for image in uploads:
+        await image.close()
+    print(f"{label:>9}: peak {peak / 1024 / 1024:7.1f} MB for {CONCURRENT_UPLOADS} x "
+          f"{UPLOAD_BYTES // (1024 * 1024)} MB uploads")
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp, \
+            patch.object(db, "_s3_available", False), patch.object(db, "LOCAL_IMAGE_DIR", Path(tmp)):
+        await _measure("buffered", _buffered)
+        await _measure("streamed", _streamed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,26 @@
 """Bot engine: milestone tracking, strategy derivation, and signal generation."""
 
+import asyncio
 import logging
+import os
+import time
+import uuid
 from collections import Counter
 from datetime import datetime, timezone
 
+from backend import async_db
+from backend.archival import get_archived_by_user
 from backend.db import (
+    acquire_lease,
+    get_all_progress_user_ids,
     get_tracked_positions_by_user,
     get_user_progress,
+    increment_user_progress,
+    put_tracked_position_with_progress,
     put_user_progress,
+    release_lease,
     update_user_progress,
+    update_user_progress_if_unchanged,
 )
 from backend.kalshi_api import fetch_events, fetch_market
 
@@ -17,6 +29,16 @@ logger = logging.getLogger(__name__)
 # Starting paper balance: $100 = 10000 cents
 STARTING_PAPER_BALANCE = 10000
 
+# How often the full recount runs to repair any drift in the incremental counters
+PROGRESS_REPAIR_INTERVAL_SECONDS = int(os.environ.get("PROGRESS_REPAIR_INTERVAL_SECONDS", str(24 * 60 * 60)))
+# Recount attempts when concurrent updates keep changing the progress record
+PROGRESS_REPAIR_ATTEMPTS = 3
+# Only one worker repairs; the lease is held across runs while that worker lives
+PROGRESS_REPAIR_LEASE = "progress-repair"
+PROGRESS_REPAIR_LEASE_TTL_SECONDS = int(
+    os.environ.get("PROGRESS_REPAIR_LEASE_TTL_SECONDS", str(2 * PROGRESS_REPAIR_INTERVAL_SECONDS + 60))
+)
+
 MILESTONES = [
     {"id": "m1", "name": "First Steps", "description": "Track your first position", "target": 1, "field": "total_positions"},
     {"id": "m2", "name": "Getting Serious", "description": "Track 5 positions", "target": 5, "field": "total_positions"},
@@ -67,9 +89,19 @@ def get_or_create_progress(user_id: str) -> dict:
     # Backfill paper_balance for existing users
     if "paper_balance" not in progress:
         progress["paper_balance"] = STARTING_PAPER_BALANCE
+    # Counters are updated incrementally; milestone `current` values follow them
+    _sync_milestone_counts(progress)
     return progress
 
 
+def _sync_milestone_counts(progress: dict) -> None:
+    """Copy the live counters into each milestone's `current` (read-side only)."""
+    for milestone in progress.get("milestones", []):
+        m_def = next((m for m in MILESTONES if m["id"] == milestone["id"]), None)
+        if m_def:
+            milestone["current"] = progress.get(m_def["field"], 0)
+
+
 def _recompute_milestones(progress: dict) -> dict:
     now = datetime.now(timezone.utc).isoformat()
     for milestone in progress["milestones"]:
@@ -88,9 +120,17 @@ def _recompute_milestones(progress: dict) -> dict:
     return progress
 
 
+def _all_positions(user_id: str) -> list[dict]:
+    """A user's positions, including archived ones whose DynamoDB copy TTL may
+    already have removed (the DynamoDB copy wins while both exist)."""
+    positions = get_tracked_positions_by_user(user_id)
+    seen = {p.get("position_id") for p in positions}
+    return positions + [p for p in get_archived_by_user("tracked_positions", user_id) if p.get("position_id") not in seen]
+
+
 def _recount_positions(user_id: str, progress: dict) -> dict:
     """Recount position stats from DB for accuracy."""
-    positions = get_tracked_positions_by_user(user_id)
+    positions = _all_positions(user_id)
     progress["total_positions"] = len(positions)
     settled = [p for p in positions if p.get("status", "").startswith("settled")]
     progress["settled_positions"] = len(settled)
@@ -98,35 +138,156 @@ def _recount_positions(user_id: str, progress: dict) -> dict:
     # Recompute paper balance from trade history
     balance = STARTING_PAPER_BALANCE
     for p in positions:
-        entry = p.get("entry_price", 0)
-        status = p.get("status", "")
-        balance -= entry  # deduct entry cost
-        if status == "settled_win":
-            balance += 100  # win pays $1 (100 cents)
-        elif status == "settled_loss":
-            pass  # already deducted entry, payout is 0
-        elif status == "closed":
-            balance += entry  # refund on close
+        balance += _position_deltas(p.get("entry_price", 0), p.get("status", ""))["paper_balance"]
     progress["paper_balance"] = round(balance, 2)
     return progress
 
 
-def record_position_tracked(user_id: str) -> dict:
-    progress = get_or_create_progress(user_id)
-    progress = _recount_positions(user_id, progress)
-    progress = _recompute_milestones(progress)
-    put_user_progress(progress)
-    return progress
+def _position_deltas(entry_price: float, status: str) -> dict:
+    """What one position contributes to the progress counters, given its status.
 
+    The incremental updates below and the full recount share this so they
+    can't drift apart.
+    """
+    balance = -entry_price  # deduct entry cost
+    if status == "settled_win":
+        balance += 100  # win pays $1 (100 cents)
+    elif status == "closed":
+        balance += entry_price  # refund on close
+    # settled_loss: already deducted entry, payout is 0
+    return {
+        "total_positions": 1,
+        "settled_positions": 1 if status.startswith("settled") else 0,
+        "paper_balance": balance,
+    }
 
-def record_settlement(user_id: str) -> dict:
-    progress = get_or_create_progress(user_id)
-    progress = _recount_positions(user_id, progress)
+
+def _apply_progress_deltas(user_id: str, deltas: dict) -> dict:
+    """Apply counter deltas with one atomic update, then persist any new milestones.
+
+    Falls back to a full recount the first time a user has no progress record.
+    """
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return get_or_create_progress(user_id)
+    progress = increment_user_progress(
+        user_id, deltas, defaults={"paper_balance": STARTING_PAPER_BALANCE},
+    )
+    if progress is None:
+        return repair_progress(user_id)
+    return _persist_new_milestones(progress)
+
+
+def _persist_new_milestones(progress: dict) -> dict:
+    """Recompute milestones; write them back only when one was newly completed."""
+    completed_before = {m["id"] for m in progress["milestones"] if m["completed"]}
     progress = _recompute_milestones(progress)
-    put_user_progress(progress)
+    completed_after = {m["id"] for m in progress["milestones"] if m["completed"]}
+    if completed_after != completed_before:
+        update_user_progress(progress["user_id"], {
+            "milestones": progress["milestones"],
+            "bot_ready": progress["bot_ready"],
+        })
     return progress
 
 
+def track_position(position: dict) -> bool:
+    """Write a new position and count it (+1 position, entry cost off the paper
+    balance) in one transaction.
+
+    Returns False if the user had no progress record yet; the position is
+    still written, and the caller should run repair_progress to create one.
+    """
+    deltas = {k: v for k, v in _position_deltas(position.get("entry_price", 0), "active").items() if v}
+    return put_tracked_position_with_progress(
+        position, deltas, defaults={"paper_balance": STARTING_PAPER_BALANCE},
+    )
+
+
+def sync_milestones(user_id: str) -> dict:
+    """Persist any milestones the current counters have newly completed."""
+    progress = get_user_progress(user_id)
+    if not progress:
+        return repair_progress(user_id)
+    return _persist_new_milestones(progress)
+
+
+def record_settlement(user_id: str, won: bool) -> dict:
+    """Count a settlement of an active position: +1 settled, +100¢ on a win."""
+    return record_settlements(user_id, settled=1, won=1 if won else 0)
+
+
+def record_settlements(user_id: str, settled: int, won: int) -> dict:
+    """Count several settlements of a user's active positions in one update."""
+    return _apply_progress_deltas(user_id, {
+        "settled_positions": settled,
+        "paper_balance": 100 * won,
+    })
+
+
+def record_position_removed(user_id: str, position: dict) -> dict:
+    """Undo everything a deleted position contributed to the counters."""
+    deltas = _position_deltas(position.get("entry_price", 0), position.get("status", ""))
+    return _apply_progress_deltas(user_id, {k: -v for k, v in deltas.items()})
+
+
+def repair_progress(user_id: str) -> dict:
+    """Full recount from the positions table; the periodic repair for the counters.
+
+    Writes only the recounted fields, and only if the record's updated_at is
+    still the one read before counting, so an increment or check-in that lands
+    meanwhile isn't overwritten; the recount is retried instead.
+    """
+    for _ in range(PROGRESS_REPAIR_ATTEMPTS):
+        progress = get_or_create_progress(user_id)
+        read_at = progress.get("updated_at")
+        progress = _recompute_milestones(_recount_positions(user_id, progress))
+        written = update_user_progress_if_unchanged(user_id, {
+            "total_positions": progress["total_positions"],
+            "settled_positions": progress["settled_positions"],
+            "paper_balance": progress["paper_balance"],
+            "milestones": progress["milestones"],
+            "bot_ready": progress["bot_ready"],
+            "updated_at": progress["updated_at"],
+        }, read_at)
+        if written is not None:
+            return progress
+    logger.warning("Progress repair for %s kept conflicting with concurrent updates; skipped", user_id)
+    return get_or_create_progress(user_id)
+
+
+async def progress_repair_loop():
+    """Recount every user's progress once per PROGRESS_REPAIR_INTERVAL_SECONDS,
+    in whichever worker holds PROGRESS_REPAIR_LEASE."""
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    try:
+        while True:
+            await asyncio.sleep(PROGRESS_REPAIR_INTERVAL_SECONDS)
+            try:
+                held = await async_db.run(
+                    acquire_lease, PROGRESS_REPAIR_LEASE, owner, PROGRESS_REPAIR_LEASE_TTL_SECONDS, time.time(),
+                )
+                if not held:
+                    continue
+                user_ids = await async_db.run(get_all_progress_user_ids)
+            except Exception:
+                logger.exception("Progress repair: failed to take the lease or list users")
+                continue
+            repaired = 0
+            for user_id in user_ids:
+                try:
+                    await async_db.run(repair_progress, user_id)
+                    repaired += 1
+                except Exception:
+                    logger.exception("Progress repair failed for %s", user_id)
+            logger.info("Progress repair: recounted %d/%d users", repaired, len(user_ids))
+    finally:
+        try:
+            await async_db.run(release_lease, PROGRESS_REPAIR_LEASE, owner)
+        except Exception:
+            logger.exception("Failed to release the progress repair lease")
+
+
 def record_check_in(user_id: str) -> dict:
     progress = get_or_create_progress(user_id)
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
@@ -153,7 +314,17 @@ def record_check_in(user_id: str) -> dict:
     progress["current_streak"] = streak
     progress["longest_streak"] = max(progress.get("longest_streak", 0), streak)
     progress = _recompute_milestones(progress)
-    put_user_progress(progress)
+    # Write only the check-in fields so concurrent counter updates aren't clobbered
+    update_user_progress(user_id, {
+        "check_in_dates": progress["check_in_dates"],
+        "last_check_in": progress["last_check_in"],
+        "total_check_ins": progress["total_check_ins"],
+        "current_streak": progress["current_streak"],
+        "longest_streak": progress["longest_streak"],
+        "milestones": progress["milestones"],
+        "bot_ready": progress["bot_ready"],
+        "updated_at": progress["updated_at"],
+    })
     return progress
 
 
@@ -209,7 +380,7 @@ def _position_sizing(balance: float, entry_price: float, confidence: float, win_
 
 
 def derive_strategy(user_id: str) -> dict:
-    positions = get_tracked_positions_by_user(user_id)
+    positions = _all_positions(user_id)
     settled = [p for p in positions if p.get("status", "").startswith("settled")]
 
     if len(settled) < 5:
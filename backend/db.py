@@ -1,29 +1,142 @@
 import json
 import logging
 import os
+import shutil
+import time
 import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
 from pathlib import Path
 
-import boto3
 from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.transform import TransformationInjector
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from boto3.s3.transfer import TransferConfig
 
-logger = logging.getLogger(__name__)
+from backend import aws
+from backend.cache import TTLCache
 
+logger = logging.getLogger(__name__)
 
-def _floats_to_decimals(obj):
-    return json.loads(json.dumps(obj), parse_float=Decimal)
 
+# ── Native number handling ──
+#
+# boto3's stock TypeSerializer rejects floats and its TypeDeserializer returns
+# Decimals, which used to force a JSON round trip on every write and a full
+# rebuild of every item on every read. These subclasses convert numbers inside
+# boto3's own (de)serialization pass instead, with a type-dispatch fast path for
+# the JSON-shaped items this app stores.
+
+
+class _NativeSerializer(TypeSerializer):
+    """TypeSerializer that accepts floats (stored exactly as their repr)."""
+
+    def serialize(self, value):
+        t = type(value)
+        if t is str:
+            return {"S": value}
+        if t is dict:
+            serialize = self.serialize
+            return {"M": {k: serialize(v) for k, v in value.items()}}
+        if t is list or t is tuple:
+            serialize = self.serialize
+            return {"L": [serialize(v) for v in value]}
+        if t is int and -_MAX_FAST_INT < value < _MAX_FAST_INT:
+            return {"N": str(value)}
+        if t is float:
+            return {"N": self._serialize_n(value)}
+        if t is bool:
+            return {"BOOL": value}
+        if value is None:
+            return {"NULL": True}
+        return super().serialize(value)
+
+    def _is_number(self, value):
+        return isinstance(value, float) or super()._is_number(value)
+
+    def _serialize_n(self, value):
+        if isinstance(value, float):
+            value = Decimal(repr(value))
+        return super()._serialize_n(value)
+
+
+class _NativeDeserializer(TypeDeserializer):
+    """TypeDeserializer that returns int/float instead of Decimal."""
+
+    def deserialize(self, value):
+        if len(value) == 1:
+            (t, v), = value.items()
+            if t == "S":
+                return v
+            if t == "N":
+                return _to_number(v)
+            if t == "M":
+                deserialize = self.deserialize
+                return {k: deserialize(x) for k, x in v.items()}
+            if t == "L":
+                deserialize = self.deserialize
+                return [deserialize(x) for x in v]
+            if t == "BOOL":
+                return v
+            if t == "NULL":
+                return None
+        return super().deserialize(value)
+
+    def _deserialize_n(self, value):
+        return _to_number(value)
+
+
+_MAX_FAST_INT = 10**38
+
+# Request keys whose value is a map of AttributeValues. The transformer replaces
+# those values in place, so only the map itself needs copying.
+_ATTRIBUTE_VALUE_MAPS = frozenset({"Item", "Key", "ExpressionAttributeValues", "ExclusiveStartKey"})
+
+
+def _to_number(text: str) -> int | float:
+    try:
+        return int(text)
+    except ValueError:
+        d = Decimal(text)
+        return int(d) if d == int(d) else float(d)
+
+
+def _copy_request_params(params, **kwargs):
+    """Copy request containers down to the AttributeValue maps.
+
+    Replaces boto3's deepcopy of every request: serialization builds new
+    values and never mutates the caller's nested data, so only the containers
+    the transformer writes into need to be fresh.
+    """
+    if isinstance(params, dict):
+        return {
+            k: dict(v) if k in _ATTRIBUTE_VALUE_MAPS and isinstance(v, dict) else _copy_request_params(v)
+            for k, v in params.items()
+        }
+    if isinstance(params, list):
+        return [_copy_request_params(v) for v in params]
+    return params
+
+
+def _install_native_numbers(resource) -> None:
+    """Swap the resource's (de)serialization handlers for the native ones."""
+    events = resource.meta.client.meta.events
+    injector = TransformationInjector(serializer=_NativeSerializer(), deserializer=_NativeDeserializer())
+    events.unregister("provide-client-params.dynamodb", unique_id="dynamodb-create-params-copy")
+    events.unregister("before-parameter-build.dynamodb", unique_id="dynamodb-attr-value-input")
+    events.unregister("after-call.dynamodb", unique_id="dynamodb-attr-value-output")
+    events.register(
+        "provide-client-params.dynamodb", _copy_request_params, unique_id="dynamodb-create-params-copy",
+    )
+    events.register(
+        "before-parameter-build.dynamodb", injector.inject_attribute_value_input,
+        unique_id="dynamodb-attr-value-input",
+    )
+    events.register(
+        "after-call.dynamodb", injector.inject_attribute_value_output,
+        unique_id="dynamodb-attr-value-output",
+    )
 
-def _decimals_to_floats(obj):
-    if isinstance(obj, list):
-        return [_decimals_to_floats(i) for i in obj]
-    if isinstance(obj, dict):
-        return {k: _decimals_to_floats(v) for k, v in obj.items()}
-    if isinstance(obj, Decimal):
-        return int(obj) if obj == int(obj) else float(obj)
-    return obj
 
 TABLE_NAME = os.environ.get("TABLE_NAME", "kalshi-use-trading-logs")
 SNAPSHOTS_TABLE_NAME = os.environ.get("SNAPSHOTS_TABLE_NAME", "kalshi-use-market-snapshots")
@@ -31,43 +144,128 @@ PREDICTIONS_TABLE_NAME = os.environ.get("PREDICTIONS_TABLE_NAME", "kalshi-use-pr
 INTEGRATIONS_TABLE_NAME = os.environ.get("INTEGRATIONS_TABLE_NAME", "kalshi-use-integrations")
 TRACKED_POSITIONS_TABLE_NAME = os.environ.get("TRACKED_POSITIONS_TABLE_NAME", "kalshi-use-tracked-positions")
 USER_PROGRESS_TABLE_NAME = os.environ.get("USER_PROGRESS_TABLE_NAME", "kalshi-use-user-progress")
+MONITOR_LEASES_TABLE_NAME = os.environ.get("MONITOR_LEASES_TABLE_NAME", "kalshi-use-monitor-leases")
+MONITOR_CHECKPOINTS_TABLE_NAME = os.environ.get("MONITOR_CHECKPOINTS_TABLE_NAME", "kalshi-use-monitor-checkpoints")
 S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME", "kalshi-use-images")
 LOCAL_IMAGE_DIR = Path("/tmp/kalshi-images")
-
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
-snapshots_table = dynamodb.Table(SNAPSHOTS_TABLE_NAME)
-predictions_table = dynamodb.Table(PREDICTIONS_TABLE_NAME)
-integrations_table = dynamodb.Table(INTEGRATIONS_TABLE_NAME)
-tracked_positions_table = dynamodb.Table(TRACKED_POSITIONS_TABLE_NAME)
-user_progress_table = dynamodb.Table(USER_PROGRESS_TABLE_NAME)
-
-# S3 client — always attempt S3 in production (App Runner provides IAM role).
-# Fall back to local only when no AWS credentials are configured at all.
-s3_client = boto3.client("s3")
-try:
-    _creds = boto3.Session().get_credentials()
-    _s3_available = _creds is not None and _creds.access_key is not None
-except Exception:
-    _s3_available = False
-
-if _s3_available:
-    logger.info("S3 enabled — bucket: %s", S3_BUCKET_NAME)
-else:
+PRESIGNED_URL_CACHE_SIZE = int(os.environ.get("PRESIGNED_URL_CACHE_SIZE", "10000"))
+PRESIGNED_URL_SAFETY_MARGIN = int(os.environ.get("PRESIGNED_URL_SAFETY_MARGIN", "300"))  # seconds
+UPLOAD_MULTIPART_THRESHOLD = int(os.environ.get("UPLOAD_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+UPLOAD_MULTIPART_CHUNKSIZE = int(os.environ.get("UPLOAD_MULTIPART_CHUNKSIZE", str(8 * 1024 * 1024)))
+INTEGRATION_CACHE_SIZE = int(os.environ.get("INTEGRATION_CACHE_SIZE", "10000"))
+INTEGRATION_CACHE_TTL = int(os.environ.get("INTEGRATION_CACHE_TTL", "300"))  # seconds
+# "dynamodb" (default) or "sqlite" for the embedded backend in backend.local_db
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "dynamodb")
+
+# Clients come from backend.aws and are created on first use, not at import.
+dynamodb = aws.Lazy(lambda: aws.resource("dynamodb", on_create=_install_native_numbers))
+
+
+def _table(name: str) -> aws.Lazy:
+    return aws.Lazy(lambda: dynamodb.Table(name))
+
+
+table = _table(TABLE_NAME)
+snapshots_table = _table(SNAPSHOTS_TABLE_NAME)
+predictions_table = _table(PREDICTIONS_TABLE_NAME)
+integrations_table = _table(INTEGRATIONS_TABLE_NAME)
+tracked_positions_table = _table(TRACKED_POSITIONS_TABLE_NAME)
+user_progress_table = _table(USER_PROGRESS_TABLE_NAME)
+monitor_leases_table = _table(MONITOR_LEASES_TABLE_NAME)
+monitor_checkpoints_table = _table(MONITOR_CHECKPOINTS_TABLE_NAME)
+
+s3_client = aws.Lazy(lambda: aws.client("s3"))
+
+
+def _check_s3() -> bool:
+    # Always attempt S3 in production (App Runner provides an IAM role). Fall
+    # back to local storage only when no AWS credentials are configured at all.
+    if STORAGE_BACKEND == "sqlite":
+        logger.info("Embedded storage backend enabled")
+        return False
+    if aws.credentials_available():
+        logger.info("S3 enabled — bucket: %s", S3_BUCKET_NAME)
+        return True
     logger.warning("No AWS credentials — falling back to local storage at %s", LOCAL_IMAGE_DIR)
+    return False
+
+
+_s3_available = aws.LazyFlag(_check_s3)
+
+_upload_transfer_config = TransferConfig(
+    multipart_threshold=UPLOAD_MULTIPART_THRESHOLD,
+    multipart_chunksize=UPLOAD_MULTIPART_CHUNKSIZE,
+    max_concurrency=4,
+)
+
+
+# ── Projections ──
+#
+# List views only need enough of each item to render a row. Summary queries
+# project these attribute paths so the bulky blobs (orderbook arrays, factor
+# lists, entry snapshots) are never read, transferred or deserialized.
+
+PREDICTION_SUMMARY_FIELDS = (
+    "prediction_id", "user_id", "image_key", "context", "model", "status",
+    "error_message", "user_notes", "model_idea", "created_at", "completed_at", "updated_at",
+    "recommendation.ticker", "recommendation.title", "recommendation.side",
+    "recommendation.confidence", "recommendation.reasoning", "recommendation.no_bet",
+    "recommendation.no_bet_reason", "recommendation.recommended_position",
+    "market_data.status", "market_data.ticker", "market_data.market_status", "market_data.result",
+    "market_data.yes_bid", "market_data.yes_ask", "market_data.no_bid", "market_data.no_ask",
+    "market_data.last_price", "market_data.price_delta", "market_data.volume_24h",
+    "market_data.event_title", "market_data.event_category",
+)
+
+TRACKED_POSITION_SUMMARY_FIELDS = (
+    "position_id", "user_id", "prediction_id", "ticker", "side", "entry_price", "title",
+    "model", "confidence", "image_key", "status", "settlement_price", "realized_pnl",
+    "settled_at", "last_notified_price", "alerts", "created_at", "updated_at",
+)
+
+
+def project_item(item: dict, paths) -> dict:
+    """Keep only the given dotted attribute paths, like a ProjectionExpression
+    does server-side."""
+    out: dict = {}
+    for path in paths:
+        parts = path.split(".")
+        src, dst = item, out
+        for part in parts[:-1]:
+            src = src.get(part) if isinstance(src, dict) else None
+            if not isinstance(src, dict):
+                break
+            dst = dst.setdefault(part, {})
+        else:
+            if isinstance(src, dict) and parts[-1] in src:
+                dst[parts[-1]] = src[parts[-1]]
+    return out
+
+
+def _projection(paths) -> dict:
+    """Build ProjectionExpression kwargs for dotted attribute paths."""
+    names: dict[str, str] = {}
+    exprs = []
+    for path in paths:
+        parts = []
+        for part in path.split("."):
+            placeholder = f"#{part}"
+            names[placeholder] = part
+            parts.append(placeholder)
+        exprs.append(".".join(parts))
+    return {"ProjectionExpression": ", ".join(exprs), "ExpressionAttributeNames": names}
 
 
 def put_trade(trade: dict) -> dict:
     trade["trade_id"] = str(uuid.uuid4())
     trade["created_at"] = datetime.now(timezone.utc).isoformat()
-    table.put_item(Item=_floats_to_decimals(trade))
+    table.put_item(Item=trade)
     return trade
 
 
 def get_trade(trade_id: str) -> dict | None:
     resp = table.get_item(Key={"trade_id": trade_id})
-    item = resp.get("Item")
-    return _decimals_to_floats(item) if item else None
+    return resp.get("Item")
 
 
 def get_trades_by_user(user_id: str) -> list[dict]:
@@ -75,7 +273,7 @@ def get_trades_by_user(user_id: str) -> list[dict]:
         IndexName="user_id-index",
         KeyConditionExpression=Key("user_id").eq(user_id),
     )
-    return _decimals_to_floats(resp.get("Items", []))
+    return resp.get("Items", [])
 
 
 def update_trade(trade_id: str, updates: dict) -> dict | None:
@@ -88,7 +286,7 @@ def update_trade(trade_id: str, updates: dict) -> dict | None:
     for i, (key, val) in enumerate(fields.items()):
         expr_parts.append(f"#{key} = :val{i}")
         expr_names[f"#{key}"] = key
-        expr_values[f":val{i}"] = Decimal(str(val)) if isinstance(val, float) else val
+        expr_values[f":val{i}"] = val
     resp = table.update_item(
         Key={"trade_id": trade_id},
         UpdateExpression="SET " + ", ".join(expr_parts),
@@ -96,7 +294,7 @@ def update_trade(trade_id: str, updates: dict) -> dict | None:
         ExpressionAttributeValues=expr_values,
         ReturnValues="ALL_NEW",
     )
-    return _decimals_to_floats(resp.get("Attributes"))
+    return resp.get("Attributes")
 
 
 def delete_trade(trade_id: str) -> bool:
@@ -109,7 +307,7 @@ def delete_trade(trade_id: str) -> bool:
 
 def put_snapshot(snapshot: dict) -> dict:
     snapshot["scraped_at"] = datetime.now(timezone.utc).isoformat()
-    snapshots_table.put_item(Item=_floats_to_decimals(snapshot))
+    snapshots_table.put_item(Item=snapshot)
     return snapshot
 
 
@@ -119,7 +317,7 @@ def get_snapshots(event_ticker: str, limit: int = 50) -> list[dict]:
         ScanIndexForward=False,
         Limit=limit,
     )
-    return _decimals_to_floats(resp.get("Items", []))
+    return resp.get("Items", [])
 
 
 def get_latest_snapshot(event_ticker: str) -> dict | None:
@@ -129,7 +327,7 @@ def get_latest_snapshot(event_ticker: str) -> dict | None:
         Limit=1,
     )
     items = resp.get("Items", [])
-    return _decimals_to_floats(items[0]) if items else None
+    return items[0] if items else None
 
 
 def get_snapshots_by_category(category: str, limit: int = 50) -> list[dict]:
@@ -139,7 +337,51 @@ def get_snapshots_by_category(category: str, limit: int = 50) -> list[dict]:
         ScanIndexForward=False,
         Limit=limit,
     )
-    return _decimals_to_floats(resp.get("Items", []))
+    return resp.get("Items", [])
+
+
+def append_series_samples(
+    series_key: str,
+    bucket: str,
+    columns: dict[str, list],
+    expires_at: int | None = None,
+) -> int:
+    """Append columnar samples to one time-series bucket item in the snapshots
+    table (hash = series_key, range = bucket start). Returns the number of
+    samples now in the bucket, taken from its "t" column."""
+    expr_parts = []
+    expr_names = {}
+    expr_values: dict = {":empty": []}
+    for i, (name, values) in enumerate(columns.items()):
+        expr_parts.append(f"#c{i} = list_append(if_not_exists(#c{i}, :empty), :v{i})")
+        expr_names[f"#c{i}"] = name
+        expr_values[f":v{i}"] = values
+    if expires_at is not None:
+        expr_parts.append("expires_at = :exp")
+        expr_values[":exp"] = expires_at
+    resp = snapshots_table.update_item(
+        Key={"event_ticker": series_key, "scraped_at": bucket},
+        UpdateExpression="SET " + ", ".join(expr_parts),
+        ExpressionAttributeNames=expr_names,
+        ExpressionAttributeValues=expr_values,
+        ReturnValues="UPDATED_NEW",
+    )
+    return len(resp.get("Attributes", {}).get("t", []))
+
+
+def get_series_buckets(series_key: str, start_bucket: str, end_bucket: str) -> list[dict]:
+    """Bucket items of one series with start_bucket <= bucket <= end_bucket, oldest first."""
+    items = []
+    query = {
+        "KeyConditionExpression": Key("event_ticker").eq(series_key)
+        & Key("scraped_at").between(start_bucket, end_bucket),
+    }
+    while True:
+        resp = snapshots_table.query(**query)
+        items.extend(resp.get("Items", []))
+        if "LastEvaluatedKey" not in resp:
+            return items
+        query["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
 
 
 # ── S3 ──
@@ -161,14 +403,64 @@ def upload_image(file_bytes: bytes, key: str, content_type: str = "image/jpeg")
     return key
 
 
-def get_presigned_url(key: str, expires_in: int = 3600) -> str:
+def upload_image_stream(fileobj, key: str, content_type: str = "image/jpeg") -> str:
+    """Upload from a file-like object in chunks without reading it into memory.
+
+    Bodies above UPLOAD_MULTIPART_THRESHOLD are sent as an S3 multipart upload.
+    """
     if _s3_available:
-        return s3_client.generate_presigned_url(
+        s3_client.upload_fileobj(
+            fileobj,
+            S3_BUCKET_NAME,
+            key,
+            ExtraArgs={"ContentType": content_type},
+            Config=_upload_transfer_config,
+        )
+    else:
+        local_path = LOCAL_IMAGE_DIR / key
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(local_path, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+        logger.info("Saved image locally: %s", local_path)
+    return key
+
+
+# Presigned URLs are reused until PRESIGNED_URL_SAFETY_MARGIN before they expire,
+# so list reads and GET /predictions/{id} polling skip repeated SigV4 signing.
+# A URL also stops working when the temporary credentials that signed it expire,
+# so reuse never outlasts those either.
+_presigned_url_cache = TTLCache(maxsize=PRESIGNED_URL_CACHE_SIZE, ttl=3600)
+
+
+def _signing_credentials_ttl() -> float | None:
+    """Seconds until the S3 client's temporary credentials expire; None for
+    long-lived keys."""
+    credentials = getattr(getattr(s3_client, "_request_signer", None), "_credentials", None)
+    expiry = getattr(credentials, "_expiry_time", None)
+    if not isinstance(expiry, datetime):
+        return None
+    return (expiry - datetime.now(timezone.utc)).total_seconds()
+
+
+def get_presigned_url(key: str, expires_in: int = 3600) -> str:
+    if not _s3_available:
+        return f"file://{LOCAL_IMAGE_DIR / key}"
+    cache_key = (key, expires_in)
+    url = _presigned_url_cache.get(cache_key)
+    if url is None:
+        url = s3_client.generate_presigned_url(
             "get_object",
             Params={"Bucket": S3_BUCKET_NAME, "Key": key},
             ExpiresIn=expires_in,
         )
-    return f"file://{LOCAL_IMAGE_DIR / key}"
+        valid_for = expires_in
+        credentials_ttl = _signing_credentials_ttl()
+        if credentials_ttl is not None:
+            valid_for = min(valid_for, credentials_ttl)
+        reuse_for = valid_for - PRESIGNED_URL_SAFETY_MARGIN
+        if reuse_for > 0:
+            _presigned_url_cache.set(cache_key, url, ttl=reuse_for)
+    return url
 
 
 # ── Analysis Log (S3) ──
@@ -236,11 +528,113 @@ def get_image_bytes(image_key: str) -> bytes:
     return local_path.read_bytes()
 
 
+# ── Image dedup & recommendation reuse ──
+#
+# Images are stored under their content hash. Each image's 64-bit dHash is
+# indexed as four 16-bit bands of empty pointer objects
+# (image_index/dhash/{band}/{value}/{newest_first}-{sha256}-{dhash}), so
+# near-duplicates can be found by listing four prefixes: any two hashes within
+# Hamming distance 3 share at least one band. {newest_first} counts down with
+# time, so one LIST call of at most DHASH_BAND_SCAN_LIMIT keys returns a band's
+# most recent images however many share it (a bucket lifecycle rule expires
+# the index).
+
+IMAGE_INDEX_PREFIX = "image_index/dhash"
+RECOMMENDATION_CACHE_PREFIX = "recommendation_cache"
+DHASH_BANDS = 4
+DHASH_BAND_SCAN_LIMIT = int(os.environ.get("DHASH_BAND_SCAN_LIMIT", "200"))
+_NEWEST_FIRST_BASE = 10**10
+
+
+def _dhash_band_prefixes(dhash: int) -> list[str]:
+    return [f"{IMAGE_INDEX_PREFIX}/{i}/{(dhash >> (16 * i)) & 0xFFFF:04x}/" for i in range(DHASH_BANDS)]
+
+
+def _image_index_name(sha256: str, dhash: int, now: float) -> str:
+    return f"{_NEWEST_FIRST_BASE - int(now):010d}-{sha256}-{dhash:016x}"
+
+
+def _parse_image_index_names(names, newer_than: float | None) -> dict[str, int]:
+    similar = {}
+    for name in names:
+        parts = name.split("-")
+        if len(parts) != 3:
+            continue
+        newest_first, sha256, hex_hash = parts
+        if newer_than is None or _NEWEST_FIRST_BASE - int(newest_first) >= newer_than:
+            similar[sha256] = int(hex_hash, 16)
+    return similar
+
+
+def image_exists(key: str) -> bool:
+    if not _s3_available:
+        return (LOCAL_IMAGE_DIR / key).exists()
+    try:
+        s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=key)
+        return True
+    except s3_client.exceptions.ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def put_image_fingerprint(sha256: str, dhash: int) -> None:
+    """Index an image's perceptual hash for find_similar_images."""
+    name = _image_index_name(sha256, dhash, time.time())
+    for prefix in _dhash_band_prefixes(dhash):
+        key = f"{prefix}{name}"
+        if _s3_available:
+            s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=b"")
+        else:
+            local_path = LOCAL_IMAGE_DIR / key
+            local_path.parent.mkdir(parents=True, exist_ok=True)
+            local_path.touch()
+
+
+def find_similar_images(dhash: int, newer_than: float | None = None) -> dict[str, int]:
+    """sha256 -> dHash of the most recently indexed images sharing at least one
+    band with dhash (up to DHASH_BAND_SCAN_LIMIT per band), optionally only
+    those indexed after the epoch time newer_than."""
+    names: set[str] = set()
+    for prefix in _dhash_band_prefixes(dhash):
+        if _s3_available:
+            resp = s3_client.list_objects_v2(Bucket=S3_BUCKET_NAME, Prefix=prefix, MaxKeys=DHASH_BAND_SCAN_LIMIT)
+            names.update(obj["Key"].rsplit("/", 1)[-1] for obj in resp.get("Contents", []))
+        else:
+            local_dir = LOCAL_IMAGE_DIR / prefix
+            if local_dir.exists():
+                names.update(sorted(p.name for p in local_dir.iterdir())[:DHASH_BAND_SCAN_LIMIT])
+    return _parse_image_index_names(names, newer_than)
+
+
+def get_cached_recommendation(cache_key: str) -> dict | None:
+    key = f"{RECOMMENDATION_CACHE_PREFIX}/{cache_key}.json"
+    if not _s3_available:
+        local_path = LOCAL_IMAGE_DIR / key
+        return json.loads(local_path.read_text()) if local_path.exists() else None
+    try:
+        resp = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    return json.loads(resp["Body"].read())
+
+
+def put_cached_recommendation(cache_key: str, entry: dict) -> None:
+    key = f"{RECOMMENDATION_CACHE_PREFIX}/{cache_key}.json"
+    body = json.dumps(entry, default=str)
+    if _s3_available:
+        s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=body.encode("utf-8"), ContentType="application/json")
+    else:
+        local_path = LOCAL_IMAGE_DIR / key
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        local_path.write_text(body)
+
+
 # ── Predictions ──
 
 
 def put_prediction(prediction: dict) -> dict:
-    predictions_table.put_item(Item=_floats_to_decimals(prediction))
+    predictions_table.put_item(Item=prediction)
     return prediction
 
 
@@ -254,10 +648,11 @@ def update_prediction(prediction_id: str, updates: dict) -> dict | None:
     for i, (key, val) in enumerate(fields.items()):
         expr_parts.append(f"#{key} = :val{i}")
         expr_names[f"#{key}"] = key
-        expr_values[f":val{i}"] = _floats_to_decimals(val)
+        expr_values[f":val{i}"] = val
+    # An edit cancels any pending archive expiry; the next archival run re-archives it
     resp = predictions_table.update_item(
         Key={"prediction_id": prediction_id},
-        UpdateExpression="SET " + ", ".join(expr_parts),
+        UpdateExpression="SET " + ", ".join(expr_parts) + " REMOVE expires_at",
         ExpressionAttributeNames=expr_names,
         ExpressionAttributeValues=expr_values,
         ReturnValues="ALL_NEW",
@@ -265,7 +660,6 @@ def update_prediction(prediction_id: str, updates: dict) -> dict | None:
     item = resp.get("Attributes")
     if not item:
         return None
-    item = _decimals_to_floats(item)
     if item.get("image_key"):
         item["image_url"] = get_presigned_url(item["image_key"])
     return item
@@ -276,19 +670,22 @@ def get_prediction(prediction_id: str) -> dict | None:
     item = resp.get("Item")
     if not item:
         return None
-    item = _decimals_to_floats(item)
     # Refresh presigned URL
     if item.get("image_key"):
         item["image_url"] = get_presigned_url(item["image_key"])
     return item
 
 
-def get_predictions_by_user(user_id: str) -> list[dict]:
-    resp = predictions_table.query(
-        IndexName="user_id-index",
-        KeyConditionExpression=Key("user_id").eq(user_id),
-    )
-    items = _decimals_to_floats(resp.get("Items", []))
+def get_predictions_by_user(user_id: str, summary: bool = False) -> list[dict]:
+    """List a user's predictions. summary=True projects PREDICTION_SUMMARY_FIELDS only."""
+    query = {
+        "IndexName": "user_id-index",
+        "KeyConditionExpression": Key("user_id").eq(user_id),
+    }
+    if summary:
+        query.update(_projection(PREDICTION_SUMMARY_FIELDS))
+    resp = predictions_table.query(**query)
+    items = resp.get("Items", [])
     for item in items:
         if item.get("image_key"):
             item["image_url"] = get_presigned_url(item["image_key"])
@@ -296,18 +693,78 @@ def get_predictions_by_user(user_id: str) -> list[dict]:
 
 
 # ── Integrations ──
+#
+# Integration records are read on every prediction email, portfolio request and
+# monitor cycle but change rarely, so reads go through a per-user, in-process
+# TTL cache. Every write below invalidates the user's entry; other instances
+# see the change within INTEGRATION_CACHE_TTL.
+
+_integrations_cache = TTLCache(maxsize=INTEGRATION_CACHE_SIZE, ttl=INTEGRATION_CACHE_TTL)
+
+# Sort keys BatchGetItem looks up per user: "{platform}#{account_type}" for the
+# account types IntegrationConnect accepts, plus the standalone push-token record.
+KNOWN_PLATFORM_ACCOUNTS = ("kalshi#personal", "kalshi#agent", "push_token")
+_BATCH_GET_LIMIT = 100
+# Backoff between UnprocessedKeys retries: doubles from BASE up to MAX seconds
+_BATCH_GET_BACKOFF_BASE = 0.05
+_BATCH_GET_BACKOFF_MAX = 2.0
 
 
 def put_integration(integration: dict) -> dict:
-    integrations_table.put_item(Item=_floats_to_decimals(integration))
+    integrations_table.put_item(Item=integration)
+    _integrations_cache.pop(integration["user_id"])
     return integration
 
 
 def get_integrations_by_user(user_id: str) -> list[dict]:
-    resp = integrations_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-    )
-    return _decimals_to_floats(resp.get("Items", []))
+    cached = _integrations_cache.get(user_id)
+    if cached is None:
+        resp = integrations_table.query(
+            KeyConditionExpression=Key("user_id").eq(user_id),
+        )
+        cached = resp.get("Items", [])
+        _integrations_cache.set(user_id, cached)
+    return [dict(item) for item in cached]
+
+
+def get_integrations_for_users(user_ids) -> dict[str, list[dict]]:
+    """Integration records for many users. Cache misses are fetched with
+    BatchGetItem over KNOWN_PLATFORM_ACCOUNTS instead of one query per user.
+
+    Platforms and account types are free-form, so for a cache miss this can
+    leave out records under other sort keys. Those partial results are not
+    cached; callers that need a complete view fall back to
+    get_integrations_by_user for users the batch didn't resolve."""
+    result: dict[str, list[dict]] = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        cached = _integrations_cache.get(user_id)
+        if cached is None:
+            missing.append(user_id)
+        else:
+            result[user_id] = [dict(item) for item in cached]
+    if not missing:
+        return result
+
+    fetched: dict[str, list[dict]] = {user_id: [] for user_id in missing}
+    keys = [{"user_id": u, "platform_account": pa} for u in missing for pa in KNOWN_PLATFORM_ACCOUNTS]
+    for start in range(0, len(keys), _BATCH_GET_LIMIT):
+        request = {INTEGRATIONS_TABLE_NAME: {"Keys": keys[start:start + _BATCH_GET_LIMIT]}}
+        delay = _BATCH_GET_BACKOFF_BASE
+        while True:
+            resp = dynamodb.batch_get_item(RequestItems=request)
+            for item in resp.get("Responses", {}).get(INTEGRATIONS_TABLE_NAME, []):
+                fetched[item["user_id"]].append(item)
+            request = resp.get("UnprocessedKeys")
+            if not request:
+                break
+            # Unprocessed keys mean the table is throttling; back off before retrying
+            time.sleep(delay)
+            delay = min(delay * 2, _BATCH_GET_BACKOFF_MAX)
+    for user_id, items in fetched.items():
+        items.sort(key=lambda item: item["platform_account"])
+        result[user_id] = items
+    return result
 
 
 def update_integration_email(user_id: str, platform_account: str, email: str) -> bool:
@@ -316,6 +773,7 @@ def update_integration_email(user_id: str, platform_account: str, email: str) ->
         UpdateExpression="SET email = :e",
         ExpressionAttributeValues={":e": email},
     )
+    _integrations_cache.pop(user_id)
     return True
 
 
@@ -323,39 +781,80 @@ def delete_integration(user_id: str, platform_account: str) -> bool:
     integrations_table.delete_item(
         Key={"user_id": user_id, "platform_account": platform_account},
     )
+    _integrations_cache.pop(user_id)
     return True
 
 
 # ── Push Tokens ──
+#
+# New registrations go on the standalone PUSH_TOKEN_ACCOUNT record. Users the
+# full query found no token for are remembered for PUSH_TOKEN_MISS_TTL, so a
+# monitor rescan only batch-reads them; a token they register later is on the
+# batch-read record, so the miss cache can't hide it.
+
+PUSH_TOKEN_ACCOUNT = "push_token"
+PUSH_TOKEN_MISS_TTL = int(os.environ.get("PUSH_TOKEN_MISS_TTL", str(24 * 60 * 60)))  # seconds
+_no_push_token_cache = TTLCache(maxsize=INTEGRATION_CACHE_SIZE, ttl=PUSH_TOKEN_MISS_TTL)
 
 
 def set_push_token_for_user(user_id: str, token: str) -> None:
-    """Store expo_push_token on the user's first integration record."""
-    integrations = get_integrations_by_user(user_id)
-    if integrations:
-        item = integrations[0]
-        integrations_table.update_item(
-            Key={"user_id": user_id, "platform_account": item["platform_account"]},
-            UpdateExpression="SET expo_push_token = :t",
-            ExpressionAttributeValues={":t": token},
-        )
-    else:
-        # No integration yet — store a standalone push-token record
-        integrations_table.put_item(Item={
-            "user_id": user_id,
-            "platform_account": "push_token",
-            "expo_push_token": token,
-        })
+    """Store expo_push_token on the user's standalone push-token record, which
+    get_push_tokens_for_users can batch-read."""
+    integrations_table.put_item(Item={
+        "user_id": user_id,
+        "platform_account": PUSH_TOKEN_ACCOUNT,
+        "expo_push_token": token,
+    })
+    _integrations_cache.pop(user_id)
+    _no_push_token_cache.pop(user_id)
+
+
+def remove_push_token(user_id: str, token: str) -> None:
+    """Clear a push token Expo reported as no longer registered, wherever the
+    user's records still hold it."""
+    for item in get_integrations_by_user(user_id):
+        if item.get("expo_push_token") != token:
+            continue
+        try:
+            integrations_table.update_item(
+                Key={"user_id": user_id, "platform_account": item["platform_account"]},
+                UpdateExpression="REMOVE expo_push_token",
+                ConditionExpression="expo_push_token = :t",
+                ExpressionAttributeValues={":t": token},
+            )
+        except integrations_table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass  # re-registered meanwhile
+    _integrations_cache.pop(user_id)
+
+
+def _first_push_token(integrations: list[dict]) -> str | None:
+    # The standalone record holds the latest registration; tokens registered
+    # before it existed sit on the user's first integration
+    for item in sorted(integrations, key=lambda item: item["platform_account"] != PUSH_TOKEN_ACCOUNT):
+        token = item.get("expo_push_token")
+        if token:
+            return token
+    return None
 
 
 def get_push_token_for_user(user_id: str) -> str | None:
     """Return the expo_push_token for a user, if any."""
-    integrations = get_integrations_by_user(user_id)
-    for item in integrations:
-        token = item.get("expo_push_token")
+    return _first_push_token(get_integrations_by_user(user_id))
+
+
+def get_push_tokens_for_users(user_ids) -> dict[str, str]:
+    """user_id -> expo_push_token for the users that have one."""
+    tokens = {}
+    for user_id, integrations in get_integrations_for_users(user_ids).items():
+        token = _first_push_token(integrations)
+        if token is None and _no_push_token_cache.get(user_id) is None:
+            # An older token can sit on a record the batch doesn't know the key of
+            token = _first_push_token(get_integrations_by_user(user_id))
+            if token is None:
+                _no_push_token_cache.set(user_id, True)
         if token:
-            return token
-    return None
+            tokens[user_id] = token
+    return tokens
 
 
 def get_all_users_with_active_positions() -> dict[str, list[dict]]:
@@ -365,7 +864,7 @@ def get_all_users_with_active_positions() -> dict[str, list[dict]]:
         ExpressionAttributeNames={"#s": "status"},
         ExpressionAttributeValues={":active": "active"},
     )
-    items = _decimals_to_floats(resp.get("Items", []))
+    items = resp.get("Items", [])
     grouped: dict[str, list[dict]] = {}
     for pos in items:
         uid = pos.get("user_id")
@@ -378,25 +877,31 @@ def get_all_users_with_active_positions() -> dict[str, list[dict]]:
 
 
 def put_tracked_position(position: dict) -> dict:
-    tracked_positions_table.put_item(Item=_floats_to_decimals(position))
+    tracked_positions_table.put_item(Item=position)
     return position
 
 
 def get_tracked_position(position_id: str) -> dict | None:
     resp = tracked_positions_table.get_item(Key={"position_id": position_id})
-    item = resp.get("Item")
-    return _decimals_to_floats(item) if item else None
+    return resp.get("Item")
 
 
-def get_tracked_positions_by_user(user_id: str) -> list[dict]:
-    resp = tracked_positions_table.query(
-        IndexName="user_id-index",
-        KeyConditionExpression=Key("user_id").eq(user_id),
-    )
-    return _decimals_to_floats(resp.get("Items", []))
+def get_tracked_positions_by_user(user_id: str, summary: bool = False) -> list[dict]:
+    """List a user's positions. summary=True skips the entry-time market snapshot."""
+    query = {
+        "IndexName": "user_id-index",
+        "KeyConditionExpression": Key("user_id").eq(user_id),
+    }
+    if summary:
+        query.update(_projection(TRACKED_POSITION_SUMMARY_FIELDS))
+    resp = tracked_positions_table.query(**query)
+    return resp.get("Items", [])
 
 
 def update_tracked_position(position_id: str, updates: dict) -> dict | None:
+    """SET fields on an existing position. None if it doesn't exist (e.g. it was
+    deleted while a background update was in flight), rather than creating a
+    partial item."""
     fields = {k: v for k, v in updates.items() if v is not None}
     if not fields:
         return get_tracked_position(position_id)
@@ -406,15 +911,65 @@ def update_tracked_position(position_id: str, updates: dict) -> dict | None:
     for i, (key, val) in enumerate(fields.items()):
         expr_parts.append(f"#{key} = :val{i}")
         expr_names[f"#{key}"] = key
-        expr_values[f":val{i}"] = _floats_to_decimals(val)
-    resp = tracked_positions_table.update_item(
-        Key={"position_id": position_id},
-        UpdateExpression="SET " + ", ".join(expr_parts),
-        ExpressionAttributeNames=expr_names,
-        ExpressionAttributeValues=expr_values,
-        ReturnValues="ALL_NEW",
-    )
-    return _decimals_to_floats(resp.get("Attributes"))
+        expr_values[f":val{i}"] = val
+    expr_names["#position_id"] = "position_id"
+    try:
+        # An edit cancels any pending archive expiry; the next archival run re-archives it
+        resp = tracked_positions_table.update_item(
+            Key={"position_id": position_id},
+            UpdateExpression="SET " + ", ".join(expr_parts) + " REMOVE expires_at",
+            ConditionExpression="attribute_exists(#position_id)",
+            ExpressionAttributeNames=expr_names,
+            ExpressionAttributeValues=expr_values,
+            ReturnValues="ALL_NEW",
+        )
+    except tracked_positions_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return None
+    return resp.get("Attributes")
+
+
+def settle_tracked_position(position_id: str, updates: dict) -> dict | None:
+    """Apply settlement fields only if the position is still active.
+
+    Returns the updated item, or None if another writer already moved it out of
+    'active' — so exactly one caller gets to count each settlement.
+    """
+    expr_parts = []
+    expr_names = {"#status": "status"}
+    expr_values = {":active": "active"}
+    for i, (key, val) in enumerate(updates.items()):
+        expr_parts.append(f"#{key} = :val{i}")
+        expr_names[f"#{key}"] = key
+        expr_values[f":val{i}"] = val
+    try:
+        resp = tracked_positions_table.update_item(
+            Key={"position_id": position_id},
+            UpdateExpression="SET " + ", ".join(expr_parts),
+            ConditionExpression="#status = :active",
+            ExpressionAttributeNames=expr_names,
+            ExpressionAttributeValues=expr_values,
+            ReturnValues="ALL_NEW",
+        )
+    except tracked_positions_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return None
+    return resp.get("Attributes")
+
+
+def clear_position_alert(position_id: str, kind: str, level: float) -> bool:
+    """Remove one price alert from a position, only if it is still set to
+    `level`. False if it was edited or cleared meanwhile — so exactly one
+    caller gets to fire each alert."""
+    try:
+        tracked_positions_table.update_item(
+            Key={"position_id": position_id},
+            UpdateExpression="REMOVE alerts.#kind SET updated_at = :now",
+            ConditionExpression="alerts.#kind = :level",
+            ExpressionAttributeNames={"#kind": kind},
+            ExpressionAttributeValues={":level": level, ":now": datetime.now(timezone.utc).isoformat()},
+        )
+    except tracked_positions_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
 
 
 def delete_tracked_position(position_id: str) -> bool:
@@ -427,12 +982,11 @@ def delete_tracked_position(position_id: str) -> bool:
 
 def get_user_progress(user_id: str) -> dict | None:
     resp = user_progress_table.get_item(Key={"user_id": user_id})
-    item = resp.get("Item")
-    return _decimals_to_floats(item) if item else None
+    return resp.get("Item")
 
 
 def put_user_progress(progress: dict) -> dict:
-    user_progress_table.put_item(Item=_floats_to_decimals(progress))
+    user_progress_table.put_item(Item=progress)
     return progress
 
 
@@ -446,7 +1000,7 @@ def update_user_progress(user_id: str, updates: dict) -> dict | None:
     for i, (key, val) in enumerate(fields.items()):
         expr_parts.append(f"#{key} = :val{i}")
         expr_names[f"#{key}"] = key
-        expr_values[f":val{i}"] = _floats_to_decimals(val)
+        expr_values[f":val{i}"] = val
     resp = user_progress_table.update_item(
         Key={"user_id": user_id},
         UpdateExpression="SET " + ", ".join(expr_parts),
@@ -454,4 +1008,368 @@ def update_user_progress(user_id: str, updates: dict) -> dict | None:
         ExpressionAttributeValues=expr_values,
         ReturnValues="ALL_NEW",
     )
-    return _decimals_to_floats(resp.get("Attributes"))
+    return resp.get("Attributes")
+
+
+def update_user_progress_if_unchanged(user_id: str, updates: dict, updated_at: str | None) -> dict | None:
+    """SET fields only if the record's updated_at is still the one the caller
+    read (absent when None). Returns the new item, or None on a conflict."""
+    expr_parts = []
+    expr_names = {"#updated_at": "updated_at"}
+    expr_values = {}
+    for i, (key, val) in enumerate(updates.items()):
+        expr_parts.append(f"#{key} = :val{i}")
+        expr_names[f"#{key}"] = key
+        expr_values[f":val{i}"] = val
+    if updated_at is None:
+        condition = "attribute_exists(user_id) AND attribute_not_exists(#updated_at)"
+    else:
+        condition = "#updated_at = :read_at"
+        expr_values[":read_at"] = updated_at
+    try:
+        resp = user_progress_table.update_item(
+            Key={"user_id": user_id},
+            UpdateExpression="SET " + ", ".join(expr_parts),
+            ConditionExpression=condition,
+            ExpressionAttributeNames=expr_names,
+            ExpressionAttributeValues=expr_values,
+            ReturnValues="ALL_NEW",
+        )
+    except user_progress_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return None
+    return resp.get("Attributes")
+
+
+def increment_user_progress(
+    user_id: str,
+    deltas: dict[str, float],
+    defaults: dict[str, float] | None = None,
+) -> dict | None:
+    """Atomically add deltas to numeric progress fields in one update_item.
+
+    A field missing from an existing item starts from defaults[field] (or 0).
+    Returns the updated item, or None if the user has no progress record yet.
+    """
+    try:
+        resp = user_progress_table.update_item(
+            Key={"user_id": user_id},
+            ConditionExpression="attribute_exists(user_id)",
+            ReturnValues="ALL_NEW",
+            **_increment_expression(deltas, defaults),
+        )
+    except user_progress_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return None
+    return resp.get("Attributes")
+
+
+def _increment_expression(deltas: dict[str, float], defaults: dict[str, float] | None) -> dict:
+    """UpdateExpression + names/values adding deltas to progress counters."""
+    defaults = defaults or {}
+    expr_parts = ["#updated_at = :now"]
+    expr_names = {"#updated_at": "updated_at"}
+    expr_values = {":now": datetime.now(timezone.utc).isoformat()}
+    for i, (key, delta) in enumerate(deltas.items()):
+        expr_parts.append(f"#{key} = if_not_exists(#{key}, :base{i}) + :d{i}")
+        expr_names[f"#{key}"] = key
+        expr_values[f":base{i}"] = defaults.get(key, 0)
+        expr_values[f":d{i}"] = delta
+    return {
+        "UpdateExpression": "SET " + ", ".join(expr_parts),
+        "ExpressionAttributeNames": expr_names,
+        "ExpressionAttributeValues": expr_values,
+    }
+
+
+def put_tracked_position_with_progress(
+    position: dict,
+    deltas: dict[str, float],
+    defaults: dict[str, float] | None = None,
+) -> bool:
+    """Write a new tracked position and add deltas to its user's progress
+    counters in one TransactWriteItems call.
+
+    Returns False if the user has no progress record yet; the position is then
+    written on its own and the caller should recount.
+    """
+    client = dynamodb.meta.client
+    try:
+        client.transact_write_items(TransactItems=[
+            {"Put": {
+                "TableName": TRACKED_POSITIONS_TABLE_NAME,
+                "Item": position,
+                "ConditionExpression": "attribute_not_exists(position_id)",
+            }},
+            {"Update": {
+                "TableName": USER_PROGRESS_TABLE_NAME,
+                "Key": {"user_id": position["user_id"]},
+                "ConditionExpression": "attribute_exists(user_id)",
+                **_increment_expression(deltas, defaults),
+            }},
+        ])
+        return True
+    except client.exceptions.TransactionCanceledException as exc:
+        reasons = [r.get("Code") for r in exc.response.get("CancellationReasons", [])]
+        # Only the progress condition failed: no record yet
+        if len(reasons) != 2 or reasons[0] not in (None, "None") or reasons[1] != "ConditionalCheckFailed":
+            raise
+    put_tracked_position(position)
+    return False
+
+
+def get_all_progress_user_ids() -> list[str]:
+    """Every user_id with a progress record (paginated keys-only scan)."""
+    user_ids = []
+    scan = {"ProjectionExpression": "user_id"}
+    while True:
+        resp = user_progress_table.scan(**scan)
+        user_ids.extend(item["user_id"] for item in resp.get("Items", []))
+        if "LastEvaluatedKey" not in resp:
+            return user_ids
+        scan["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+# ── Leases ──
+#
+# Named, time-limited ownership records (see backend.monitor_leases). expires_at
+# is epoch seconds and doubles as the table's TTL attribute. The position
+# monitor's cycle checkpoints live in their own table, so the lease scan every
+# worker runs on each heartbeat stays small.
+
+
+def acquire_lease(name: str, owner: str, ttl_seconds: float, now: float) -> bool:
+    """Take or renew a lease. False if another owner holds it unexpired."""
+    try:
+        monitor_leases_table.put_item(
+            Item={"lease": name, "owner": owner, "expires_at": int(now + ttl_seconds)},
+            ConditionExpression="attribute_not_exists(#lease) OR expires_at < :now OR #owner = :owner",
+            ExpressionAttributeNames={"#lease": "lease", "#owner": "owner"},
+            ExpressionAttributeValues={":now": int(now), ":owner": owner},
+        )
+    except monitor_leases_table.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def release_lease(name: str, owner: str) -> None:
+    """Give up a lease if this owner still holds it."""
+    try:
+        monitor_leases_table.delete_item(
+            Key={"lease": name},
+            ConditionExpression="#owner = :owner",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":owner": owner},
+        )
+    except monitor_leases_table.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+
+
+def list_leases() -> list[dict]:
+    items = []
+    scan: dict = {}
+    while True:
+        resp = monitor_leases_table.scan(**scan)
+        items.extend(resp.get("Items", []))
+        if "LastEvaluatedKey" not in resp:
+            return items
+        scan["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def get_monitor_checkpoint(name: str) -> dict | None:
+    item = monitor_checkpoints_table.get_item(Key={"checkpoint": name}).get("Item")
+    return json.loads(item["state"]) if item and item.get("state") else None
+
+
+def put_monitor_checkpoint(name: str, state: dict, expires_at: float, lease: str | None = None,
+                           owner: str | None = None, now: float | None = None) -> bool:
+    """Store checkpoint state as a JSON string (it holds floats, which DynamoDB
+    only takes as Decimal).
+
+    With a lease, the write is fenced on it: it happens only while `owner`
+    still holds that lease unexpired at `now`, in one transaction. Returns
+    False if the lease has moved on.
+    """
+    item = {"checkpoint": name, "state": json.dumps(state), "expires_at": int(expires_at)}
+    if lease is None:
+        monitor_checkpoints_table.put_item(Item=item)
+        return True
+    client = dynamodb.meta.client
+    try:
+        client.transact_write_items(TransactItems=[
+            {"ConditionCheck": {
+                "TableName": MONITOR_LEASES_TABLE_NAME,
+                "Key": {"lease": lease},
+                "ConditionExpression": "#owner = :owner AND expires_at >= :now",
+                "ExpressionAttributeNames": {"#owner": "owner"},
+                "ExpressionAttributeValues": {":owner": owner, ":now": int(now)},
+            }},
+            {"Put": {"TableName": MONITOR_CHECKPOINTS_TABLE_NAME, "Item": item}},
+        ])
+    except client.exceptions.TransactionCanceledException as exc:
+        reasons = [r.get("Code") for r in exc.response.get("CancellationReasons", [])]
+        if reasons[:1] != ["ConditionalCheckFailed"]:
+            raise
+        return False
+    return True
+
+
+# ── Archive ──
+#
+# Storage primitives for backend.archival: scanning cold items, flagging them
+# archived with a TTL, and plain object reads/writes under the images bucket.
+
+# kind -> (table, key attribute, statuses that are never archived)
+_ARCHIVE_KINDS = {
+    "predictions": (predictions_table, "prediction_id", ("uploaded", "processing")),
+    "tracked_positions": (tracked_positions_table, "position_id", ("active",)),
+}
+
+
+def scan_archivable(kind: str, cutoff: str):
+    """Yield pages of items created before cutoff (ISO) that aren't archived, or
+    were updated after archiving (which drops their expires_at)."""
+    tbl, _, keep_statuses = _ARCHIVE_KINDS[kind]
+    values = {":cutoff": cutoff}
+    status_filters = []
+    for i, status in enumerate(keep_statuses):
+        values[f":keep{i}"] = status
+        status_filters.append(f"#status <> :keep{i}")
+    scan = {
+        "FilterExpression": " AND ".join(
+            ["#created_at < :cutoff", "(attribute_not_exists(archived_at) OR attribute_not_exists(expires_at))",
+             *status_filters]
+        ),
+        "ExpressionAttributeNames": {"#created_at": "created_at", "#status": "status"},
+        "ExpressionAttributeValues": values,
+    }
+    while True:
+        resp = tbl.scan(**scan)
+        if resp.get("Items"):
+            yield resp["Items"]
+        if "LastEvaluatedKey" not in resp:
+            return
+        scan["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def mark_archived(kind: str, item_id: str, archive_key: str, expires_at: int, updated_at: str | None) -> bool:
+    """Record where an item was archived and let TTL remove it after expires_at,
+    only if its updated_at is still the archived copy's and no other run has
+    flagged it since. False otherwise."""
+    tbl, key_attr, _ = _ARCHIVE_KINDS[kind]
+    values = {
+        ":now": datetime.now(timezone.utc).isoformat(),
+        ":key": archive_key,
+        ":exp": expires_at,
+    }
+    names = {"#updated_at": "updated_at"}
+    if updated_at is None:
+        condition = "attribute_exists(#id) AND attribute_not_exists(#updated_at)"
+        names["#id"] = key_attr
+    else:
+        condition = "#updated_at = :read_at"
+        values[":read_at"] = updated_at
+    condition += " AND attribute_not_exists(expires_at)"
+    try:
+        tbl.update_item(
+            Key={key_attr: item_id},
+            UpdateExpression="SET archived_at = :now, archive_key = :key, expires_at = :exp",
+            ConditionExpression=condition,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+    except tbl.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def put_object(key: str, body: bytes, content_type: str = "application/octet-stream") -> None:
+    if _s3_available:
+        s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=body, ContentType=content_type)
+    else:
+        local_path = LOCAL_IMAGE_DIR / key
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        local_path.write_bytes(body)
+
+
+def get_object(key: str) -> bytes | None:
+    if not _s3_available:
+        local_path = LOCAL_IMAGE_DIR / key
+        return local_path.read_bytes() if local_path.exists() else None
+    try:
+        return s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)["Body"].read()
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+
+def list_object_keys(prefix: str) -> list[str]:
+    if not _s3_available:
+        local_dir = LOCAL_IMAGE_DIR / prefix
+        if not local_dir.is_dir():
+            return []
+        return sorted(str(p.relative_to(LOCAL_IMAGE_DIR)) for p in local_dir.rglob("*") if p.is_file())
+    keys = []
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix):
+        keys.extend(obj["Key"] for obj in page.get("Contents", []))
+    return keys
+
+
+# ── Export ──
+
+
+def scan_window(kind: str, attribute: str, after: str | None, until: str):
+    """Yield pages of items whose ISO timestamp attribute is in (after, until]."""
+    tbl = _ARCHIVE_KINDS[kind][0]
+    names = {"#attr": attribute}
+    values = {":until": until}
+    condition = "#attr <= :until"
+    if after:
+        values[":after"] = after
+        condition = "#attr > :after AND " + condition
+    scan = {"FilterExpression": condition, "ExpressionAttributeNames": names, "ExpressionAttributeValues": values}
+    while True:
+        resp = tbl.scan(**scan)
+        if resp.get("Items"):
+            yield resp["Items"]
+        if "LastEvaluatedKey" not in resp:
+            return
+        scan["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+# ── Debug ──
+
+
+def debug_table_summaries() -> dict:
+    """Item counts and recent samples from each table."""
+
+    def _scan_summary(tbl, sort_key: str | None = None, limit: int = 5, redact: list[str] | None = None):
+        count_resp = tbl.scan(Select="COUNT")
+        count = count_resp.get("Count", 0)
+        scan_resp = tbl.scan(Limit=limit)
+        items = scan_resp.get("Items", [])
+        if sort_key:
+            items.sort(key=lambda x: x.get(sort_key, ""), reverse=True)
+        if redact:
+            for item in items:
+                for key in redact:
+                    if key in item:
+                        item[key] = "***REDACTED***"
+        return {"count": count, "recent": items[:limit]}
+
+    return {
+        "predictions": _scan_summary(predictions_table, "created_at", limit=10),
+        "trading_logs": _scan_summary(table, "created_at"),
+        "market_snapshots": _scan_summary(snapshots_table, "scraped_at"),
+        "integrations": _scan_summary(integrations_table, redact=["encrypted_private_key", "api_key_id"]),
+        "tracked_positions": _scan_summary(tracked_positions_table, "created_at", limit=10),
+        "user_progress": _scan_summary(user_progress_table),
+    }
+
+
+# ── Backend selection ──
+#
+# Everything above is the DynamoDB/S3 implementation. With STORAGE_BACKEND=sqlite
+# the same names are rebound to the embedded implementation, so callers that do
+# `from backend.db import ...` pick it up without changes.
+
+if STORAGE_BACKEND == "sqlite":
+    from backend.local_db import *  # noqa: E402,F401,F403
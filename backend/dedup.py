@@ -0,0 +1,126 @@
+"""Content-addressed image storage and reuse of recent model results.
+
+Uploads are keyed by SHA-256, so re-uploading the same screenshot stores
+nothing new. A 64-bit difference hash (dHash) of each image is indexed as well,
+so a re-encoded or resized copy of a screenshot is recognised too.
+
+When a cacheable model has produced a recommendation for the same (or a
+near-duplicate) image with the same prompt version and context within
+RECOMMENDATION_REUSE_SECONDS, that recommendation is reused and only the live
+market enrichment is redone.
+"""
+
+import hashlib
+import logging
+import os
+import time
+
+from PIL import Image
+
+from backend.db import (
+    find_similar_images,
+    get_cached_recommendation,
+    put_cached_recommendation,
+)
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_REUSE_SECONDS = int(os.environ.get("RECOMMENDATION_REUSE_SECONDS", str(6 * 60 * 60)))
+# Max Hamming distance between dHashes treated as the same image. The band
+# index in backend.db only guarantees candidates up to 3.
+DHASH_MAX_DISTANCE = int(os.environ.get("DHASH_MAX_DISTANCE", "3"))
+
+# Larger images get no perceptual hash: formats other than JPEG decode at full
+# size, so a tiny PNG with huge dimensions would cost hundreds of MB to hash
+DHASH_MAX_PIXELS = int(os.environ.get("DHASH_MAX_PIXELS", str(4096 * 4096)))
+
+_HASH_CHUNK = 1024 * 1024
+
+
+# ── Hashing ──
+
+
+def content_hash(fileobj) -> str:
+    """SHA-256 hex digest of a file object, read in chunks. Rewinds the file."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    while chunk := fileobj.read(_HASH_CHUNK):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def perceptual_hash(fileobj) -> int | None:
+    """64-bit dHash of an image file object, or None if it can't be decoded or
+    has more than DHASH_MAX_PIXELS pixels. Rewinds the file."""
+    try:
+        fileobj.seek(0)
+        with Image.open(fileobj) as img:
+            # Image.open only reads the header, so this check costs no decoding
+            if img.width * img.height > DHASH_MAX_PIXELS:
+                logger.info("No perceptual hash for %dx%d upload", img.width, img.height)
+                return None
+            img.draft("L", (64, 64))  # JPEG: decode at reduced scale
+            pixels = img.convert("L").resize((9, 8), Image.Resampling.LANCZOS).tobytes()
+    except Exception as exc:
+        logger.info("No perceptual hash for upload: %s", exc)
+        return None
+    finally:
+        fileobj.seek(0)
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+# ── Recommendation reuse ──
+
+
+def _cache_key(runner, model_name: str, context: str | None, sha256: str) -> str:
+    context_digest = hashlib.sha256((context or "").strip().encode("utf-8")).hexdigest()[:12]
+    return f"{model_name}/{runner.cache_version()}/{context_digest}/{sha256}"
+
+
+def find_reusable_recommendation(
+    runner,
+    model_name: str,
+    context: str | None,
+    sha256: str,
+    dhash: int | None = None,
+) -> dict | None:
+    """A recent recommendation for this image (or a near-duplicate), or None."""
+    if not runner.cacheable:
+        return None
+    candidates = [sha256]
+    if dhash is not None:
+        # Only images recent enough to still have a reusable recommendation
+        similar = find_similar_images(dhash, newer_than=time.time() - RECOMMENDATION_REUSE_SECONDS)
+        near = sorted(
+            (hamming(dhash, other), other_sha)
+            for other_sha, other in similar.items()
+            if other_sha != sha256 and hamming(dhash, other) <= DHASH_MAX_DISTANCE
+        )
+        candidates.extend(other_sha for _, other_sha in near)
+
+    now = time.time()
+    for candidate in candidates:
+        entry = get_cached_recommendation(_cache_key(runner, model_name, context, candidate))
+        if entry and now - entry.get("cached_at", 0) <= RECOMMENDATION_REUSE_SECONDS:
+            logger.info("Reusing %s recommendation for image %s (source %s)", model_name, sha256[:12], candidate[:12])
+            return entry["recommendation"]
+    return None
+
+
+def remember_recommendation(runner, model_name: str, context: str | None, sha256: str, recommendation: dict) -> None:
+    """Store a (market-matched) recommendation for reuse."""
+    if not runner.cacheable:
+        return
+    put_cached_recommendation(
+        _cache_key(runner, model_name, context, sha256),
+        {"cached_at": time.time(), "recommendation": recommendation},
+    )
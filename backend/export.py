@@ -0,0 +1,306 @@
+"""Incremental columnar export of predictions, positions, settlements and the
+analysis log, for offline analysis of model accuracy, calibration and P&L.
+
+Each run appends Parquet files for rows that appeared since the previous run,
+partitioned by ISO week of the row's event time:
+
+  {EXPORT_DIR}/{dataset}/week=YYYY-Www/part-{run}.parquet
+
+  predictions        completed or failed predictions, with the recommendation
+                     and market_data fields flattened into columns
+  tracked_positions  positions as opened, with the entry-time snapshot
+  settlements        settled positions and their realized P&L
+  analysis_log       lines of the JSONL prediction log, rotated files included
+
+Per-dataset watermarks live in {EXPORT_DIR}/_state.json. A run covers event
+times up to EXPORT_LAG_SECONDS ago, so rows still being written are picked up
+by the next run rather than missed. The directory is hive-partitioned, so it
+can be queried directly, e.g. with DuckDB:
+
+  SELECT model, avg(realized_pnl) FROM 'exports/settlements/*/*.parquet' GROUP BY model
+
+Run with:  python -m backend.export [--dir DIR] [--full]
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.db import scan_window
+from backend.prediction_log import LOG_PATH, log_segments, open_segment
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = Path(os.environ.get("EXPORT_DIR", "exports"))
+EXPORT_LAG_SECONDS = int(os.environ.get("EXPORT_LAG_SECONDS", "60"))
+
+_TS = pa.timestamp("us", tz="UTC")
+
+# Column name -> (dotted source path, Arrow type)
+PREDICTION_COLUMNS = {
+    "prediction_id": ("prediction_id", pa.string()),
+    "user_id": ("user_id", pa.string()),
+    "model": ("model", pa.string()),
+    "status": ("status", pa.string()),
+    "context": ("context", pa.string()),
+    "image_sha256": ("image_sha256", pa.string()),
+    "error_message": ("error_message", pa.string()),
+    "created_at": ("created_at", _TS),
+    "completed_at": ("completed_at", _TS),
+    "ticker": ("recommendation.ticker", pa.string()),
+    "title": ("recommendation.title", pa.string()),
+    "side": ("recommendation.side", pa.string()),
+    "confidence": ("recommendation.confidence", pa.float64()),
+    "recommended_position": ("recommendation.recommended_position", pa.float64()),
+    "no_bet": ("recommendation.no_bet", pa.bool_()),
+    "factor_count": ("recommendation.factors", pa.int32()),
+    "market_match": ("market_data.status", pa.string()),
+    "market_status": ("market_data.market_status", pa.string()),
+    "market_result": ("market_data.result", pa.string()),
+    "yes_bid": ("market_data.yes_bid", pa.float64()),
+    "yes_ask": ("market_data.yes_ask", pa.float64()),
+    "no_bid": ("market_data.no_bid", pa.float64()),
+    "no_ask": ("market_data.no_ask", pa.float64()),
+    "last_price": ("market_data.last_price", pa.float64()),
+    "spread": ("market_data.spread", pa.float64()),
+    "midpoint": ("market_data.midpoint", pa.float64()),
+    "volume_24h": ("market_data.volume_24h", pa.int64()),
+    "open_interest": ("market_data.open_interest", pa.int64()),
+    "event_ticker": ("market_data.event_ticker", pa.string()),
+    "event_title": ("market_data.event_title", pa.string()),
+    "category": ("market_data.event_category", pa.string()),
+}
+
+POSITION_COLUMNS = {
+    "position_id": ("position_id", pa.string()),
+    "user_id": ("user_id", pa.string()),
+    "prediction_id": ("prediction_id", pa.string()),
+    "ticker": ("ticker", pa.string()),
+    "title": ("title", pa.string()),
+    "side": ("side", pa.string()),
+    "model": ("model", pa.string()),
+    "confidence": ("confidence", pa.float64()),
+    "entry_price": ("entry_price", pa.float64()),
+    "created_at": ("created_at", _TS),
+    "entry_yes_bid": ("market_snapshot_at_entry.yes_bid", pa.float64()),
+    "entry_yes_ask": ("market_snapshot_at_entry.yes_ask", pa.float64()),
+    "entry_spread": ("market_snapshot_at_entry.spread", pa.float64()),
+    "entry_volume_24h": ("market_snapshot_at_entry.volume_24h", pa.int64()),
+    "entry_open_interest": ("market_snapshot_at_entry.open_interest", pa.int64()),
+    "category": ("market_snapshot_at_entry.category", pa.string()),
+}
+
+SETTLEMENT_COLUMNS = {
+    "position_id": ("position_id", pa.string()),
+    "user_id": ("user_id", pa.string()),
+    "prediction_id": ("prediction_id", pa.string()),
+    "ticker": ("ticker", pa.string()),
+    "side": ("side", pa.string()),
+    "model": ("model", pa.string()),
+    "confidence": ("confidence", pa.float64()),
+    "category": ("market_snapshot_at_entry.category", pa.string()),
+    "status": ("status", pa.string()),
+    "entry_price": ("entry_price", pa.float64()),
+    "settlement_price": ("settlement_price", pa.float64()),
+    "realized_pnl": ("realized_pnl", pa.float64()),
+    "created_at": ("created_at", _TS),
+    "settled_at": ("settled_at", _TS),
+}
+
+LOG_COLUMNS = {
+    "prediction_id": ("prediction_id", pa.string()),
+    "model": ("model", pa.string()),
+    "status": ("status", pa.string()),
+    "ticker": ("ticker", pa.string()),
+    "side": ("side", pa.string()),
+    "confidence": ("confidence", pa.float64()),
+    "reused": ("reused", pa.bool_()),
+    "completed_at": ("completed_at", _TS),
+    "logged_at": ("logged_at", _TS),
+}
+
+# dataset -> (table kind, watermark attribute, columns, row filter)
+TABLE_DATASETS = {
+    "predictions": ("predictions", "completed_at", PREDICTION_COLUMNS, None),
+    "tracked_positions": ("tracked_positions", "created_at", POSITION_COLUMNS, None),
+    "settlements": ("tracked_positions", "settled_at", SETTLEMENT_COLUMNS,
+                    lambda item: str(item.get("status", "")).startswith("settled")),
+}
+
+
+# ── Rows ──
+
+
+def _parse_ts(value) -> datetime | None:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _get_path(item: dict, path: str):
+    value = item
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _coerce(value, arrow_type: pa.DataType):
+    if value is None:
+        return None
+    try:
+        if arrow_type == _TS:
+            return _parse_ts(value)
+        if pa.types.is_floating(arrow_type):
+            return float(value)
+        if pa.types.is_integer(arrow_type):
+            return len(value) if isinstance(value, list) else int(value)
+        if pa.types.is_boolean(arrow_type):
+            return bool(value)
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def to_table(items: list[dict], columns: dict) -> pa.Table:
+    """Flatten items into an Arrow table with the given column spec."""
+    schema = pa.schema([(name, arrow_type) for name, (_, arrow_type) in columns.items()])
+    data = {
+        name: [_coerce(_get_path(item, path), arrow_type) for item in items]
+        for name, (path, arrow_type) in columns.items()
+    }
+    return pa.Table.from_pydict(data, schema=schema)
+
+
+def _week(ts: datetime) -> str:
+    year, week, _ = ts.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+# ── Writing ──
+
+
+def write_partitioned(root: Path, dataset: str, items: list[dict], columns: dict, time_path: str, run_id: str) -> int:
+    """Append items as one Parquet file per ISO week of time_path. Returns rows written."""
+    by_week: dict[str, list[dict]] = {}
+    for item in items:
+        ts = _parse_ts(_get_path(item, time_path))
+        if ts is not None:
+            by_week.setdefault(_week(ts), []).append(item)
+    for week, rows in by_week.items():
+        directory = root / dataset / f"week={week}"
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / f".part-{run_id}.parquet.tmp"
+        pq.write_table(to_table(rows, columns), tmp, compression="zstd")
+        tmp.rename(directory / f"part-{run_id}.parquet")
+    return sum(len(rows) for rows in by_week.values())
+
+
+def _load_state(root: Path) -> dict:
+    path = root / "_state.json"
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _save_state(root: Path, state: dict) -> None:
+    tmp = root / "_state.json.tmp"
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.rename(root / "_state.json")
+
+
+def _read_segment(segment: str, offset: int) -> tuple[list[dict], int]:
+    """Complete JSONL lines after byte offset, and the offset after the last one."""
+    entries = []
+    with open_segment(segment) as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partially written; picked up next run
+            offset += len(line)
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping malformed analysis log line in %s", segment)
+    return entries, offset
+
+
+def _first_logged_at(segment: str) -> str | None:
+    with open_segment(segment) as f:
+        line = f.readline()
+    try:
+        return json.loads(line).get("logged_at")
+    except ValueError:
+        return None
+
+
+def _read_log(path: str, position: dict) -> tuple[list[dict], dict]:
+    """New analysis log entries across rotated and live segments.
+
+    A segment is identified by the logged_at of its first line, which survives
+    rotation and compression; position is that id plus a byte offset into it.
+    """
+    segment_id, offset = position.get("segment"), position.get("offset", 0)
+    entries = []
+    for segment in log_segments(path):
+        first = _first_logged_at(segment)
+        if first is None or (segment_id and first < segment_id):
+            continue
+        new, end = _read_segment(segment, offset if first == segment_id else 0)
+        entries.extend(new)
+        segment_id, offset = first, end
+    return entries, {"segment": segment_id, "offset": offset}
+
+
+def run_export(root: Path = EXPORT_DIR, now: datetime | None = None, full: bool = False) -> dict[str, int]:
+    """Export everything new since the last run. Returns rows written per dataset."""
+    now = now or datetime.now(timezone.utc)
+    until = (now - timedelta(seconds=EXPORT_LAG_SECONDS)).isoformat()
+    run_id = f"{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    root.mkdir(parents=True, exist_ok=True)
+    if full:
+        for dataset in (*TABLE_DATASETS, "analysis_log"):
+            shutil.rmtree(root / dataset, ignore_errors=True)
+        state = {}
+    else:
+        state = _load_state(root)
+
+    written = {}
+    for dataset, (kind, attribute, columns, keep) in TABLE_DATASETS.items():
+        after = state.get(dataset, {}).get("watermark")
+        items = [item for page in scan_window(kind, attribute, after, until) for item in page]
+        if keep:
+            items = [item for item in items if keep(item)]
+        written[dataset] = write_partitioned(root, dataset, items, columns, attribute, run_id)
+        state[dataset] = {"watermark": until}
+        _save_state(root, state)
+
+    entries, state["analysis_log"] = _read_log(LOG_PATH, state.get("analysis_log", {}))
+    written["analysis_log"] = write_partitioned(root, "analysis_log", entries, LOG_COLUMNS, "logged_at", run_id)
+    _save_state(root, state)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental Parquet export for offline analysis")
+    parser.add_argument("--dir", type=Path, default=EXPORT_DIR, help="export directory")
+    parser.add_argument("--full", action="store_true", help="discard previous exports and start over")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    written = run_export(args.dir, full=args.full)
+    logger.info("Exported %s to %s", written, args.dir)
+
+
+if __name__ == "__main__":
+    main()
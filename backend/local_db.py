@@ -0,0 +1,733 @@
+"""Embedded storage backend: SQLite for tables, the local filesystem for objects.
+
+Implements the same function surface as backend.db. Setting
+STORAGE_BACKEND=sqlite makes backend.db re-export these functions in place of
+the DynamoDB/S3 ones, so the API, background tasks and the position monitor
+can be load-tested offline on one box with realistic data sizes.
+
+Each DynamoDB table maps to a SQLite table holding the item as a JSON document
+plus the key and index columns the queries filter on. The database runs in WAL
+mode with one connection per thread, so readers never block the writer.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "/tmp/kalshi-use.sqlite3")
+LOCAL_STORAGE_DIR = Path(os.environ.get("LOCAL_STORAGE_DIR", "/tmp/kalshi-images"))
+
+__all__ = [
+    "put_trade",
+    "get_trade",
+    "get_trades_by_user",
+    "update_trade",
+    "delete_trade",
+    "put_snapshot",
+    "get_snapshots",
+    "get_latest_snapshot",
+    "get_snapshots_by_category",
+    "append_series_samples",
+    "get_series_buckets",
+    "upload_image",
+    "upload_image_stream",
+    "get_presigned_url",
+    "append_analysis_log",
+    "get_analysis_log",
+    "get_image_bytes",
+    "image_exists",
+    "put_image_fingerprint",
+    "find_similar_images",
+    "get_cached_recommendation",
+    "put_cached_recommendation",
+    "put_prediction",
+    "update_prediction",
+    "get_prediction",
+    "get_predictions_by_user",
+    "put_integration",
+    "get_integrations_by_user",
+    "get_integrations_for_users",
+    "update_integration_email",
+    "delete_integration",
+    "set_push_token_for_user",
+    "remove_push_token",
+    "get_push_token_for_user",
+    "get_push_tokens_for_users",
+    "get_all_users_with_active_positions",
+    "put_tracked_position",
+    "put_tracked_position_with_progress",
+    "get_tracked_position",
+    "get_tracked_positions_by_user",
+    "update_tracked_position",
+    "settle_tracked_position",
+    "clear_position_alert",
+    "delete_tracked_position",
+    "get_user_progress",
+    "put_user_progress",
+    "update_user_progress",
+    "update_user_progress_if_unchanged",
+    "increment_user_progress",
+    "get_all_progress_user_ids",
+    "acquire_lease",
+    "release_lease",
+    "list_leases",
+    "get_monitor_checkpoint",
+    "put_monitor_checkpoint",
+    "scan_archivable",
+    "mark_archived",
+    "put_object",
+    "get_object",
+    "list_object_keys",
+    "scan_window",
+    "debug_table_summaries",
+]
+
+# table -> (primary key columns, extra indexed columns). Every table also has a
+# `doc` column with the full item as JSON.
+_TABLES: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "trades": (("trade_id",), ("user_id",)),
+    "snapshots": (("event_ticker", "scraped_at"), ("category",)),
+    "predictions": (("prediction_id",), ("user_id", "created_at")),
+    "integrations": (("user_id", "platform_account"), ()),
+    "tracked_positions": (("position_id",), ("user_id", "status")),
+    "user_progress": (("user_id",), ()),
+    "monitor_leases": (("lease",), ()),
+    "monitor_checkpoints": (("checkpoint",), ()),
+}
+
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS trades_user ON trades (user_id)",
+    "CREATE INDEX IF NOT EXISTS snapshots_category ON snapshots (category, scraped_at)",
+    "CREATE INDEX IF NOT EXISTS predictions_user ON predictions (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS tracked_positions_user ON tracked_positions (user_id)",
+    "CREATE INDEX IF NOT EXISTS tracked_positions_status ON tracked_positions (status)",
+)
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready: set[str] = set()
+
+
+# ── Connection & schema ──
+
+
+def _conn() -> sqlite3.Connection:
+    """Per-thread connection to SQLITE_PATH, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == SQLITE_PATH:
+        return conn
+    Path(SQLITE_PATH).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SQLITE_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _schema_lock:
+        if SQLITE_PATH not in _schema_ready:
+            _create_schema(conn)
+            _schema_ready.add(SQLITE_PATH)
+    _local.conn = conn
+    _local.path = SQLITE_PATH
+    return conn
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    for name, (keys, indexed) in _TABLES.items():
+        cols = ", ".join(f"{c} TEXT" for c in keys + indexed)
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} ({cols}, doc TEXT NOT NULL, PRIMARY KEY ({', '.join(keys)}))"
+        )
+    for ddl in _INDEXES:
+        conn.execute(ddl)
+
+
+@contextmanager
+def _transaction():
+    """BEGIN IMMEDIATE ... COMMIT, so read-modify-write updates are atomic."""
+    conn = _conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _dumps(item: dict) -> str:
+    return json.dumps(item, default=str)
+
+
+def _put(conn: sqlite3.Connection, table: str, item: dict) -> None:
+    keys, indexed = _TABLES[table]
+    cols = keys + indexed
+    values = [item.get(c) for c in cols]
+    placeholders = ", ".join("?" for _ in range(len(cols) + 1))
+    conn.execute(
+        f"INSERT OR REPLACE INTO {table} ({', '.join(cols)}, doc) VALUES ({placeholders})",
+        [*values, _dumps(item)],
+    )
+
+
+def _get(conn: sqlite3.Connection, table: str, key: dict) -> dict | None:
+    where = " AND ".join(f"{k} = ?" for k in key)
+    row = conn.execute(f"SELECT doc FROM {table} WHERE {where}", list(key.values())).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _select(sql: str, params: tuple = ()) -> list[dict]:
+    return [json.loads(row[0]) for row in _conn().execute(sql, params)]
+
+
+def _update(table: str, key: dict, updates: dict, require: dict | None = None, remove: tuple = ()) -> dict | None:
+    """SET-style update of an existing item, dropping the `remove` fields. Returns
+    the new item, or None if it doesn't exist or doesn't match every field in
+    `require`."""
+    with _transaction() as conn:
+        item = _get(conn, table, key)
+        if item is None or any(item.get(k) != v for k, v in (require or {}).items()):
+            return None
+        item.update(updates)
+        for field in remove:
+            item.pop(field, None)
+        _put(conn, table, item)
+    return item
+
+
+def _delete(table: str, key: dict) -> None:
+    where = " AND ".join(f"{k} = ?" for k in key)
+    _conn().execute(f"DELETE FROM {table} WHERE {where}", list(key.values()))
+
+
+def _non_null(updates: dict) -> dict:
+    return {k: v for k, v in updates.items() if v is not None}
+
+
+# ── Trades ──
+
+
+def put_trade(trade: dict) -> dict:
+    trade["trade_id"] = str(uuid.uuid4())
+    trade["created_at"] = datetime.now(timezone.utc).isoformat()
+    _put(_conn(), "trades", trade)
+    return trade
+
+
+def get_trade(trade_id: str) -> dict | None:
+    return _get(_conn(), "trades", {"trade_id": trade_id})
+
+
+def get_trades_by_user(user_id: str) -> list[dict]:
+    return _select("SELECT doc FROM trades WHERE user_id = ?", (user_id,))
+
+
+def update_trade(trade_id: str, updates: dict) -> dict | None:
+    fields = _non_null(updates)
+    if not fields:
+        return get_trade(trade_id)
+    return _update("trades", {"trade_id": trade_id}, fields)
+
+
+def delete_trade(trade_id: str) -> bool:
+    _delete("trades", {"trade_id": trade_id})
+    return True
+
+
+# ── Market Snapshots ──
+
+
+def put_snapshot(snapshot: dict) -> dict:
+    snapshot["scraped_at"] = datetime.now(timezone.utc).isoformat()
+    _put(_conn(), "snapshots", snapshot)
+    return snapshot
+
+
+def get_snapshots(event_ticker: str, limit: int = 50) -> list[dict]:
+    return _select(
+        "SELECT doc FROM snapshots WHERE event_ticker = ? ORDER BY scraped_at DESC LIMIT ?",
+        (event_ticker, limit),
+    )
+
+
+def get_latest_snapshot(event_ticker: str) -> dict | None:
+    items = get_snapshots(event_ticker, limit=1)
+    return items[0] if items else None
+
+
+def get_snapshots_by_category(category: str, limit: int = 50) -> list[dict]:
+    return _select(
+        "SELECT doc FROM snapshots WHERE category = ? ORDER BY scraped_at DESC LIMIT ?",
+        (category, limit),
+    )
+
+
+def append_series_samples(
+    series_key: str,
+    bucket: str,
+    columns: dict[str, list],
+    expires_at: int | None = None,
+) -> int:
+    key = {"event_ticker": series_key, "scraped_at": bucket}
+    with _transaction() as conn:
+        item = _get(conn, "snapshots", key) or dict(key)
+        for name, values in columns.items():
+            item[name] = item.get(name, []) + list(values)
+        if expires_at is not None:
+            item["expires_at"] = expires_at
+        _put(conn, "snapshots", item)
+    return len(item.get("t", []))
+
+
+def get_series_buckets(series_key: str, start_bucket: str, end_bucket: str) -> list[dict]:
+    return _select(
+        "SELECT doc FROM snapshots WHERE event_ticker = ? AND scraped_at BETWEEN ? AND ? ORDER BY scraped_at",
+        (series_key, start_bucket, end_bucket),
+    )
+
+
+# ── Objects (local filesystem) ──
+
+
+def upload_image(file_bytes: bytes, key: str, content_type: str = "image/jpeg") -> str:
+    local_path = LOCAL_STORAGE_DIR / key
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    local_path.write_bytes(file_bytes)
+    return key
+
+
+def upload_image_stream(fileobj, key: str, content_type: str = "image/jpeg") -> str:
+    local_path = LOCAL_STORAGE_DIR / key
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(local_path, "wb") as f:
+        shutil.copyfileobj(fileobj, f)
+    return key
+
+
+def get_presigned_url(key: str, expires_in: int = 3600) -> str:
+    return f"file://{LOCAL_STORAGE_DIR / key}"
+
+
+def append_analysis_log(entry: dict) -> None:
+    local_log = LOCAL_STORAGE_DIR / "analysis_log.jsonl"
+    local_log.parent.mkdir(parents=True, exist_ok=True)
+    with open(local_log, "a") as f:
+        f.write(json.dumps(entry, default=str) + "\n")
+
+
+def get_analysis_log() -> list[dict]:
+    local_log = LOCAL_STORAGE_DIR / "analysis_log.jsonl"
+    if not local_log.exists():
+        return []
+    with open(local_log) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def get_image_bytes(image_key: str) -> bytes:
+    return (LOCAL_STORAGE_DIR / image_key).read_bytes()
+
+
+# ── Image dedup & recommendation reuse ──
+
+
+def image_exists(key: str) -> bool:
+    return (LOCAL_STORAGE_DIR / key).exists()
+
+
+def _band_dirs(dhash: int) -> list[Path]:
+    return [LOCAL_STORAGE_DIR / "image_index" / "dhash" / str(i) / f"{(dhash >> (16 * i)) & 0xFFFF:04x}"
+            for i in range(4)]
+
+
+def put_image_fingerprint(sha256: str, dhash: int) -> None:
+    from backend.db import _image_index_name
+
+    name = _image_index_name(sha256, dhash, time.time())
+    for band_dir in _band_dirs(dhash):
+        band_dir.mkdir(parents=True, exist_ok=True)
+        (band_dir / name).touch()
+
+
+def find_similar_images(dhash: int, newer_than: float | None = None) -> dict[str, int]:
+    from backend.db import DHASH_BAND_SCAN_LIMIT, _parse_image_index_names
+
+    names = set()
+    for band_dir in _band_dirs(dhash):
+        if band_dir.exists():
+            names.update(sorted(entry.name for entry in band_dir.iterdir())[:DHASH_BAND_SCAN_LIMIT])
+    return _parse_image_index_names(names, newer_than)
+
+
+def get_cached_recommendation(cache_key: str) -> dict | None:
+    local_path = LOCAL_STORAGE_DIR / "recommendation_cache" / f"{cache_key}.json"
+    return json.loads(local_path.read_text()) if local_path.exists() else None
+
+
+def put_cached_recommendation(cache_key: str, entry: dict) -> None:
+    local_path = LOCAL_STORAGE_DIR / "recommendation_cache" / f"{cache_key}.json"
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    local_path.write_text(json.dumps(entry, default=str))
+
+
+# ── Predictions ──
+
+
+def put_prediction(prediction: dict) -> dict:
+    _put(_conn(), "predictions", prediction)
+    return prediction
+
+
+def _with_image_url(item: dict | None) -> dict | None:
+    if item and item.get("image_key"):
+        item["image_url"] = get_presigned_url(item["image_key"])
+    return item
+
+
+def update_prediction(prediction_id: str, updates: dict) -> dict | None:
+    fields = _non_null(updates)
+    if not fields:
+        return get_prediction(prediction_id)
+    return _with_image_url(_update("predictions", {"prediction_id": prediction_id}, fields, remove=("expires_at",)))
+
+
+def get_prediction(prediction_id: str) -> dict | None:
+    return _with_image_url(_get(_conn(), "predictions", {"prediction_id": prediction_id}))
+
+
+def get_predictions_by_user(user_id: str, summary: bool = False) -> list[dict]:
+    from backend.db import PREDICTION_SUMMARY_FIELDS, project_item
+
+    items = _select("SELECT doc FROM predictions WHERE user_id = ?", (user_id,))
+    if summary:
+        items = [project_item(item, PREDICTION_SUMMARY_FIELDS) for item in items]
+    for item in items:
+        _with_image_url(item)
+    return items
+
+
+# ── Integrations ──
+
+
+def put_integration(integration: dict) -> dict:
+    _put(_conn(), "integrations", integration)
+    return integration
+
+
+def get_integrations_by_user(user_id: str) -> list[dict]:
+    return _select(
+        "SELECT doc FROM integrations WHERE user_id = ? ORDER BY platform_account", (user_id,),
+    )
+
+
+def get_integrations_for_users(user_ids) -> dict[str, list[dict]]:
+    user_ids = list(dict.fromkeys(user_ids))
+    result: dict[str, list[dict]] = {user_id: [] for user_id in user_ids}
+    for start in range(0, len(user_ids), 500):
+        chunk = user_ids[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        for item in _select(
+            f"SELECT doc FROM integrations WHERE user_id IN ({placeholders}) ORDER BY platform_account",
+            tuple(chunk),
+        ):
+            result[item["user_id"]].append(item)
+    return result
+
+
+def update_integration_email(user_id: str, platform_account: str, email: str) -> bool:
+    key = {"user_id": user_id, "platform_account": platform_account}
+    if _update("integrations", key, {"email": email}) is None:
+        # DynamoDB's update_item upserts; match that
+        _put(_conn(), "integrations", {**key, "email": email})
+    return True
+
+
+def delete_integration(user_id: str, platform_account: str) -> bool:
+    _delete("integrations", {"user_id": user_id, "platform_account": platform_account})
+    return True
+
+
+# ── Push Tokens ──
+
+
+def set_push_token_for_user(user_id: str, token: str) -> None:
+    put_integration({"user_id": user_id, "platform_account": "push_token", "expo_push_token": token})
+
+
+def _first_push_token(integrations: list[dict]) -> str | None:
+    for item in sorted(integrations, key=lambda item: item["platform_account"] != "push_token"):
+        if item.get("expo_push_token"):
+            return item["expo_push_token"]
+    return None
+
+
+def get_push_token_for_user(user_id: str) -> str | None:
+    return _first_push_token(get_integrations_by_user(user_id))
+
+
+def remove_push_token(user_id: str, token: str) -> None:
+    with _transaction() as conn:
+        for item in _select("SELECT doc FROM integrations WHERE user_id = ?", (user_id,)):
+            if item.get("expo_push_token") == token:
+                del item["expo_push_token"]
+                _put(conn, "integrations", item)
+
+
+def get_push_tokens_for_users(user_ids) -> dict[str, str]:
+    tokens = {}
+    for user_id, integrations in get_integrations_for_users(user_ids).items():
+        token = _first_push_token(integrations)
+        if token:
+            tokens[user_id] = token
+    return tokens
+
+
+def get_all_users_with_active_positions() -> dict[str, list[dict]]:
+    grouped: dict[str, list[dict]] = {}
+    for pos in _select("SELECT doc FROM tracked_positions WHERE status = 'active'"):
+        uid = pos.get("user_id")
+        if uid:
+            grouped.setdefault(uid, []).append(pos)
+    return grouped
+
+
+# ── Tracked Positions ──
+
+
+def put_tracked_position(position: dict) -> dict:
+    _put(_conn(), "tracked_positions", position)
+    return position
+
+
+def get_tracked_position(position_id: str) -> dict | None:
+    return _get(_conn(), "tracked_positions", {"position_id": position_id})
+
+
+def get_tracked_positions_by_user(user_id: str, summary: bool = False) -> list[dict]:
+    from backend.db import TRACKED_POSITION_SUMMARY_FIELDS, project_item
+
+    items = _select("SELECT doc FROM tracked_positions WHERE user_id = ?", (user_id,))
+    if summary:
+        items = [project_item(item, TRACKED_POSITION_SUMMARY_FIELDS) for item in items]
+    return items
+
+
+def update_tracked_position(position_id: str, updates: dict) -> dict | None:
+    fields = _non_null(updates)
+    if not fields:
+        return get_tracked_position(position_id)
+    return _update("tracked_positions", {"position_id": position_id}, fields, remove=("expires_at",))
+
+
+def settle_tracked_position(position_id: str, updates: dict) -> dict | None:
+    return _update("tracked_positions", {"position_id": position_id}, updates, require={"status": "active"})
+
+
+def clear_position_alert(position_id: str, kind: str, level: float) -> bool:
+    with _transaction() as conn:
+        item = _get(conn, "tracked_positions", {"position_id": position_id})
+        alerts = (item or {}).get("alerts") or {}
+        if kind not in alerts or alerts[kind] != level:
+            return False
+        del alerts[kind]
+        item["updated_at"] = datetime.now(timezone.utc).isoformat()
+        _put(conn, "tracked_positions", item)
+    return True
+
+
+def delete_tracked_position(position_id: str) -> bool:
+    _delete("tracked_positions", {"position_id": position_id})
+    return True
+
+
+# ── User Progress ──
+
+
+def get_user_progress(user_id: str) -> dict | None:
+    return _get(_conn(), "user_progress", {"user_id": user_id})
+
+
+def put_user_progress(progress: dict) -> dict:
+    _put(_conn(), "user_progress", progress)
+    return progress
+
+
+def update_user_progress(user_id: str, updates: dict) -> dict | None:
+    fields = _non_null(updates)
+    if not fields:
+        return get_user_progress(user_id)
+    return _update("user_progress", {"user_id": user_id}, fields)
+
+
+def update_user_progress_if_unchanged(user_id: str, updates: dict, updated_at: str | None) -> dict | None:
+    return _update("user_progress", {"user_id": user_id}, updates, require={"updated_at": updated_at})
+
+
+def increment_user_progress(
+    user_id: str,
+    deltas: dict[str, float],
+    defaults: dict[str, float] | None = None,
+) -> dict | None:
+    defaults = defaults or {}
+    with _transaction() as conn:
+        item = _get(conn, "user_progress", {"user_id": user_id})
+        if item is None:
+            return None
+        for key, delta in deltas.items():
+            item[key] = item.get(key, defaults.get(key, 0)) + delta
+        item["updated_at"] = datetime.now(timezone.utc).isoformat()
+        _put(conn, "user_progress", item)
+    return item
+
+
+def put_tracked_position_with_progress(
+    position: dict,
+    deltas: dict[str, float],
+    defaults: dict[str, float] | None = None,
+) -> bool:
+    defaults = defaults or {}
+    with _transaction() as conn:
+        _put(conn, "tracked_positions", position)
+        progress = _get(conn, "user_progress", {"user_id": position["user_id"]})
+        if progress is None:
+            return False
+        for key, delta in deltas.items():
+            progress[key] = progress.get(key, defaults.get(key, 0)) + delta
+        progress["updated_at"] = datetime.now(timezone.utc).isoformat()
+        _put(conn, "user_progress", progress)
+    return True
+
+
+def get_all_progress_user_ids() -> list[str]:
+    return [row[0] for row in _conn().execute("SELECT user_id FROM user_progress")]
+
+
+# ── Leases ──
+
+
+def acquire_lease(name: str, owner: str, ttl_seconds: float, now: float) -> bool:
+    with _transaction() as conn:
+        current = _get(conn, "monitor_leases", {"lease": name})
+        if current and current["owner"] != owner and current["expires_at"] >= int(now):
+            return False
+        _put(conn, "monitor_leases", {"lease": name, "owner": owner, "expires_at": int(now + ttl_seconds)})
+    return True
+
+
+def release_lease(name: str, owner: str) -> None:
+    with _transaction() as conn:
+        current = _get(conn, "monitor_leases", {"lease": name})
+        if current and current["owner"] == owner:
+            conn.execute("DELETE FROM monitor_leases WHERE lease = ?", (name,))
+
+
+def list_leases() -> list[dict]:
+    return _select("SELECT doc FROM monitor_leases")
+
+
+def get_monitor_checkpoint(name: str) -> dict | None:
+    item = _get(_conn(), "monitor_checkpoints", {"checkpoint": name})
+    return json.loads(item["state"]) if item and item.get("state") else None
+
+
+def put_monitor_checkpoint(name: str, state: dict, expires_at: float, lease: str | None = None,
+                           owner: str | None = None, now: float | None = None) -> bool:
+    with _transaction() as conn:
+        if lease is not None:
+            current = _get(conn, "monitor_leases", {"lease": lease})
+            if not current or current["owner"] != owner or current["expires_at"] < int(now):
+                return False
+        _put(conn, "monitor_checkpoints", {"checkpoint": name, "state": json.dumps(state),
+                                           "expires_at": int(expires_at)})
+    return True
+
+
+# ── Archive ──
+
+_ARCHIVE_KINDS = {
+    "predictions": ("prediction_id", ("uploaded", "processing")),
+    "tracked_positions": ("position_id", ("active",)),
+}
+
+
+def scan_archivable(kind: str, cutoff: str):
+    _, keep_statuses = _ARCHIVE_KINDS[kind]
+    items = [
+        item for item in _select(f"SELECT doc FROM {kind}")
+        if item.get("created_at", "") < cutoff
+        and ("archived_at" not in item or "expires_at" not in item)
+        and item.get("status") not in keep_statuses
+    ]
+    if items:
+        yield items
+
+
+def mark_archived(kind: str, item_id: str, archive_key: str, expires_at: int, updated_at: str | None) -> bool:
+    key_attr, _ = _ARCHIVE_KINDS[kind]
+    return _update(kind, {key_attr: item_id}, {
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+        "archive_key": archive_key,
+        "expires_at": expires_at,
+    }, require={"updated_at": updated_at, "expires_at": None}) is not None
+
+
+def put_object(key: str, body: bytes, content_type: str = "application/octet-stream") -> None:
+    local_path = LOCAL_STORAGE_DIR / key
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    local_path.write_bytes(body)
+
+
+def get_object(key: str) -> bytes | None:
+    local_path = LOCAL_STORAGE_DIR / key
+    return local_path.read_bytes() if local_path.exists() else None
+
+
+def list_object_keys(prefix: str) -> list[str]:
+    local_dir = LOCAL_STORAGE_DIR / prefix
+    if not local_dir.is_dir():
+        return []
+    return sorted(str(p.relative_to(LOCAL_STORAGE_DIR)) for p in local_dir.rglob("*") if p.is_file())
+
+
+# ── Export ──
+
+
+def scan_window(kind: str, attribute: str, after: str | None, until: str):
+    items = [
+        item for item in _select(f"SELECT doc FROM {kind}")
+        if item.get(attribute) and (after is None or item[attribute] > after) and item[attribute] <= until
+    ]
+    if items:
+        yield items
+
+
+# ── Debug ──
+
+
+def debug_table_summaries() -> dict:
+    def _summary(table: str, sort_key: str | None = None, limit: int = 5, redact: list[str] | None = None):
+        conn = _conn()
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        items = _select(f"SELECT doc FROM {table} LIMIT ?", (limit,))
+        if sort_key:
+            items.sort(key=lambda x: x.get(sort_key, ""), reverse=True)
+        for item in items:
+            for key in redact or []:
+                if key in item:
+                    item[key] = "***REDACTED***"
+        return {"count": count, "recent": items}
+
+    return {
+        "predictions": _summary("predictions", "created_at", limit=10),
+        "trading_logs": _summary("trades", "created_at"),
+        "market_snapshots": _summary("snapshots", "scraped_at"),
+        "integrations": _summary("integrations", redact=["encrypted_private_key", "api_key_id"]),
+        "tracked_positions": _summary("tracked_positions", "created_at", limit=10),
+        "user_progress": _summary("user_progress"),
+    }
@@ -0,0 +1,157 @@
+"""Indexed lookups over the prediction log.
+
+Uses the sidecar indexes written by backend.prediction_log to find matching
+lines without scanning the logs: the index is filtered by prediction_id, model,
+hour and status, and only the matching lines are read, through an mmap of the
+log file (decompressing just the gzip member that holds each line in rotated
+files).
+
+Parsed indexes are cached per file. Rotated files never change; the live
+file's index is extended incrementally from where the last read stopped.
+"""
+
+import gzip
+import json
+import logging
+import mmap
+import os
+import threading
+from datetime import datetime
+
+from backend.prediction_log import LOG_PATH, index_path, log_segments, open_segment
+
+logger = logging.getLogger(__name__)
+
+# Index entry positions
+_OFFSET, _LENGTH, _ID, _MODEL, _HOUR, _STATUS, _BLOCK, _BLOCK_SIZE = range(8)
+
+
+class _SegmentIndex:
+    def __init__(self):
+        self.entries: list[list] = []
+        self.by_id: dict[str, list[list]] = {}
+        self.read_bytes = 0
+        self.inode = None
+
+    def extend(self, path: str) -> None:
+        with open(path, "rb") as f:
+            f.seek(self.read_bytes)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # being written; picked up next time
+                self.read_bytes += len(line)
+                entry = json.loads(line)
+                self.entries.append(entry)
+                if entry[_ID]:
+                    self.by_id.setdefault(entry[_ID], []).append(entry)
+
+
+_indexes: dict[str, _SegmentIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _load_index(segment: str) -> _SegmentIndex | None:
+    path = index_path(segment)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    with _indexes_lock:
+        index = _indexes.get(segment)
+        # A new inode (rotation) or a shorter file means a different log file
+        if index is None or index.inode != stat.st_ino or stat.st_size < index.read_bytes:
+            index = _indexes[segment] = _SegmentIndex()
+            index.inode = stat.st_ino
+        if stat.st_size > index.read_bytes:
+            index.extend(path)
+        return index
+
+
+def _read_lines(segment: str, entries: list[list]) -> list[dict]:
+    if not entries or os.path.getsize(segment) == 0:
+        return []
+    lines = []
+    blocks: dict[int, bytes] = {}
+    with open(segment, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for entry in entries:
+            if len(entry) > _BLOCK:
+                start = entry[_BLOCK]
+                if start not in blocks:
+                    blocks[start] = gzip.decompress(mm[start:start + entry[_BLOCK_SIZE]])
+                data = blocks[start]
+            else:
+                data = mm
+            end = entry[_OFFSET] + entry[_LENGTH]
+            if end > len(data):
+                continue  # indexed after this mapping was taken
+            lines.append(json.loads(data[entry[_OFFSET]:end]))
+    return lines
+
+
+def _scan(segment: str, match) -> list[dict]:
+    """Fallback for a log file without an index."""
+    logger.info("No index for %s, scanning it", segment)
+    out = []
+    with open_segment(segment) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if match(entry):
+                out.append(entry)
+    return out
+
+
+def query_log(
+    prediction_id: str | None = None,
+    model: str | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 100,
+    path: str | None = None,
+) -> list[dict]:
+    """Log entries matching all given filters, newest first."""
+    since_iso = since.isoformat() if since else None
+    until_iso = until.isoformat() if until else None
+    since_hour = since_iso[:13] if since_iso else None
+    until_hour = until_iso[:13] if until_iso else None
+
+    def entry_matches(entry: dict) -> bool:
+        logged_at = entry.get("logged_at") or ""
+        return (
+            (prediction_id is None or entry.get("prediction_id") == prediction_id)
+            and (model is None or entry.get("model") == model)
+            and (status is None or entry.get("status") == status)
+            and (since_iso is None or logged_at >= since_iso)
+            and (until_iso is None or logged_at <= until_iso)
+        )
+
+    def index_matches(entry: list) -> bool:
+        hour = entry[_HOUR] or ""
+        return (
+            (model is None or entry[_MODEL] == model)
+            and (status is None or entry[_STATUS] == status)
+            and (since_hour is None or hour >= since_hour)
+            and (until_hour is None or hour <= until_hour)
+        )
+
+    segments = log_segments(path or LOG_PATH)
+    with _indexes_lock:
+        for pruned in set(_indexes) - set(segments):
+            del _indexes[pruned]
+
+    results = []
+    for segment in reversed(segments):
+        index = _load_index(segment)
+        if index is None:
+            found = _scan(segment, entry_matches)
+        else:
+            candidates = index.by_id.get(prediction_id, []) if prediction_id else index.entries
+            found = [e for e in _read_lines(segment, [c for c in candidates if index_matches(c)]) if entry_matches(e)]
+        results.extend(found)
+        if len(results) >= limit:
+            break  # older files can only add older entries
+    results.sort(key=lambda e: e.get("logged_at") or "", reverse=True)
+    return results[:limit]
@@ -0,0 +1,74 @@
+"""Event-loop lag sampler.
+
+A task that sleeps for a fixed interval and records how late it wakes up. Any
+lateness is time the loop spent running something else without yielding,
+typically a blocking call made from an async handler. Exposed on
+GET /debug/event-loop so stalls can be compared before and after a change.
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 0.05  # seconds
+STALL_THRESHOLD = 0.1  # lag above this counts as a stall
+# Upper bounds (seconds) of the lag histogram buckets
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float("inf"))
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = SAMPLE_INTERVAL, stall_threshold: float = STALL_THRESHOLD):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.reset()
+
+    def reset(self) -> None:
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.stalled_seconds = 0.0
+        self.histogram = [0] * len(LAG_BUCKETS)
+        self.started_at = time.monotonic()
+
+    def record(self, lag: float) -> None:
+        self.samples += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.stall_threshold:
+            self.stalls += 1
+            self.stalled_seconds += lag
+        for i, bound in enumerate(LAG_BUCKETS):
+            if lag <= bound:
+                self.histogram[i] += 1
+                break
+
+    async def run(self) -> None:
+        """Sample forever; cancel the task to stop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.record(lag)
+            if lag >= self.stall_threshold:
+                logger.warning("Event loop stalled for %.3fs", lag)
+
+    def snapshot(self) -> dict:
+        return {
+            "window_seconds": round(time.monotonic() - self.started_at, 1),
+            "samples": self.samples,
+            "avg_lag_ms": round(self.total_lag / self.samples * 1000, 2) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "stalls": self.stalls,
+            "stalled_seconds": round(self.stalled_seconds, 3),
+            "histogram_ms": {
+                ("inf" if b == float("inf") else str(int(b * 1000))): n
+                for b, n in zip(LAG_BUCKETS, self.histogram)
+            },
+        }
+
+
+loop_lag = LoopLagMonitor()
@@ -5,8 +5,15 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from backend import prediction_log
+from backend.archival import archival_loop
+from backend.bot_engine import progress_repair_loop
+from backend.loop_monitor import loop_lag
+from backend.notifications import push_dispatcher, push_receipts_loop
 from backend.position_monitor import monitor_positions_loop
 from backend.routes import router
+from backend.snapshot_recorder import snapshot_recorder_loop
+from backend.uploads import UploadSizeLimitMiddleware
 
 # Configure logging so all output (including errors) appears in App Runner logs
 logging.basicConfig(
@@ -18,16 +25,29 @@ logging.basicConfig(
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    task = asyncio.create_task(monitor_positions_loop())
+    tasks = [
+        asyncio.create_task(monitor_positions_loop()),
+        asyncio.create_task(loop_lag.run()),
+        asyncio.create_task(progress_repair_loop()),
+        asyncio.create_task(snapshot_recorder_loop()),
+        asyncio.create_task(archival_loop()),
+        asyncio.create_task(push_receipts_loop()),
+    ]
     yield
-    task.cancel()
-    try:
-        await task
-    except asyncio.CancelledError:
-        pass
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await push_dispatcher.close()
+    # Drain queued prediction log lines before the process exits
+    await asyncio.get_running_loop().run_in_executor(None, prediction_log.stop)
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(UploadSizeLimitMiddleware)
 
 app.include_router(router)
 
@@ -1,3 +1,4 @@
+import hashlib
 from abc import ABC, abstractmethod
 
 MODEL_REGISTRY: dict[str, "ModelRunner"] = {}
@@ -17,6 +18,14 @@ class ModelRunner(ABC):
     status: str = "available"
     input_type: str = "image"        # "image", "text", "image+text"
     output_type: str = "prediction"  # "text", "prediction", "structured"
+    # Deterministic enough that a recent result for the same image can be reused
+    cacheable: bool = True
+
+    def cache_version(self) -> str:
+        """Identifies the prompt/config results come from; part of the reuse key."""
+        from backend.models.vision_common import EXTRACTION_SYSTEM_PROMPT
+
+        return hashlib.sha256(EXTRACTION_SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
 
     @abstractmethod
     def run(self, image_key: str, context: str | None) -> dict:
@@ -4,15 +4,20 @@ Custom models delegate to an existing backing runner (openrouter, gemini, random
 with an optional custom system prompt override.
 """
 
+import hashlib
 import json
 import logging
+import os
+import threading
+import time
 
-from backend.db import s3_client, S3_BUCKET_NAME, _s3_available
+from backend.db import S3_BUCKET_NAME, _s3_available, s3_client
 from backend.models.base import ModelRunner
 
 logger = logging.getLogger(__name__)
 
 CUSTOM_REGISTRY_KEY = "models/custom_registry.json"
+CUSTOM_REGISTRY_REVALIDATE_SECONDS = float(os.environ.get("CUSTOM_REGISTRY_REVALIDATE_SECONDS", "30"))
 
 # Backing runners that custom models can delegate to
 BACKING_RUNNERS = {
@@ -22,29 +27,69 @@ BACKING_RUNNERS = {
 }
 
 
+# In-memory copy of the registry. It is revalidated against S3 at most every
+# CUSTOM_REGISTRY_REVALIDATE_SECONDS with a conditional GET (If-None-Match on
+# the last ETag), so an unchanged registry costs a 304 and no parse.
+_registry_lock = threading.Lock()
+_registry: dict[str, dict] | None = None
+_registry_etag: str | None = None
+_registry_checked_at = 0.0
+
+
+def _copy(registry: dict[str, dict]) -> dict[str, dict]:
+    return {name: dict(config) for name, config in registry.items()}
+
+
 def _load_custom_registry() -> dict[str, dict]:
-    """Load custom model configs from S3."""
+    """Load custom model configs (cached, revalidated against S3)."""
+    global _registry, _registry_etag, _registry_checked_at
     if not _s3_available:
         return {}
-    try:
-        resp = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=CUSTOM_REGISTRY_KEY)
-        return json.loads(resp["Body"].read().decode("utf-8"))
-    except Exception:
-        # NoSuchKey (no custom models yet) or any other S3 error
-        return {}
+    with _registry_lock:
+        now = time.monotonic()
+        if _registry is not None and now - _registry_checked_at < CUSTOM_REGISTRY_REVALIDATE_SECONDS:
+            return _copy(_registry)
+
+        params = {"Bucket": S3_BUCKET_NAME, "Key": CUSTOM_REGISTRY_KEY}
+        if _registry is not None and _registry_etag:
+            params["IfNoneMatch"] = _registry_etag
+        try:
+            resp = s3_client.get_object(**params)
+            _registry = json.loads(resp["Body"].read().decode("utf-8"))
+            _registry_etag = resp.get("ETag")
+        except s3_client.exceptions.NoSuchKey:
+            # No custom models yet
+            _registry, _registry_etag = {}, None
+        except s3_client.exceptions.ClientError as exc:
+            code = exc.response.get("Error", {}).get("Code")
+            if code not in ("304", "NotModified"):
+                logger.warning("Custom registry fetch failed (%s); serving cached copy", code)
+            if _registry is None:
+                return {}
+        except Exception:
+            logger.exception("Custom registry fetch failed")
+            if _registry is None:
+                return {}
+        _registry_checked_at = now
+        return _copy(_registry)
 
 
 def _save_custom_registry(registry: dict[str, dict]) -> None:
-    """Save custom model configs to S3."""
+    """Save custom model configs to S3 and refresh the cached copy."""
+    global _registry, _registry_etag, _registry_checked_at
     if not _s3_available:
         logger.warning("S3 not available — cannot save custom models")
         return
-    s3_client.put_object(
+    resp = s3_client.put_object(
         Bucket=S3_BUCKET_NAME,
         Key=CUSTOM_REGISTRY_KEY,
         Body=json.dumps(registry, indent=2).encode("utf-8"),
         ContentType="application/json",
     )
+    with _registry_lock:
+        _registry = _copy(registry)
+        _registry_etag = resp.get("ETag")
+        _registry_checked_at = time.monotonic()
 
 
 def create_custom_model(config: dict) -> dict:
@@ -95,11 +140,16 @@ class CustomModelRunner(ModelRunner):
         self._backing_runner = config.get("backing_runner", "random")
         self._backing_llm = config.get("backing_llm")
         self._custom_prompt = config.get("custom_prompt")
+        self.cacheable = self._backing_runner in ("openrouter", "gemini")
+
+    def cache_version(self) -> str:
+        config = f"{self._backing_runner}|{self._backing_llm}|{self._custom_prompt}|{super().cache_version()}"
+        return hashlib.sha256(config.encode("utf-8")).hexdigest()[:12]
 
     def run(self, image_key: str, context: str | None) -> dict:
         if self._backing_runner == "openrouter":
-            from backend.models.openrouter_model import call_openrouter_vision
             from backend.models import vision_common
+            from backend.models.openrouter_model import call_openrouter_vision
 
             # Temporarily override prompt if custom_prompt is set
             original_prompt = None
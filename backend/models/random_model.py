@@ -160,6 +160,7 @@ class RandomModel(ModelRunner):
     name = "random"
     display_name = "Random Generator"
     description = "Generates random analysis for testing. Not a real model."
+    cacheable = False
 
     def run(self, image_key: str, context: str | None) -> dict:
         idx = random.randint(0, len(STUB_TICKERS) - 1)
@@ -15,6 +15,11 @@ class TarunsModel(ModelRunner):
     input_type = "image"
     output_type = "prediction"
 
+    @property
+    def cacheable(self) -> bool:
+        # Without a key this falls back to the random model
+        return bool(os.environ.get("OPENROUTER_API_KEY"))
+
     def run(self, image_key: str, context: str | None) -> dict:
         if not os.environ.get("OPENROUTER_API_KEY"):
             # Fall back to random model when no API key is configured (local dev)
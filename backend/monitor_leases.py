@@ -0,0 +1,110 @@
+"""Lease-based partitioning of position monitoring across workers and instances.
+
+Tickers are hashed into MONITOR_PARTITIONS partitions, and each partition is
+checked only by the worker holding its lease. Every worker:
+
+  - heartbeats a "worker#{id}" lease, so live workers can be counted,
+  - keeps (renews) or takes free partition leases up to its fair share,
+    ceil(partitions / live workers),
+  - releases leases beyond that share, so new workers get partitions.
+
+Leases last MONITOR_LEASE_TTL_SECONDS and are renewed every
+MONITOR_LEASE_RENEW_SECONDS, so a crashed worker's partitions are picked up
+within one TTL. Hashing by ticker means each market is fetched by one worker
+and each position belongs to exactly one partition, so nothing is notified
+twice.
+
+Leases live in the monitor-leases table (SQLite under STORAGE_BACKEND=sqlite,
+which is also how multi-worker behaviour is tested).
+"""
+
+import logging
+import math
+import os
+import uuid
+import zlib
+
+from backend.db import acquire_lease, list_leases, release_lease
+
+logger = logging.getLogger(__name__)
+
+MONITOR_PARTITIONS = int(os.environ.get("MONITOR_PARTITIONS", "16"))
+MONITOR_LEASE_TTL_SECONDS = int(os.environ.get("MONITOR_LEASE_TTL_SECONDS", "90"))
+MONITOR_LEASE_RENEW_SECONDS = int(os.environ.get("MONITOR_LEASE_RENEW_SECONDS", "30"))
+
+_WORKER_PREFIX = "worker#"
+_PARTITION_PREFIX = "partition#"
+
+
+def partition_of(ticker: str, partitions: int = MONITOR_PARTITIONS) -> int:
+    """Stable partition of a ticker (the same in every process)."""
+    return zlib.crc32(ticker.encode("utf-8")) % partitions
+
+
+def partition_lease(partition: int) -> str:
+    """Name of a partition's lease record."""
+    return f"{_PARTITION_PREFIX}{partition}"
+
+
+class PartitionLeases:
+    def __init__(self, owner: str | None = None, partitions: int = MONITOR_PARTITIONS,
+                 ttl_seconds: float = MONITOR_LEASE_TTL_SECONDS):
+        self.owner = owner or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.partitions = partitions
+        self.ttl_seconds = ttl_seconds
+        self.owned: set[int] = set()
+        self.valid_until = float("-inf")
+        self.refreshed_at = float("-inf")
+
+    def refresh(self, now: float) -> set[int]:
+        """Heartbeat, then renew, take and release partition leases. Returns the
+        partitions this worker now holds."""
+        acquire_lease(f"{_WORKER_PREFIX}{self.owner}", self.owner, self.ttl_seconds, now)
+        leases = list_leases()
+        workers = {lease["owner"] for lease in leases
+                   if lease["lease"].startswith(_WORKER_PREFIX) and lease["expires_at"] >= now}
+        workers.add(self.owner)
+        share = math.ceil(self.partitions / len(workers))
+
+        held_by_others = {
+            int(lease["lease"][len(_PARTITION_PREFIX):]) for lease in leases
+            if lease["lease"].startswith(_PARTITION_PREFIX)
+            and lease["owner"] != self.owner and lease["expires_at"] >= now
+        }
+        # Renew what we hold first, then take free partitions, up to the share
+        candidates = sorted(self.owned) + [p for p in range(self.partitions)
+                                           if p not in self.owned and p not in held_by_others]
+        owned: set[int] = set()
+        for partition in candidates:
+            if len(owned) >= share:
+                break
+            if acquire_lease(partition_lease(partition), self.owner, self.ttl_seconds, now):
+                owned.add(partition)
+        for partition in self.owned - owned:
+            release_lease(partition_lease(partition), self.owner)
+
+        if owned != self.owned:
+            logger.info("Monitor worker %s holds partitions %s of %d (%d workers)",
+                        self.owner, sorted(owned), self.partitions, len(workers))
+        self.owned = owned
+        # Stop a renew interval short of expiry, as a margin for clock skew
+        # between instances and for a refresh that starts late
+        self.valid_until = now + self.ttl_seconds - MONITOR_LEASE_RENEW_SECONDS
+        self.refreshed_at = now
+        return owned
+
+    def holds(self, partition: int, now: float) -> bool:
+        """Whether this worker holds a partition and the lease hasn't lapsed
+        since the last successful refresh."""
+        return now < self.valid_until and partition in self.owned
+
+    def owns(self, ticker: str, now: float) -> bool:
+        """Whether this worker may check a ticker (holds its partition)."""
+        return self.holds(partition_of(ticker, self.partitions), now)
+
+    def release_all(self) -> None:
+        for partition in self.owned:
+            release_lease(partition_lease(partition), self.owner)
+        release_lease(f"{_WORKER_PREFIX}{self.owner}", self.owner)
+        self.owned = set()
+        self.valid_until = float("-inf")
@@ -0,0 +1,131 @@
+"""Per-cycle metrics for the position monitor.
+
+Each monitor cycle (one check_due that had tickers due) records its duration,
+how many users, positions and tickers it covered, Kalshi market fetches with a
+latency histogram, settlements, price moves and alerts found, pushes sent or
+failed, and how far behind schedule it started. A finished cycle is logged as
+one JSON line ("Monitor cycle {...}") and kept in a short history; GET
+/debug/monitor returns the totals since start, the latest cycle and the
+slowest recent ones.
+"""
+
+import json
+import logging
+import time
+import uuid
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+RECENT_CYCLES = 100
+# Upper bounds (seconds) of the Kalshi fetch latency histogram buckets
+KALSHI_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_COUNTERS = ("users", "positions", "tickers", "kalshi_calls", "kalshi_errors", "settlements",
+             "price_moves", "alerts", "pushes_sent", "pushes_failed")
+
+
+def _histogram_ms(counts: list[int]) -> dict[str, int]:
+    return {("inf" if b == float("inf") else str(int(b * 1000))): n for b, n in zip(KALSHI_LATENCY_BUCKETS, counts)}
+
+
+class CycleMetrics:
+    def __init__(self, cycle_id: str | None = None, schedule_lag: float = 0.0):
+        self.cycle_id = cycle_id or uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.schedule_lag = max(0.0, schedule_lag)
+        self.duration = 0.0
+        self.counts = dict.fromkeys(_COUNTERS, 0)
+        self.kalshi_seconds = 0.0
+        self.kalshi_max = 0.0
+        self.kalshi_latency = [0] * len(KALSHI_LATENCY_BUCKETS)
+        self.schedule: dict | None = None
+        self._start = time.monotonic()
+
+    def record_fetch(self, seconds: float, ok: bool) -> None:
+        self.counts["kalshi_calls"] += 1
+        if not ok:
+            self.counts["kalshi_errors"] += 1
+        self.kalshi_seconds += seconds
+        self.kalshi_max = max(self.kalshi_max, seconds)
+        self.kalshi_latency[bisect_left(KALSHI_LATENCY_BUCKETS, seconds)] += 1
+
+    def record_changes(self, changes: dict[str, list[dict]]) -> None:
+        for user_changes in changes.values():
+            for change in user_changes:
+                if change["type"] == "settlement":
+                    self.counts["settlements"] += 1
+                elif change["type"] == "price_move":
+                    self.counts["price_moves"] += 1
+                elif change["type"] == "alert":
+                    self.counts["alerts"] += 1
+
+    def record_pushes(self, results: list[bool]) -> None:
+        self.counts["pushes_sent"] += sum(1 for ok in results if ok)
+        self.counts["pushes_failed"] += sum(1 for ok in results if not ok)
+
+    def as_dict(self) -> dict:
+        calls = self.counts["kalshi_calls"]
+        return {
+            "cycle_id": self.cycle_id,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 1),
+            "schedule_lag_ms": round(self.schedule_lag * 1000, 1),
+            **self.counts,
+            "kalshi_avg_ms": round(self.kalshi_seconds / calls * 1000, 1) if calls else 0.0,
+            "kalshi_max_ms": round(self.kalshi_max * 1000, 1),
+            "kalshi_latency_ms": _histogram_ms(self.kalshi_latency),
+            "schedule": self.schedule,
+        }
+
+
+class MonitorMetrics:
+    def __init__(self, recent: int = RECENT_CYCLES):
+        self.recent: deque[dict] = deque(maxlen=recent)
+        self.reset()
+
+    def reset(self) -> None:
+        self.recent.clear()
+        self.cycles = 0
+        self.totals = dict.fromkeys(_COUNTERS, 0)
+        self.total_seconds = 0.0
+        self.max_lag = 0.0
+        self.kalshi_latency = [0] * len(KALSHI_LATENCY_BUCKETS)
+        self.started_at = time.monotonic()
+
+    def record_pushes(self, results: list[bool]) -> None:
+        """Pushes sent outside a cycle (e.g. digests released by a cooldown)."""
+        self.totals["pushes_sent"] += sum(1 for ok in results if ok)
+        self.totals["pushes_failed"] += sum(1 for ok in results if not ok)
+
+    def finish(self, cycle: CycleMetrics, schedule: dict | None = None) -> dict:
+        """Close a cycle: add it to the totals and history, and log it."""
+        cycle.duration = time.monotonic() - cycle._start
+        cycle.schedule = schedule
+        self.cycles += 1
+        for key, value in cycle.counts.items():
+            self.totals[key] += value
+        self.total_seconds += cycle.duration
+        self.max_lag = max(self.max_lag, cycle.schedule_lag)
+        self.kalshi_latency = [a + b for a, b in zip(self.kalshi_latency, cycle.kalshi_latency)]
+        record = cycle.as_dict()
+        self.recent.append(record)
+        logger.info("Monitor cycle %s", json.dumps(record))
+        return record
+
+    def snapshot(self) -> dict:
+        return {
+            "window_seconds": round(time.monotonic() - self.started_at, 1),
+            "cycles": self.cycles,
+            "totals": self.totals,
+            "avg_cycle_ms": round(self.total_seconds / self.cycles * 1000, 1) if self.cycles else 0.0,
+            "max_schedule_lag_ms": round(self.max_lag * 1000, 1),
+            "kalshi_latency_ms": _histogram_ms(self.kalshi_latency),
+            "last_cycle": self.recent[-1] if self.recent else None,
+            "slowest_recent": sorted(self.recent, key=lambda c: c["duration_ms"], reverse=True)[:5],
+        }
+
+
+monitor_metrics = MonitorMetrics()
@@ -0,0 +1,182 @@
+"""Per-ticker check scheduling for the position monitor.
+
+Instead of checking every ticker once per MONITOR_INTERVAL_SECONDS, each ticker
+gets its own next-check time in a heap, with an interval picked from the market:
+
+  closed / awaiting settlement   MIN_CHECK_INTERVAL
+  closes within 1h / 6h / 24h    5m / 15m / 30m
+  closes more than 7 days out    4h
+  otherwise                      MONITOR_INTERVAL_SECONDS
+
+and shortened 2x or 4x when the price moved 2¢ / 5¢ since the last check.
+
+The sum of check rates is capped at what checking every ticker once per
+MONITOR_INTERVAL_SECONDS would cost (times MONITOR_BUDGET_FACTOR): when the
+wanted intervals add up to more, all of them are stretched proportionally.
+"""
+
+import heapq
+import os
+from datetime import datetime, timezone
+
+MONITOR_INTERVAL_SECONDS = 60 * 60  # 1 hour
+MIN_CHECK_INTERVAL = int(os.environ.get("MONITOR_MIN_CHECK_INTERVAL", "120"))
+MAX_CHECK_INTERVAL = int(os.environ.get("MONITOR_MAX_CHECK_INTERVAL", str(4 * 60 * 60)))
+MONITOR_BUDGET_FACTOR = float(os.environ.get("MONITOR_BUDGET_FACTOR", "1.0"))
+
+# (hours until close, interval seconds), checked in order
+_CLOSE_TIERS = ((1, 5 * 60), (6, 15 * 60), (24, 30 * 60))
+_FAR_DATED_HOURS = 7 * 24
+_SETTLING_STATUSES = frozenset({"closed", "determined", "finalized", "settled"})
+
+
+def _yes_price(market: dict) -> float | None:
+    return market.get("yes_ask") or market.get("last_price")
+
+
+def wanted_interval(market: dict, previous_price: float | None, now: datetime) -> float:
+    """Seconds until a ticker should be checked again, before budgeting."""
+    if market.get("status") in _SETTLING_STATUSES:
+        return MIN_CHECK_INTERVAL
+
+    interval = MONITOR_INTERVAL_SECONDS
+    close_time = market.get("close_time")
+    if close_time:
+        try:
+            closes = datetime.fromisoformat(close_time.replace("Z", "+00:00"))
+        except ValueError:
+            closes = None
+        if closes is not None:
+            hours = (closes - now).total_seconds() / 3600
+            if hours <= 0:
+                return MIN_CHECK_INTERVAL
+            if hours > _FAR_DATED_HOURS:
+                interval = MAX_CHECK_INTERVAL
+            for limit, tier_interval in _CLOSE_TIERS:
+                if hours <= limit:
+                    interval = tier_interval
+                    break
+
+    price = _yes_price(market)
+    if price is not None and previous_price is not None:
+        move = abs(price - previous_price)
+        if move >= 5:
+            interval /= 4
+        elif move >= 2:
+            interval /= 2
+
+    return max(MIN_CHECK_INTERVAL, min(MAX_CHECK_INTERVAL, interval))
+
+
+class TickerScheduler:
+    """Heap of (next check, ticker) for the tickers with active positions."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, str]] = []
+        self._due: dict[str, float] = {}  # authoritative; heap entries that disagree are stale
+        self._wanted: dict[str, float] = {}
+        self._wanted_rate = 0.0  # sum of 1/wanted over tracked tickers
+        self._last_price: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def tickers(self):
+        return self._due.keys()
+
+    def _push(self, ticker: str, due: float) -> None:
+        self._due[ticker] = due
+        heapq.heappush(self._heap, (due, ticker))
+
+    def sync(self, tickers, now: float) -> None:
+        """Track exactly these tickers: new ones are due now, gone ones dropped."""
+        tickers = set(tickers)
+        for ticker in set(self._due) - tickers:
+            del self._due[ticker]
+            self._set_wanted(ticker, None)
+            self._last_price.pop(ticker, None)
+        for ticker in tickers - set(self._due):
+            self._push(ticker, now)
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(due, ticker) for ticker, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def pop_due(self, now: float) -> list[str]:
+        """Tickers whose check time has come. They stay tracked, unscheduled
+        until reschedule()."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            at, ticker = heapq.heappop(self._heap)
+            if self._due.get(ticker) == at:
+                self._due[ticker] = float("inf")
+                due.append(ticker)
+        return due
+
+    def next_due(self) -> float | None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _set_wanted(self, ticker: str, interval: float | None) -> None:
+        old = self._wanted.pop(ticker, None)
+        if old:
+            self._wanted_rate -= 1 / old
+        if interval:
+            self._wanted[ticker] = interval
+            self._wanted_rate += 1 / interval
+
+    def budget_scale(self) -> float:
+        """Factor (>= 1) that stretches wanted intervals to fit the request budget."""
+        budget = len(self._due) / MONITOR_INTERVAL_SECONDS * MONITOR_BUDGET_FACTOR
+        return max(1.0, self._wanted_rate / budget) if budget > 0 else 1.0
+
+    def reschedule(self, ticker: str, market: dict | None, now: float) -> float:
+        """Schedule a checked ticker's next check. Returns the interval used."""
+        if ticker not in self._due:
+            return 0.0
+        if market is None:
+            # Fetch failed: retry on the base interval rather than hammering
+            wanted = MONITOR_INTERVAL_SECONDS
+        else:
+            when = datetime.fromtimestamp(now, timezone.utc)
+            wanted = wanted_interval(market, self._last_price.get(ticker), when)
+            price = _yes_price(market)
+            if price is not None:
+                self._last_price[ticker] = price
+        self._set_wanted(ticker, wanted)
+        interval = wanted * self.budget_scale()
+        self._push(ticker, now + interval)
+        return interval
+
+    def defer(self, ticker: str, until: float) -> None:
+        """Put a popped ticker back without checking it."""
+        if ticker in self._due:
+            self._push(ticker, until)
+
+    def export(self, tickers) -> dict[str, list]:
+        """[next check, wanted interval, last price] per tracked ticker, for
+        checkpoints. Next check is None for tickers popped but not yet
+        rescheduled."""
+        return {
+            ticker: [None if self._due[ticker] == float("inf") else self._due[ticker],
+                     self._wanted.get(ticker), self._last_price.get(ticker)]
+            for ticker in tickers if ticker in self._due
+        }
+
+    def restore(self, entries: dict[str, list], now: float) -> None:
+        """Load exported tickers; ones that were mid-check are due now."""
+        for ticker, (due, wanted, price) in entries.items():
+            self._push(ticker, now if due is None else due)
+            self._set_wanted(ticker, wanted)
+            if price is not None:
+                self._last_price[ticker] = price
+
+    def snapshot(self, now: float) -> dict:
+        pending = [due - now for due in self._due.values() if due != float("inf")]
+        return {
+            "tickers": len(self._due),
+            "checking": sum(1 for due in self._due.values() if due == float("inf")),
+            "next_check_in": max(0.0, min(pending)) if pending else None,
+            "budget_scale": round(self.budget_scale(), 3),
+            "checks_per_hour": round(3600 * self._wanted_rate / self.budget_scale(), 1),
+        }
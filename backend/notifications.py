@@ -1,11 +1,15 @@
+import asyncio
 import logging
 import os
+import time
+from email.utils import parsedate_to_datetime
 
 import httpx
 
 logger = logging.getLogger(__name__)
 
 EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+EXPO_RECEIPTS_URL = "https://exp.host/--/api/v2/push/getReceipts"
 
 # ── Mailgun config ──
 
@@ -14,30 +18,262 @@ MAILGUN_DOMAIN = os.environ.get("MAILGUN_DOMAIN", "ai.complete.city")
 MAILGUN_FROM = "Kalshi Use <arihant@ai.complete.city>"
 
 
+# ── Expo push ──
+#
+# Pushes are queued on a PushDispatcher and sent in batches of up to
+# EXPO_BATCH_SIZE messages per request over one pooled client. A batch goes out
+# when it is full or PUSH_FLUSH_SECONDS after its first message, or when a
+# producer calls flush() (e.g. at the end of a monitor cycle).
+#
+# Expo answers each message with a ticket; tickets map back to the token they
+# were sent to. Delivery receipts are fetched in bulk once they are
+# RECEIPT_DELAY_SECONDS old. Tokens reported as DeviceNotRegistered, in a
+# ticket or a receipt, are removed from the user's records and skipped for
+# INVALID_TOKEN_SECONDS, or until the token is registered again.
+#
+# Requests that fail in transport or with 429/5xx are retried up to
+# EXPO_MAX_ATTEMPTS times, waiting Retry-After when Expo sends it and an
+# exponential backoff otherwise; only then do the batch's futures fail.
+
+EXPO_BATCH_SIZE = 100  # Expo's per-request message limit
+EXPO_RECEIPT_BATCH_SIZE = 1000  # Expo's per-request receipt id limit
+EXPO_MAX_CONCURRENT_REQUESTS = 6
+EXPO_ACCESS_TOKEN = os.environ.get("EXPO_ACCESS_TOKEN", "")
+PUSH_FLUSH_SECONDS = float(os.environ.get("PUSH_FLUSH_SECONDS", "0.5"))
+RECEIPT_DELAY_SECONDS = int(os.environ.get("PUSH_RECEIPT_DELAY_SECONDS", str(15 * 60)))
+RECEIPT_POLL_SECONDS = int(os.environ.get("PUSH_RECEIPT_POLL_SECONDS", str(5 * 60)))
+RECEIPT_MAX_AGE_SECONDS = 24 * 60 * 60  # Expo keeps receipts about a day
+EXPO_MAX_ATTEMPTS = int(os.environ.get("EXPO_MAX_ATTEMPTS", "4"))
+EXPO_RETRY_BASE_SECONDS = float(os.environ.get("EXPO_RETRY_BASE_SECONDS", "1"))
+EXPO_RETRY_MAX_SECONDS = 30.0
+# Other workers only learn of a re-registered token from the records, so an
+# invalid token is retried after this long
+INVALID_TOKEN_SECONDS = int(os.environ.get("PUSH_INVALID_TOKEN_SECONDS", str(60 * 60)))
+
+
+def _retry_after(resp: httpx.Response) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PushDispatcher:
+    def __init__(self, http_client: httpx.AsyncClient | None = None):
+        self._client = http_client
+        self._pending: list[tuple[dict, str | None, asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+        self._send_tasks: set[asyncio.Task] = set()
+        self._tickets: dict[str, tuple[str, str | None, float]] = {}  # id -> (token, user_id, sent_at)
+        self.invalid_tokens: dict[str, float] = {}  # token -> when Expo reported it
+        self.stats = {"messages": 0, "requests": 0, "errors": 0, "retries": 0, "receipt_requests": 0,
+                      "invalid_tokens": 0}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+            if EXPO_ACCESS_TOKEN:
+                headers["Authorization"] = f"Bearer {EXPO_ACCESS_TOKEN}"
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=30.0,
+                limits=httpx.Limits(max_connections=EXPO_MAX_CONCURRENT_REQUESTS),
+            )
+        return self._client
+
+    # ── Queueing ──
+
+    def enqueue(self, expo_push_token: str, title: str, body: str, data: dict | None = None,
+                user_id: str | None = None) -> asyncio.Future:
+        """Queue a push. The returned future resolves to True once Expo accepts it."""
+        future = asyncio.get_running_loop().create_future()
+        if self._is_invalid(expo_push_token):
+            future.set_result(False)
+            return future
+        message = {"to": expo_push_token, "title": title, "body": body, "sound": "default"}
+        if data:
+            message["data"] = data
+        self._pending.append((message, user_id or (data or {}).get("user_id"), future))
+        if len(self._pending) >= EXPO_BATCH_SIZE:
+            self._start_send(self._take(EXPO_BATCH_SIZE))
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return future
+
+    async def send(self, expo_push_token: str, title: str, body: str, data: dict | None = None) -> bool:
+        return await self.enqueue(expo_push_token, title, body, data)
+
+    async def flush(self) -> None:
+        """Send everything queued and wait for all in-flight batches."""
+        while self._pending:
+            self._start_send(self._take(EXPO_BATCH_SIZE))
+        if self._send_tasks:
+            await asyncio.gather(*self._send_tasks, return_exceptions=True)
+
+    def _take(self, n: int) -> list:
+        batch, self._pending = self._pending[:n], self._pending[n:]
+        return batch
+
+    def _start_send(self, batch: list) -> None:
+        task = asyncio.create_task(self._send_batch(batch))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(PUSH_FLUSH_SECONDS)
+        self._flush_task = None
+        await self.flush()
+
+    # ── Sending ──
+
+    async def _post(self, url: str, payload) -> httpx.Response:
+        """POST to Expo, retrying transport errors, 429 and 5xx with backoff.
+        Raises once EXPO_MAX_ATTEMPTS are used up or on any other error status."""
+        delay = EXPO_RETRY_BASE_SECONDS
+        attempt = 1
+        while True:
+            try:
+                resp = await self._http().post(url, json=payload)
+            except httpx.TransportError:
+                if attempt >= EXPO_MAX_ATTEMPTS:
+                    raise
+                wait, reason = delay, "transport error"
+            else:
+                if attempt >= EXPO_MAX_ATTEMPTS or (resp.status_code != 429 and resp.status_code < 500):
+                    resp.raise_for_status()
+                    return resp
+                wait, reason = _retry_after(resp) or delay, f"HTTP {resp.status_code}"
+            wait = min(wait, EXPO_RETRY_MAX_SECONDS)
+            self.stats["retries"] += 1
+            logger.warning("Expo request failed (%s); retry %d in %.1fs", reason, attempt, wait)
+            await asyncio.sleep(wait)
+            delay *= 2
+            attempt += 1
+
+    async def _send_batch(self, batch: list) -> None:
+        messages = [message for message, _, _ in batch]
+        self.stats["requests"] += 1
+        self.stats["messages"] += len(messages)
+        try:
+            resp = await self._post(EXPO_PUSH_URL, messages)
+            tickets = resp.json().get("data", [])
+        except Exception:
+            self.stats["errors"] += 1
+            logger.exception("Failed to send %d push notifications", len(messages))
+            tickets = []
+
+        now = time.time()
+        for i, (message, user_id, future) in enumerate(batch):
+            ticket = tickets[i] if i < len(tickets) else None
+            token = message["to"]
+            ok = bool(ticket) and ticket.get("status") == "ok"
+            if ok and ticket.get("id"):
+                self._tickets[ticket["id"]] = (token, user_id, now)
+            elif ticket:
+                await self._ticket_error(token, user_id, ticket)
+            if not future.done():
+                future.set_result(ok)
+
+    async def _ticket_error(self, token: str, user_id: str | None, ticket: dict) -> None:
+        error = (ticket.get("details") or {}).get("error")
+        logger.warning("Push to %s rejected: %s (%s)", token, ticket.get("message"), error)
+        if error == "DeviceNotRegistered":
+            await self._invalidate(token, user_id)
+
+    def _is_invalid(self, token: str) -> bool:
+        invalidated = self.invalid_tokens.get(token)
+        if invalidated is None:
+            return False
+        if time.time() - invalidated < INVALID_TOKEN_SECONDS:
+            return True
+        self.invalid_tokens.pop(token, None)
+        return False
+
+    def token_registered(self, token: str) -> None:
+        """A user (re-)registered this token: stop skipping it."""
+        self.invalid_tokens.pop(token, None)
+
+    async def _invalidate(self, token: str, user_id: str | None) -> None:
+        if self._is_invalid(token):
+            return
+        self.invalid_tokens[token] = time.time()
+        self.stats["invalid_tokens"] += 1
+        if user_id:
+            try:
+                from backend import async_db
+                await async_db.remove_push_token(user_id, token)
+            except Exception:
+                logger.exception("Failed to remove push token for %s", user_id)
+
+    # ── Receipts ──
+
+    async def check_receipts(self, now: float | None = None) -> int:
+        """Fetch receipts for tickets at least RECEIPT_DELAY_SECONDS old, in bulk.
+        Returns the number of receipts processed."""
+        now = now or time.time()
+        for ticket_id, (_, _, sent_at) in list(self._tickets.items()):
+            if now - sent_at > RECEIPT_MAX_AGE_SECONDS:
+                del self._tickets[ticket_id]
+        ready = [tid for tid, (_, _, sent_at) in self._tickets.items() if now - sent_at >= RECEIPT_DELAY_SECONDS]
+        processed = 0
+        for start in range(0, len(ready), EXPO_RECEIPT_BATCH_SIZE):
+            ids = ready[start:start + EXPO_RECEIPT_BATCH_SIZE]
+            self.stats["receipt_requests"] += 1
+            try:
+                resp = await self._post(EXPO_RECEIPTS_URL, {"ids": ids})
+                receipts = resp.json().get("data", {})
+            except Exception:
+                logger.exception("Failed to fetch %d push receipts", len(ids))
+                continue
+            for ticket_id, receipt in receipts.items():
+                token, user_id, _ = self._tickets.pop(ticket_id, (None, None, 0))
+                processed += 1
+                if token and receipt.get("status") == "error":
+                    await self._ticket_error(token, user_id, receipt)
+        return processed
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+push_dispatcher = PushDispatcher()
+
+
 async def send_push(
     expo_push_token: str,
     title: str,
     body: str,
     data: dict | None = None,
 ) -> bool:
-    """Send a push notification via the Expo Push API. Returns True on success."""
-    payload = {
-        "to": expo_push_token,
-        "title": title,
-        "body": body,
-        "sound": "default",
-    }
-    if data:
-        payload["data"] = data
+    """Send a push notification via the Expo Push API (batched with any other
+    pushes queued around the same time). Returns True if Expo accepted it."""
+    return await push_dispatcher.send(expo_push_token, title, body, data)
 
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(EXPO_PUSH_URL, json=payload)
-            resp.raise_for_status()
-            return True
-    except Exception:
-        logger.exception("Failed to send push notification to %s", expo_push_token)
-        return False
+
+async def push_receipts_loop():
+    """Poll Expo push receipts every RECEIPT_POLL_SECONDS; cancel to stop."""
+    while True:
+        await asyncio.sleep(RECEIPT_POLL_SECONDS)
+        try:
+            processed = await push_dispatcher.check_receipts()
+            if processed:
+                logger.info("Processed %d push receipts", processed)
+        except Exception:
+            logger.exception("Push receipt check failed")
 
 
 async def send_email(
@@ -1,24 +1,117 @@
-"""Hourly background loop that monitors tracked positions for price changes and settlements."""
+"""Background loop that monitors tracked positions for price changes and settlements.
+
+Tickers are checked on their own schedule (backend.monitor_scheduler): often
+when a market is near close or moving, rarely when it is quiet and far-dated.
+Whatever is due is fetched once per ticker, concurrently (at most
+MONITOR_FETCH_CONCURRENCY in flight, started no faster than MONITOR_FETCH_RATE
+per second), and every position on those tickers is evaluated against the
+shared results.
+
+Settlements are pushed right away; price moves are summed per ticker and sent
+as a digest at most once per MONITOR_DIGEST_COOLDOWN_SECONDS per user. User
+take-profit / stop-loss levels (backend.price_alerts) are matched against each
+fetched price through a per-ticker index and pushed right away when crossed.
+
+Every worker process runs this loop; with MONITOR_LEASES each only checks the
+ticker partitions it holds a lease on, so work is split rather than repeated,
+and the active-position scan runs in one worker (MONITOR_SCAN_LEASE) that
+publishes each partition's positions for the others.
+With MONITOR_CHECKPOINTS, cycle progress and unsent notifications are saved per
+partition so a restarted (or new) owner resumes where the last one stopped.
+"""
 
 import asyncio
+import json
 import logging
+import os
+import time
+import uuid
 from datetime import datetime, timezone
 
-from backend.db import (
-    get_all_users_with_active_positions,
-    get_push_token_for_user,
-    update_tracked_position,
-)
+from backend import async_db
 from backend.kalshi_api import fetch_market
-from backend.notifications import send_push
+from backend.monitor_leases import (
+    MONITOR_LEASE_RENEW_SECONDS,
+    PartitionLeases,
+    partition_lease,
+    partition_of,
+)
+from backend.monitor_metrics import CycleMetrics, monitor_metrics
+from backend.monitor_scheduler import MONITOR_INTERVAL_SECONDS, TickerScheduler
+from backend.notifications import push_dispatcher
+from backend.price_alerts import AlertIndex
 
 logger = logging.getLogger(__name__)
 
-MONITOR_INTERVAL_SECONDS = 60 * 60  # 1 hour
-POSITION_CHECK_DELAY = 0.5  # seconds between per-position API calls
+# How often the active-position scan runs; new positions wait at most this long
+MONITOR_RESCAN_SECONDS = int(os.environ.get("MONITOR_RESCAN_SECONDS", "600"))
+MONITOR_DIGEST_COOLDOWN_SECONDS = int(os.environ.get("MONITOR_DIGEST_COOLDOWN_SECONDS", str(60 * 60)))
+# Split tickers across workers/instances by lease (backend.monitor_leases); off = check everything here
+MONITOR_LEASES = os.environ.get("MONITOR_LEASES", "true").lower() in ("1", "true", "yes")
+MONITOR_FETCH_CONCURRENCY = int(os.environ.get("MONITOR_FETCH_CONCURRENCY", "8"))
+MONITOR_FETCH_RATE = float(os.environ.get("MONITOR_FETCH_RATE", "10"))  # requests/second
+# Persist cycle progress and unsent notifications so a restart resumes instead of starting over
+MONITOR_CHECKPOINTS = os.environ.get("MONITOR_CHECKPOINTS", "true").lower() in ("1", "true", "yes")
+MONITOR_CHECKPOINT_TICKERS = int(os.environ.get("MONITOR_CHECKPOINT_TICKERS", "25"))  # tickers per save
+MONITOR_CHECKPOINT_TTL_SECONDS = 24 * 60 * 60
+# With leases, one worker (the holder of this lease) scans for everyone and
+# publishes each partition's positions and push tokens to an object; the others
+# read the partitions they hold, and scan themselves only if one is missing or
+# older than two rescans
+MONITOR_SCAN_LEASE = "monitor-scan"
+MONITOR_SCAN_LEASE_TTL_SECONDS = 2 * MONITOR_RESCAN_SECONDS + 60
+MONITOR_SCAN_PREFIX = "monitor/positions"
+
+
+# ── Market fetches ──
+
+
+class _RateLimiter:
+    """Spaces call starts at least 1/rate seconds apart across concurrent tasks."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
 
+async def fetch_markets_for(tickers, metrics: CycleMetrics | None = None) -> dict[str, dict]:
+    """Ticker -> market for each ticker, fetched concurrently under the limits.
+    Tickers whose fetch fails or returns nothing are left out. Each call's
+    latency is recorded on `metrics`, if given."""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(MONITOR_FETCH_CONCURRENCY)
+    limiter = _RateLimiter(MONITOR_FETCH_RATE)
 
-async def _check_position(pos: dict) -> dict | None:
+    async def fetch(ticker: str):
+        async with semaphore:
+            await limiter.wait()
+            started = time.monotonic()
+            try:
+                market = await loop.run_in_executor(None, fetch_market, ticker)
+            except Exception:
+                logger.exception("Failed to fetch market %s", ticker)
+                market = None
+            if metrics:
+                metrics.record_fetch(time.monotonic() - started, ok=market is not None)
+            return ticker, market
+
+    results = await asyncio.gather(*(fetch(ticker) for ticker in tickers))
+    return {ticker: market for ticker, market in results if market}
+
+
+# ── Position checks ──
+
+
+async def _check_position(pos: dict, market: dict) -> dict | None:
     """Check a single position against live market data.
 
     Returns a summary dict if something changed, or None if nothing notable.
@@ -28,11 +121,6 @@ async def _check_position(pos: dict) -> dict | None:
     if not ticker or not position_id:
         return None
 
-    loop = asyncio.get_event_loop()
-    market = await loop.run_in_executor(None, fetch_market, ticker)
-    if not market:
-        return None
-
     now = datetime.now(timezone.utc).isoformat()
     result = market.get("result")
     side = pos.get("side", "yes")
@@ -49,20 +137,16 @@ async def _check_position(pos: dict) -> dict | None:
             realized_pnl = round(-entry_price, 2)
             status = "settled_loss"
 
-        update_tracked_position(position_id, {
+        settled = await async_db.settle_tracked_position(position_id, {
             "status": status,
             "settlement_price": settlement_price,
             "realized_pnl": realized_pnl,
             "settled_at": now,
             "updated_at": now,
         })
-
-        # Update bot milestones on settlement
-        try:
-            from backend.bot_engine import record_settlement
-            record_settlement(pos.get("user_id"))
-        except Exception:
-            logger.exception("Failed to update progress on settlement")
+        pos["status"] = status  # so later checks before the next rescan skip it
+        if not settled:
+            return None  # already settled elsewhere (e.g. a positions list read)
 
         won = status == "settled_win"
         sign = "+" if won else ""
@@ -74,7 +158,7 @@ async def _check_position(pos: dict) -> dict | None:
         }
 
     # ── Price change detection ──
-    yes_price = market.get("yes_ask") or market.get("last_price")
+    yes_price = _yes_price(market)
     if yes_price is None:
         return None
 
@@ -89,78 +173,560 @@ async def _check_position(pos: dict) -> dict | None:
     if abs(delta) < 1:
         return None  # no meaningful change
 
-    update_tracked_position(position_id, {
+    await async_db.update_tracked_position(position_id, {
         "last_notified_price": current_price,
         "last_notified_at": now,
         "updated_at": now,
     })
+    pos["last_notified_price"] = current_price
 
-    sign = "+" if delta > 0 else ""
     return {
         "type": "price_move",
         "ticker": ticker,
-        "delta": f"{sign}{delta}¢",
+        "delta": _format_delta(delta),
+        "delta_cents": delta,
     }
 
 
-async def _monitor_once():
-    """Run a single monitoring cycle across all users with active positions."""
-    try:
-        grouped = get_all_users_with_active_positions()
-    except Exception:
-        logger.exception("Failed to scan active positions")
-        return
+def _yes_price(market: dict) -> float | None:
+    return market.get("yes_ask") or market.get("last_price")
 
-    if not grouped:
-        logger.info("Position monitor: no active positions")
-        return
 
-    logger.info("Position monitor: checking %d users", len(grouped))
+def _format_cents(price: float) -> str:
+    return f"{round(price, 2):g}¢"
+
+
+def _format_delta(delta: float) -> str:
+    sign = "+" if delta > 0 else ""
+    return f"{sign}{round(delta, 2)}¢"
+
+
+async def _record_settlements(tallies: dict[str, tuple[int, int]]) -> None:
+    """Update bot progress once per user from (settled, won) counts."""
+    from backend.bot_engine import record_settlements
+
+    async def record(user_id: str, settled: int, won: int) -> None:
+        try:
+            await async_db.run(record_settlements, user_id, settled=settled, won=won)
+        except Exception:
+            logger.exception("Failed to update progress on settlement for %s", user_id)
+
+    await asyncio.gather(*(record(user_id, *tally) for user_id, tally in tallies.items() if tally[0]))
 
-    for user_id, positions in grouped.items():
-        token = get_push_token_for_user(user_id)
-        if not token:
-            continue
 
-        settlements: list[str] = []
-        moves: list[str] = []
+def _settlement_tallies(changes: dict[str, list[dict]]) -> dict[str, tuple[int, int]]:
+    tallies = {}
+    for user_id, user_changes in changes.items():
+        settlements = [c for c in user_changes if c["type"] == "settlement"]
+        if settlements:
+            tallies[user_id] = (len(settlements), sum(1 for c in settlements if c["won"]))
+    return tallies
+
+
+async def _evaluate(grouped: dict[str, list[dict]], markets: dict[str, dict],
+                    record: bool = True) -> dict[str, list[dict]]:
+    """Check every active position that has market data. Returns user -> changes.
 
+    With `record`, settlements are counted towards bot progress once per user,
+    after all positions are checked.
+    """
+    changes: dict[str, list[dict]] = {}
+    for user_id, positions in grouped.items():
         for pos in positions:
+            market = markets.get(pos.get("ticker"))
+            if not market or pos.get("status", "active") != "active":
+                continue
             try:
-                change = await _check_position(pos)
-                if change:
-                    if change["type"] == "settlement":
-                        emoji = "W" if change["won"] else "L"
-                        settlements.append(f"{change['ticker']} {emoji} {change['pnl']}")
-                    elif change["type"] == "price_move":
-                        moves.append(f"{change['ticker']} {change['delta']}")
+                change = await _check_position(pos, market)
             except Exception:
                 logger.exception("Error checking position %s", pos.get("position_id"))
+                continue
+            if change:
+                changes.setdefault(user_id, []).append(change)
+    if record:
+        await _record_settlements(_settlement_tallies(changes))
+    return changes
 
-            await asyncio.sleep(POSITION_CHECK_DELAY)
 
-        # Build digest notification
-        parts: list[str] = []
-        if settlements:
-            parts.append("Settled: " + ", ".join(settlements))
-        if moves:
-            parts.append("Moved: " + ", ".join(moves))
+def _send_digest(user_id: str, token: str, settlements: list[str], moves: list[str],
+                 alerts: list[str] = ()) -> asyncio.Future | None:
+    """Queue a digest on the push dispatcher; the cycle flushes it. Returns the
+    dispatcher's future (True once Expo accepts the push)."""
+    parts: list[str] = []
+    if alerts:
+        parts.append("Alert: " + ", ".join(alerts))
+    if settlements:
+        parts.append("Settled: " + ", ".join(settlements))
+    if moves:
+        parts.append("Moved: " + ", ".join(moves))
+    if not parts:
+        return None
+    body = " | ".join(parts)
+    future = push_dispatcher.enqueue(
+        token, "Position Update", body,
+        data={"type": "position_update", "user_id": user_id}, user_id=user_id,
+    )
+    logger.info("Queued digest for %s: %s", user_id, body)
+    return future
+
+
+def _push_results(futures: list) -> list[bool]:
+    """Delivery outcome of flushed digest futures."""
+    return [bool(f.result()) for f in futures if f is not None and f.done()]
+
+
+def _settlement_line(change: dict) -> str:
+    emoji = "W" if change["won"] else "L"
+    return f"{change['ticker']} {emoji} {change['pnl']}"
+
 
-        if parts:
-            body = " | ".join(parts)
-            await send_push(
-                token, "Position Update", body,
-                data={"type": "position_update", "user_id": user_id},
-            )
-            logger.info("Sent digest to %s: %s", user_id, body)
+# ── Scheduled loop ──
+
+
+class _Digests:
+    """Notifications waiting to go out: price moves held for a user's digest
+    cooldown, and events sent right away — settlements (which also still owe a
+    bot progress update) and price alerts."""
+
+    def __init__(self):
+        self.pending: dict[str, dict[str, float]] = {}  # user -> ticker -> summed delta
+        self.events: dict[str, list[list]] = {}  # user -> [ticker, line, kind], kind "won", "lost" or "alert"
+        self.last_sent: dict[str, float] = {}
+
+    def add(self, user_id: str, changes: list[dict]) -> None:
+        moves = self.pending.setdefault(user_id, {})
+        for change in changes:
+            if change["type"] == "price_move":
+                moves[change["ticker"]] = moves.get(change["ticker"], 0) + change["delta_cents"]
+            elif change["type"] == "settlement":
+                self.events.setdefault(user_id, []).append(
+                    [change["ticker"], _settlement_line(change), "won" if change["won"] else "lost"])
+            elif change["type"] == "alert":
+                self.events.setdefault(user_id, []).append([change["ticker"], change["line"], "alert"])
+
+    def take(self, user_id: str, now: float, force: bool = False) -> dict[str, float]:
+        """The user's buffered moves if a digest may go out now (or force)."""
+        moves = {t: d for t, d in self.pending.get(user_id, {}).items() if abs(d) >= 1}
+        last_sent = self.last_sent.get(user_id)
+        if not moves or (not force and last_sent is not None and now - last_sent < MONITOR_DIGEST_COOLDOWN_SECONDS):
+            return {}
+        del self.pending[user_id]
+        return moves
+
+    def sent(self, user_id: str, now: float) -> None:
+        self.last_sent[user_id] = now
+
+    def for_tickers(self, tickers: set[str]) -> tuple[dict, dict]:
+        """(moves, events) buffered for these tickers, per user."""
+        moves = {user: {t: d for t, d in by_ticker.items() if t in tickers} for user, by_ticker in self.pending.items()}
+        events = {user: [e for e in entries if e[0] in tickers] for user, entries in self.events.items()}
+        return {u: m for u, m in moves.items() if m}, {u: e for u, e in events.items() if e}
+
+    def merge(self, moves: dict, events: dict, last_sent: dict) -> None:
+        for user_id, by_ticker in moves.items():
+            pending = self.pending.setdefault(user_id, {})
+            for ticker, delta in by_ticker.items():
+                pending[ticker] = pending.get(ticker, 0) + delta
+        for user_id, entries in events.items():
+            self.events.setdefault(user_id, []).extend(entries)
+        for user_id, at in last_sent.items():
+            self.last_sent[user_id] = max(at, self.last_sent.get(user_id, at))
+
+    def drop(self, tickers: set[str]) -> None:
+        """Forget everything buffered for these tickers (their owner changed)."""
+        for by_ticker in self.pending.values():
+            for ticker in tickers & set(by_ticker):
+                del by_ticker[ticker]
+        for user_id, entries in self.events.items():
+            self.events[user_id] = [e for e in entries if e[0] not in tickers]
+        self.pending = {u: m for u, m in self.pending.items() if m}
+        self.events = {u: e for u, e in self.events.items() if e}
+
+
+class PositionMonitor:
+    """State of the scheduled monitor loop between checks.
+
+    With `leases`, only tickers in partitions this worker holds are checked.
+
+    With `checkpoints`, the state of each partition (or of everything, without
+    leases) is saved to a "checkpoint#{scope}" record as a cycle goes: the
+    cycle id, next-check times (tickers still to do in an unfinished cycle
+    have none), and notifications not yet sent. Whoever next holds the
+    partition — this process after a restart, or another worker — resumes
+    from it: unfinished tickers are due at once, finished ones keep their
+    schedule, and buffered notifications go out. Notifications are removed
+    from the checkpoint before they are sent, so a crash can lose one but
+    never sends one twice. Checkpoint writes are fenced on the partition
+    lease, and nothing is sent unless its write went through, so a worker
+    that has lost a partition can neither overwrite the new owner's
+    checkpoint nor repeat its notifications.
+    """
+
+    def __init__(self, leases: PartitionLeases | None = None, checkpoints: bool = False):
+        self.scheduler = TickerScheduler()
+        self.digests = _Digests()
+        self.leases = leases
+        self.checkpoints = checkpoints
+        self.restored: set[str] = set()
+        self.cycle_id: str | None = None
+        self.alerts = AlertIndex()
+        self.grouped: dict[str, list[dict]] = {}
+        self.positions: dict[str, dict] = {}
+        self.tokens: dict[str, str] = {}
+        self.scanned_at = float("-inf")
+
+    def _sync(self, now: float) -> None:
+        tickers = {pos["ticker"] for positions in self.grouped.values() for pos in positions if pos.get("ticker")}
+        if self.leases:
+            tickers = {ticker for ticker in tickers if self.leases.owns(ticker, now)}
+        self.scheduler.sync(tickers, now)
+
+    async def rescan(self, now: float) -> None:
+        """Reload the active positions this worker monitors and their users' push tokens."""
+        if self.leases:
+            self.grouped, self.tokens = await self._partition_positions(now)
+        else:
+            self.grouped = await async_db.get_all_users_with_active_positions()
+            self.tokens = await async_db.get_push_tokens_for_users(self.grouped) if self.grouped else {}
+        self.positions = {pos["position_id"]: pos for positions in self.grouped.values() for pos in positions
+                          if pos.get("position_id")}
+        self.alerts.sync(self.positions.values())
+        await self._restore(now)
+        self._sync(now)
+        self.scanned_at = now
+
+    async def _partition_positions(self, now: float) -> tuple[dict, dict]:
+        """Positions (by user) and push tokens of the partitions this worker holds."""
+        partitions = self.leases.partitions
+        owned = sorted(self.leases.owned)
+        if await async_db.acquire_lease(MONITOR_SCAN_LEASE, self.leases.owner, MONITOR_SCAN_LEASE_TTL_SECONDS, now):
+            snapshots = await self._scan(range(partitions), now)
+            await asyncio.gather(*(
+                async_db.put_object(f"{MONITOR_SCAN_PREFIX}/{partition}.json",
+                                    json.dumps(snapshot, default=str).encode("utf-8"), "application/json")
+                for partition, snapshot in snapshots.items()
+            ))
+        else:
+            bodies = await asyncio.gather(*(async_db.get_object(f"{MONITOR_SCAN_PREFIX}/{partition}.json")
+                                            for partition in owned))
+            snapshots = {partition: json.loads(body) for partition, body in zip(owned, bodies) if body}
+            stale_before = now - 2 * MONITOR_RESCAN_SECONDS
+            if any(snapshots.get(partition, {}).get("scanned_at", stale_before) <= stale_before for partition in owned):
+                snapshots = await self._scan(owned, now)
+        grouped: dict[str, list[dict]] = {}
+        tokens: dict[str, str] = {}
+        for partition in owned:
+            snapshot = snapshots.get(partition) or {}
+            for user_id, positions in snapshot.get("grouped", {}).items():
+                grouped.setdefault(user_id, []).extend(positions)
+            tokens.update(snapshot.get("tokens", {}))
+        return grouped, tokens
+
+    async def _scan(self, partitions, now: float) -> dict[int, dict]:
+        """Scan active positions and split them (with their users' push tokens)
+        by ticker partition, keeping these partitions."""
+        partitions = set(partitions)
+        snapshots = {partition: {"scanned_at": now, "grouped": {}, "tokens": {}} for partition in partitions}
+        for user_id, positions in (await async_db.get_all_users_with_active_positions()).items():
+            for pos in positions:
+                partition = partition_of(pos["ticker"], self.leases.partitions) if pos.get("ticker") else None
+                if partition in partitions:
+                    snapshots[partition]["grouped"].setdefault(user_id, []).append(pos)
+        users = {user_id for snapshot in snapshots.values() for user_id in snapshot["grouped"]}
+        tokens = await async_db.get_push_tokens_for_users(users) if users else {}
+        for snapshot in snapshots.values():
+            snapshot["tokens"] = {user_id: tokens[user_id] for user_id in snapshot["grouped"] if user_id in tokens}
+        return snapshots
+
+    async def refresh_leases(self, now: float) -> None:
+        before = set(self.leases.owned)
+        await async_db.run(self.leases.refresh, now)
+        if self.leases.owned != before:
+            if self.leases.owned - before:
+                await self.rescan(now)  # load the positions of the newly held partitions
+            else:
+                await self._restore(now)
+                self._sync(now)
+
+    async def check_due(self, now: float) -> int:
+        """Fetch and evaluate the tickers that are due, then send what is ready.
+        Returns how many tickers were checked."""
+        started = time.monotonic()
+        earliest = self.scheduler.next_due()
+        due = self._held(self.scheduler.pop_due(now), now)
+        cycle = None
+        checked = 0
+        if due:
+            self.cycle_id = uuid.uuid4().hex[:12]
+            cycle = CycleMetrics(self.cycle_id, schedule_lag=now - earliest)
+            users: set[str] = set()
+            markets = await fetch_markets_for(due, cycle)
+            for start in range(0, len(due), MONITOR_CHECKPOINT_TICKERS):
+                # A long cycle can outlast the lease it started under
+                chunk = self._held(due[start:start + MONITOR_CHECKPOINT_TICKERS], now + time.monotonic() - started)
+                if not chunk:
+                    continue
+                checked += len(chunk)
+                chunk_set = set(chunk)
+                subset = {
+                    user_id: [pos for pos in positions if pos.get("ticker") in chunk_set]
+                    for user_id, positions in self.grouped.items()
+                }
+                subset = {u: p for u, p in subset.items() if p}
+                users |= subset.keys()
+                cycle.counts["positions"] += sum(len(p) for p in subset.values())
+                changes = await _evaluate(subset, markets, record=False)
+                for ticker in chunk:
+                    price = _yes_price(markets.get(ticker) or {})
+                    if price is not None:
+                        for user_id, alerts in (await self._fire_alerts(ticker, price)).items():
+                            changes.setdefault(user_id, []).extend(alerts)
+                cycle.record_changes(changes)
+                for user_id, user_changes in changes.items():
+                    self.digests.add(user_id, user_changes)
+                for ticker in chunk:
+                    self.scheduler.reschedule(ticker, markets.get(ticker), now)
+                await self._save({self._scope(ticker) for ticker in chunk}, now)
+            cycle.counts["users"] = len(users)
+            cycle.counts["tickers"] = checked
+        results = await self._deliver(now + time.monotonic() - started)
+        if cycle:
+            cycle.record_pushes(results)
+            monitor_metrics.finish(cycle, self.scheduler.snapshot(time.time()))
+        elif results:
+            monitor_metrics.record_pushes(results)
+        return checked
+
+    def _held(self, tickers: list[str], now: float) -> list[str]:
+        """The tickers this worker still holds the lease for; the others are
+        put back to try after the next lease refresh."""
+        if not self.leases:
+            return tickers
+        held = []
+        for ticker in tickers:
+            if self.leases.owns(ticker, now):
+                held.append(ticker)
+            else:
+                self.scheduler.defer(ticker, now + MONITOR_LEASE_RENEW_SECONDS)
+        return held
+
+    async def on_price(self, ticker: str, yes_price: float, now: float) -> None:
+        """Apply a price update from outside the polling schedule (e.g. a live
+        feed): fire crossed alerts and send them."""
+        if self.leases and not self.leases.owns(ticker, now):
+            return
+        changes = await self._fire_alerts(ticker, yes_price)
+        if not changes:
+            return
+        for user_id, user_changes in changes.items():
+            self.digests.add(user_id, user_changes)
+        await self._save({self._scope(ticker)}, now)
+        results = await self._deliver(now)
+        if results:
+            monitor_metrics.record_pushes(results)
+
+    async def _fire_alerts(self, ticker: str, yes_price: float) -> dict[str, list[dict]]:
+        """Take the alert rules this price crosses and clear them on their
+        positions. Returns user -> alert changes, for the alerts this call
+        cleared: one edited or already fired since the last rescan is skipped."""
+        changes: dict[str, list[dict]] = {}
+        for rule in self.alerts.crossed(ticker, yes_price):
+            pos = self.positions.get(rule.position_id)
+            if not pos or pos.get("status", "active") != "active":
+                continue
+            try:
+                cleared = await async_db.clear_position_alert(rule.position_id, rule.kind, rule.level)
+            except Exception:
+                logger.exception("Failed to clear %s alert on %s", rule.kind, rule.position_id)
+                continue
+            if not cleared:
+                logger.info("Skipping %s alert on %s: changed since the last scan", rule.kind, rule.position_id)
+                continue
+            pos["alerts"] = {k: v for k, v in (pos.get("alerts") or {}).items() if k != rule.kind}
+            side = pos.get("side", "yes")
+            price = yes_price if side == "yes" else 100 - yes_price
+            label = "take-profit" if rule.kind == "take_profit" else "stop-loss"
+            changes.setdefault(pos.get("user_id") or rule.user_id, []).append({
+                "type": "alert",
+                "ticker": ticker,
+                "kind": rule.kind,
+                "line": f"{ticker} {side.upper()} {label} {_format_cents(rule.level)} hit at {_format_cents(price)}",
+            })
+        return changes
+
+    async def _deliver(self, now: float) -> list[bool]:
+        """Record progress for buffered settlements and push the digests that
+        may go out (settlements right away, moves after the cooldown). Returns
+        whether each push was accepted.
+
+        Notifications for tickers whose lease has lapsed stay buffered: if
+        another worker has taken the partition over, it sends them from the
+        checkpoint, and this worker drops them at its next lease refresh."""
+        lapsed: set[str] = set()
+        if self.leases:
+            buffered = {t for by_ticker in self.digests.pending.values() for t in by_ticker}
+            buffered |= {entry[0] for entries in self.digests.events.values() for entry in entries}
+            lapsed = {ticker for ticker in buffered if not self.leases.owns(ticker, now)}
+        withheld = self.digests.for_tickers(lapsed)
+        self.digests.drop(lapsed)
+        taken: list[tuple[str, str | None, list[list], dict[str, float]]] = []
+        touched: set[str] = set()
+        for user_id in set(self.digests.events) | set(self.digests.pending):
+            events = self.digests.events.pop(user_id, [])
+            token = self.tokens.get(user_id)
+            if token:
+                moves = self.digests.take(user_id, now, force=bool(events))
+            else:
+                moves = self.digests.pending.pop(user_id, {})
+            touched |= {entry[0] for entry in events} | set(moves)
+            taken.append((user_id, token, events, moves))
+        self.digests.merge(*withheld, {})
+        if not touched:
+            return []
+        # Off the checkpoint first: a crash from here on drops these rather than
+        # repeating them. What couldn't be taken off its checkpoint isn't sent.
+        saved = await self._save({self._scope(ticker) for ticker in touched}, now)
+        tallies: dict[str, tuple[int, int]] = {}
+        digests: list[tuple[str, str, list[str], list[str], list[str]]] = []
+        for user_id, token, events, moves in taken:
+            kept_moves = {t: d for t, d in moves.items() if self._scope(t) not in saved}
+            kept_events = [entry for entry in events if self._scope(entry[0]) not in saved]
+            if kept_moves or kept_events:
+                # Retried on the next delivery, or dropped if the partition has moved on
+                self.digests.merge({user_id: kept_moves} if kept_moves else {},
+                                   {user_id: kept_events} if kept_events else {}, {})
+            events = [entry for entry in events if self._scope(entry[0]) in saved]
+            moves = {t: d for t, d in moves.items() if self._scope(t) in saved}
+            settled = [entry for entry in events if entry[2] != "alert"]
+            if settled:
+                tallies[user_id] = (len(settled), sum(1 for entry in settled if entry[2] == "won"))
+            if token and (events or moves):
+                digests.append((user_id, token, [entry[1] for entry in settled],
+                                [f"{ticker} {_format_delta(delta)}" for ticker, delta in moves.items()],
+                                [entry[1] for entry in events if entry[2] == "alert"]))
+                self.digests.sent(user_id, now)
+        await _record_settlements(tallies)
+        futures = [_send_digest(*digest) for digest in digests]
+        await push_dispatcher.flush()
+        return _push_results(futures)
+
+    # ── Checkpoints ──
+
+    def _scope(self, ticker: str) -> str:
+        return str(partition_of(ticker, self.leases.partitions)) if self.leases else "all"
+
+    def _owned_scopes(self) -> set[str]:
+        return {str(partition) for partition in self.leases.owned} if self.leases else {"all"}
+
+    def _scope_tickers(self, scopes: set[str]) -> set[str]:
+        """Tracked or buffered tickers that fall in these scopes."""
+        tickers = set(self.scheduler.tickers())
+        tickers |= {ticker for by_ticker in self.digests.pending.values() for ticker in by_ticker}
+        tickers |= {entry[0] for entries in self.digests.events.values() for entry in entries}
+        return {ticker for ticker in tickers if self._scope(ticker) in scopes}
+
+    def _scope_state(self, scope: str) -> dict:
+        tickers = self._scope_tickers({scope})
+        schedule = self.scheduler.export(tickers)
+        moves, events = self.digests.for_tickers(tickers)
+        return {
+            "cycle": self.cycle_id,
+            "remaining": sorted(ticker for ticker, entry in schedule.items() if entry[0] is None),
+            "schedule": schedule,
+            "moves": moves,
+            "events": events,
+            "last_sent": {u: at for u, at in self.digests.last_sent.items() if u in moves or u in events},
+        }
+
+    async def _save(self, scopes: set[str], now: float) -> set[str]:
+        """Write these scopes' checkpoints. Returns the scopes written: only
+        ones whose lease this worker still holds, each write fenced on the
+        lease record so a worker that has lost it can't overwrite the new
+        owner's checkpoint."""
+        if not self.checkpoints:
+            return scopes
+        if self.leases:
+            scopes = {scope for scope in scopes if self.leases.holds(int(scope), now)}
+        scopes = sorted(scopes)
+        expires_at = now + MONITOR_CHECKPOINT_TTL_SECONDS
+        results = await asyncio.gather(
+            *(async_db.put_monitor_checkpoint(f"checkpoint#{scope}", self._scope_state(scope), expires_at,
+                                              **self._fence(scope, now))
+              for scope in scopes),
+            return_exceptions=True,
+        )
+        saved = set()
+        for scope, result in zip(scopes, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to save monitor checkpoint %s: %s", scope, result)
+            elif result is False:
+                logger.warning("Monitor checkpoint %s not saved: partition lease has moved on", scope)
+            else:
+                saved.add(scope)
+        return saved
+
+    def _fence(self, scope: str, now: float) -> dict:
+        if not self.leases:
+            return {}
+        return {"lease": partition_lease(int(scope)), "owner": self.leases.owner, "now": now}
+
+    async def _restore(self, now: float) -> None:
+        """Load checkpoints of newly owned scopes; forget state of lost ones."""
+        if not self.checkpoints:
+            return
+        owned = self._owned_scopes()
+        lost = self.restored - owned
+        if lost:
+            self.digests.drop(self._scope_tickers(lost))
+            self.restored -= lost
+        for scope in sorted(owned - self.restored):
+            state = await async_db.get_monitor_checkpoint(f"checkpoint#{scope}")
+            self.restored.add(scope)
+            if not state:
+                continue
+            self.scheduler.restore(state.get("schedule", {}), now)
+            self.digests.merge(state.get("moves", {}), state.get("events", {}), state.get("last_sent", {}))
+            if state.get("remaining") or state.get("moves") or state.get("events"):
+                logger.info("Resuming monitor checkpoint %s (cycle %s): %d tickers unfinished, %d users with "
+                            "pending notifications", scope, state.get("cycle"), len(state.get("remaining", [])),
+                            len(state.get("moves", {}).keys() | state.get("events", {}).keys()))
+
+    def sleep_for(self, now: float) -> float:
+        wake = self.scanned_at + MONITOR_RESCAN_SECONDS
+        if self.leases:
+            wake = min(wake, self.leases.refreshed_at + MONITOR_LEASE_RENEW_SECONDS)
+        next_due = self.scheduler.next_due()
+        if next_due is not None:
+            wake = min(wake, next_due)
+        return max(1.0, wake - now)
 
 
 async def monitor_positions_loop():
-    """Main entry point — runs forever, checking every MONITOR_INTERVAL_SECONDS."""
-    logger.info("Position monitor started (interval=%ds)", MONITOR_INTERVAL_SECONDS)
-    while True:
-        try:
-            await _monitor_once()
-        except Exception:
-            logger.exception("Position monitor cycle failed")
-        await asyncio.sleep(MONITOR_INTERVAL_SECONDS)
+    """Main entry point — runs forever, checking each ticker when it is due."""
+    logger.info("Position monitor started (base interval=%ds, rescan=%ds, leases=%s)",
+                MONITOR_INTERVAL_SECONDS, MONITOR_RESCAN_SECONDS, MONITOR_LEASES)
+    monitor = PositionMonitor(PartitionLeases() if MONITOR_LEASES else None, checkpoints=MONITOR_CHECKPOINTS)
+    try:
+        while True:
+            now = time.time()
+            if monitor.leases and now - monitor.leases.refreshed_at >= MONITOR_LEASE_RENEW_SECONDS:
+                try:
+                    await monitor.refresh_leases(now)
+                except Exception:
+                    logger.exception("Failed to refresh monitor leases")
+                    monitor.leases.refreshed_at = now
+            try:
+                if now - monitor.scanned_at >= MONITOR_RESCAN_SECONDS:
+                    await monitor.rescan(now)
+                await monitor.check_due(now)  # logs a "Monitor cycle" line when it checks anything
+            except Exception:
+                logger.exception("Position monitor cycle failed")
+                monitor.scanned_at = now  # retry the scan after MONITOR_RESCAN_SECONDS, not in a tight loop
+            await asyncio.sleep(monitor.sleep_for(time.time()))
+    finally:
+        if monitor.leases:
+            # Hand partitions over now instead of after the lease TTL
+            try:
+                await async_db.run(monitor.leases.release_all)
+            except Exception:
+                logger.exception("Failed to release monitor leases")
@@ -1,17 +1,365 @@
-"""Append-only JSONL log for prediction analyses."""
+"""Append-only JSONL log for prediction analyses.
 
+log_prediction only enqueues; a background writer thread drains the queue,
+writes lines in batches with one flush + fsync per batch, and rotates the live
+file when it passes PREDICTION_LOG_MAX_BYTES or the UTC date changes. Rotated
+files are gzipped as
+
+  {stem}.{YYYYmmddTHHMMSSffffff}.jsonl.gz
+
+and only the newest PREDICTION_LOG_KEEP_FILES are kept. If the queue is full,
+entries are dropped (and counted) rather than blocking the caller. Queue depth
+and writer counters are on GET /debug/prediction-log.
+
+Every log file has a sidecar index ({stem}.jsonl.idx, one JSON array per log
+line) of where each line is and its prediction_id, model, hour and status:
+
+  live file     [offset, length, prediction_id, model, hour, status]
+  rotated file  [offset, length, prediction_id, model, hour, status, block, block_size]
+
+Rotated files are compressed as a series of independent gzip members of about
+INDEX_BLOCK_BYTES each (still a valid .gz), so a line can be read by
+decompressing only its block; offset is then relative to the block. See
+backend.log_query for the reader.
+
+Several processes (uvicorn workers) may append to the same path. Each batch is
+written, and rotation done, under an exclusive flock on {path}.lock; a writer
+that finds the path now points at a different file (another process rotated
+it) reopens before writing, so no lines go to a file that is being rotated.
+"""
+
+import fcntl
+import gzip
 import json
+import logging
 import os
+import queue
+import threading
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
 LOG_PATH = os.environ.get("PREDICTION_LOG_PATH", os.path.join(os.path.dirname(__file__), "prediction_log.jsonl"))
+PREDICTION_LOG_MAX_BYTES = int(os.environ.get("PREDICTION_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+PREDICTION_LOG_KEEP_FILES = int(os.environ.get("PREDICTION_LOG_KEEP_FILES", "14"))
+PREDICTION_LOG_QUEUE_SIZE = int(os.environ.get("PREDICTION_LOG_QUEUE_SIZE", "10000"))
+BATCH_MAX_LINES = 500
+BATCH_MAX_WAIT = 0.2  # seconds to keep collecting after the first line of a batch
+INDEX_BLOCK_BYTES = 64 * 1024  # uncompressed bytes per gzip member in rotated files
+
+
+def _rotated_prefix(path: str) -> str:
+    base = path[: -len(".jsonl")] if path.endswith(".jsonl") else path
+    return base + "."
+
+
+def _rotated_files(path: str) -> list[str]:
+    directory = os.path.dirname(path) or "."
+    if not os.path.isdir(directory):
+        return []
+    prefix = os.path.basename(_rotated_prefix(path))
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith(".jsonl.gz")
+    )
+
+
+def log_segments(path: str | None = None) -> list[str]:
+    """Rotated (gzipped) log files oldest first, then the live file if present."""
+    path = path or LOG_PATH
+    return _rotated_files(path) + ([path] if os.path.exists(path) else [])
+
+
+def open_segment(path: str):
+    """Open a log segment for binary line reads, decompressing rotated files."""
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def index_path(segment: str) -> str:
+    """Sidecar index path for a live or rotated log file."""
+    return (segment[: -len(".gz")] if segment.endswith(".gz") else segment) + ".idx"
+
+
+def index_fields(line: bytes | str) -> list:
+    """[prediction_id, model, hour, status] of one log line."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return [None, None, None, None]
+    return [entry.get("prediction_id"), entry.get("model"), (entry.get("logged_at") or "")[:13] or None,
+            entry.get("status")]
+
+
+def _build_index(path: str) -> None:
+    """Index an existing live file that has no (or a stale) sidecar."""
+    offset = 0
+    with open(path, "rb") as f, open(index_path(path), "w") as out:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            out.write(json.dumps([offset, len(line), *index_fields(line)]) + "\n")
+            offset += len(line)
+
+
+def _compress_blocks(src: str, dst: str) -> None:
+    """Write src as independent gzip members to dst and translate src's index
+    into block-relative entries in dst's index."""
+    blocks = []  # (uncompressed start, member offset, member size)
+    raw_start = 0
+    with open(src, "rb") as f, open(dst, "wb") as out:
+        while lines := f.readlines(INDEX_BLOCK_BYTES):
+            raw = b"".join(lines)
+            member = gzip.compress(raw, mtime=0)
+            blocks.append((raw_start, out.tell(), len(member)))
+            out.write(member)
+            raw_start += len(raw)
+    if not os.path.exists(index_path(src)):
+        return
+    starts = [block[0] for block in blocks]
+    # src and dst share an index path (x.jsonl / x.jsonl.gz), so write beside it
+    tmp = index_path(dst) + ".tmp"
+    with open(index_path(src)) as f, open(tmp, "w") as out:
+        for line in f:
+            offset, length, *fields = json.loads(line)
+            block_start, member_offset, member_size = blocks[bisect_right(starts, offset) - 1]
+            out.write(json.dumps([offset - block_start, length, *fields, member_offset, member_size]) + "\n")
+    os.replace(tmp, index_path(dst))
+
+
+class PredictionLogWriter:
+    def __init__(self, path: str, max_bytes: int = PREDICTION_LOG_MAX_BYTES,
+                 keep_files: int = PREDICTION_LOG_KEEP_FILES, queue_size: int = PREDICTION_LOG_QUEUE_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep_files = keep_files
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._file = None
+        self._index = None
+        self._lock_file = None
+        self._opened_on = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+
+    # ── Producer side ──
+
+    def write(self, line: str) -> bool:
+        """Enqueue one line without blocking. Returns False if it was dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(line)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Prediction log queue full; %d entries dropped", self.dropped)
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything enqueued so far is on disk."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("Prediction log queue still full at shutdown; unwritten entries lost")
+            return
+        thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+                self._thread.start()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "errors": self.errors,
+        }
+
+    # ── Writer thread ──
+
+    def _next_batch(self) -> list:
+        """Up to BATCH_MAX_LINES queued items, ending early at a flush event or
+        the stop sentinel (None)."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + BATCH_MAX_WAIT
+        while len(batch) < BATCH_MAX_LINES and not isinstance(batch[-1], threading.Event) and batch[-1] is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            lines = [item for item in batch if isinstance(item, str)]
+            if lines:
+                try:
+                    self._write_lines(lines)
+                except Exception:
+                    self.errors += 1
+                    logger.exception("Failed to write %d prediction log lines", len(lines))
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if batch[-1] is None:
+                self._close()
+                if self._lock_file is not None:
+                    self._lock_file.close()
+                    self._lock_file = None
+                return
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive across processes writing this path."""
+        if self._lock_file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._lock_file = open(self.path + ".lock", "a")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _moved(self) -> bool:
+        """Whether another process rotated the file this one has open."""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _write_lines(self, lines: list[str]) -> None:
+        today = datetime.now(timezone.utc).date()
+        rotated = None
+        with self._locked():
+            if self._file is not None and self._moved():
+                self._close()
+            if self._file is None:
+                self._open()
+            # Other processes append too, so the end of file is only known under the lock
+            self._file.seek(0, os.SEEK_END)
+            if self._opened_on != today or self._file.tell() >= self.max_bytes:
+                rotated = self._rotate()
+            offset = self._file.tell()
+            data, entries = [], []
+            for line in lines:
+                encoded = line.encode("utf-8")
+                data.append(encoded)
+                entries.append(json.dumps([offset, len(encoded), *index_fields(encoded)]) + "\n")
+                offset += len(encoded)
+            self._file.write(b"".join(data))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            # Index after the data it points at is durable
+            self._index.write("".join(entries))
+            self._index.flush()
+            os.fsync(self._index.fileno())
+        if rotated:
+            self._compress(rotated)
+        self.written += len(lines)
+        self.batches += 1
+
+    def _open(self) -> None:
+        if os.path.exists(self.path) and not os.path.exists(index_path(self.path)):
+            _build_index(self.path)
+        self._file = open(self.path, "ab")
+        self._index = open(index_path(self.path), "a")
+        if self._file.tell():
+            mtime = os.path.getmtime(self.path)
+            self._opened_on = datetime.fromtimestamp(mtime, timezone.utc).date()
+        else:
+            self._opened_on = datetime.now(timezone.utc).date()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+            self._file = self._index = None
+
+    def _rotate(self) -> str | None:
+        """Move the live file aside (under the lock) and reopen. Returns the
+        moved file, for _compress once the lock is released."""
+        if self._file.tell() == 0:
+            self._opened_on = datetime.now(timezone.utc).date()
+            return None
+        self._close()
+        # Microseconds keep names unique and lexically ordered by rotation time
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        rotated = f"{_rotated_prefix(self.path)}{stamp}.jsonl"
+        os.rename(self.path, rotated)
+        if os.path.exists(index_path(self.path)):
+            os.rename(index_path(self.path), index_path(rotated))
+        self._open()
+        self.rotations += 1
+        return rotated
+
+    def _compress(self, rotated: str) -> None:
+        _compress_blocks(rotated, rotated + ".gz")
+        os.remove(rotated)
+        rotated_files = _rotated_files(self.path)
+        for old in rotated_files[: max(0, len(rotated_files) - self.keep_files)]:
+            # Another process may be pruning the same files
+            for name in (old, index_path(old)):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+
+
+_writer = PredictionLogWriter(LOG_PATH)
 
 
 def log_prediction(data: dict) -> None:
-    """Append one JSON line to the prediction log file.
+    """Queue one JSON line for the prediction log file.
 
-    Adds a `logged_at` timestamp automatically.
+    Adds a `logged_at` timestamp automatically. Never blocks.
     """
     entry = {**data, "logged_at": datetime.now(timezone.utc).isoformat()}
-    with open(LOG_PATH, "a") as f:
-        f.write(json.dumps(entry, default=str) + "\n")
+    _writer.write(json.dumps(entry, default=str) + "\n")
+
+
+def flush(timeout: float = 5.0) -> bool:
+    return _writer.flush(timeout)
+
+
+def stop() -> None:
+    _writer.stop()
+
+
+def writer_stats() -> dict:
+    return _writer.stats()
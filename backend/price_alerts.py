@@ -0,0 +1,145 @@
+"""Per-ticker index of user price alerts on tracked positions.
+
+A position can carry `alerts: {"take_profit": 70, "stop_loss": 30}`, levels of
+its own side's price in cents. Each level becomes a rule in YES-price terms,
+kept in one of two sorted lists per ticker:
+
+  above  fires when the YES price reaches the threshold or higher
+  below  fires when the YES price reaches the threshold or lower
+
+A YES take-profit at 70¢ is "above 70"; a NO take-profit at 70¢ (NO price at
+least 70) is "below 30". A price update then finds every crossed rule with one
+bisect per list, O(log n + k), whatever it comes from (the monitor's polling
+or a live feed). Alerts fire once: crossed rules leave the index, and the
+caller clears them on the position.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+
+ALERT_KINDS = ("take_profit", "stop_loss")
+
+
+class AlertRule(NamedTuple):
+    position_id: str
+    user_id: str
+    ticker: str
+    kind: str  # "take_profit" or "stop_loss"
+    level: float  # cents, in the position's side price
+    threshold: float  # cents, in YES price
+    direction: str  # "above" or "below"
+
+
+def rules_for(position: dict) -> list[AlertRule]:
+    """Alert rules of an active position."""
+    alerts = position.get("alerts") or {}
+    if position.get("status", "active") != "active" or not position.get("ticker"):
+        return []
+    side = position.get("side", "yes")
+    rules = []
+    for kind in ALERT_KINDS:
+        level = alerts.get(kind)
+        if level is None:
+            continue
+        level = float(level)
+        # Take-profit wants the side's price up: YES price up for YES, down for NO
+        rising = (kind == "take_profit") == (side == "yes")
+        rules.append(AlertRule(
+            position["position_id"], position.get("user_id"), position["ticker"], kind, level,
+            level if side == "yes" else 100 - level, "above" if rising else "below",
+        ))
+    return rules
+
+
+class _SortedRules:
+    """Rules sorted by threshold (parallel lists, so bisect works on floats)."""
+
+    def __init__(self, rules: list[AlertRule] = ()):
+        rules = sorted(rules, key=lambda rule: rule.threshold)
+        self.thresholds = [rule.threshold for rule in rules]
+        self.rules = rules
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def insert(self, rule: AlertRule) -> None:
+        i = bisect_right(self.thresholds, rule.threshold)
+        self.thresholds.insert(i, rule.threshold)
+        self.rules.insert(i, rule)
+
+    def remove(self, rule: AlertRule) -> None:
+        lo = bisect_left(self.thresholds, rule.threshold)
+        hi = bisect_right(self.thresholds, rule.threshold)
+        for i in range(lo, hi):
+            if self.rules[i] == rule:
+                del self.thresholds[i]
+                del self.rules[i]
+                return
+
+    def take_at_most(self, price: float) -> list[AlertRule]:
+        i = bisect_right(self.thresholds, price)
+        taken = self.rules[:i]
+        del self.thresholds[:i], self.rules[:i]
+        return taken
+
+    def take_at_least(self, price: float) -> list[AlertRule]:
+        i = bisect_left(self.thresholds, price)
+        taken = self.rules[i:]
+        del self.thresholds[i:], self.rules[i:]
+        return taken
+
+
+class AlertIndex:
+    def __init__(self):
+        self._above: dict[str, _SortedRules] = {}
+        self._below: dict[str, _SortedRules] = {}
+        self._by_position: dict[str, list[AlertRule]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(rules) for rules in self._by_position.values())
+
+    def _lists(self, rule: AlertRule) -> dict[str, _SortedRules]:
+        return self._above if rule.direction == "above" else self._below
+
+    def sync(self, positions) -> None:
+        """Rebuild from scratch from these positions."""
+        by_ticker: dict[tuple[str, str], list[AlertRule]] = {}
+        self._by_position = {}
+        for position in positions:
+            rules = rules_for(position)
+            if rules:
+                self._by_position[position["position_id"]] = rules
+            for rule in rules:
+                by_ticker.setdefault((rule.direction, rule.ticker), []).append(rule)
+        self._above = {t: _SortedRules(r) for (d, t), r in by_ticker.items() if d == "above"}
+        self._below = {t: _SortedRules(r) for (d, t), r in by_ticker.items() if d == "below"}
+
+    def set_position(self, position: dict) -> None:
+        """Replace one position's rules (after its alerts are edited)."""
+        self.remove_position(position["position_id"])
+        rules = rules_for(position)
+        if rules:
+            self._by_position[position["position_id"]] = rules
+        for rule in rules:
+            self._lists(rule).setdefault(rule.ticker, _SortedRules()).insert(rule)
+
+    def remove_position(self, position_id: str) -> None:
+        for rule in self._by_position.pop(position_id, []):
+            rules = self._lists(rule).get(rule.ticker)
+            if rules is not None:
+                rules.remove(rule)
+
+    def crossed(self, ticker: str, yes_price: float) -> list[AlertRule]:
+        """Rules this YES price crosses, removed from the index."""
+        fired = []
+        if ticker in self._above:
+            fired += self._above[ticker].take_at_most(yes_price)
+        if ticker in self._below:
+            fired += self._below[ticker].take_at_least(yes_price)
+        for rule in fired:
+            remaining = [r for r in self._by_position.get(rule.position_id, []) if r != rule]
+            if remaining:
+                self._by_position[rule.position_id] = remaining
+            else:
+                self._by_position.pop(rule.position_id, None)
+        return fired
@@ -184,6 +184,12 @@ class PushTokenRegister(BaseModel):
     expo_push_token: str
 
 
+class PositionAlerts(BaseModel):
+    # Levels of the position's own side price, in cents
+    take_profit: Optional[float] = None
+    stop_loss: Optional[float] = None
+
+
 class TrackedPositionCreate(BaseModel):
     user_id: str
     prediction_id: Optional[str] = None
@@ -194,6 +200,7 @@ class TrackedPositionCreate(BaseModel):
     model: Optional[str] = None
     confidence: Optional[float] = None
     image_key: Optional[str] = None
+    alerts: Optional[PositionAlerts] = None
 
 
 class MarketSnapshotAtEntry(BaseModel):
@@ -233,6 +240,7 @@ class TrackedPosition(BaseModel):
     realized_pnl: Optional[float] = None
     settled_at: Optional[str] = None
     market_snapshot_at_entry: Optional[MarketSnapshotAtEntry] = None
+    alerts: Optional[PositionAlerts] = None
     created_at: str
     updated_at: Optional[str] = None
 
@@ -1,43 +1,59 @@
 import asyncio
 import logging
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
 
+from backend import async_db
+from backend.archival import get_archived, get_archived_by_user
+from backend.bot_engine import (
+    derive_strategy,
+    generate_signals,
+    get_or_create_progress,
+    record_check_in,
+    record_position_removed,
+    record_settlement,
+    repair_progress,
+    sync_milestones,
+    track_position,
+)
 from backend.db import (
-    append_analysis_log,
+    PREDICTION_SUMMARY_FIELDS,
+    TRACKED_POSITION_SUMMARY_FIELDS,
     delete_integration,
     delete_tracked_position,
     get_integrations_by_user,
-    update_integration_email,
     get_prediction,
     get_predictions_by_user,
     get_presigned_url,
     get_tracked_position,
     get_tracked_positions_by_user,
+    project_item,
     put_integration,
-    put_prediction,
-    put_tracked_position,
     set_push_token_for_user,
+    settle_tracked_position,
+    update_integration_email,
     update_prediction,
     update_tracked_position,
-    upload_image,
 )
-from backend.bot_engine import (
-    derive_strategy,
-    generate_signals,
-    get_or_create_progress,
-    record_check_in,
-    record_position_tracked,
+from backend.dedup import find_reusable_recommendation, remember_recommendation
+from backend.kalshi_api import (
+    enrich_prediction,
+    fetch_event,
+    fetch_events,
+    fetch_market,
+    fetch_markets,
+    match_market,
 )
-from backend.kalshi_api import enrich_prediction, fetch_event, fetch_events, fetch_market, fetch_markets, match_market
+from backend.loop_monitor import loop_lag
 from backend.models import get_model, list_models
 from backend.notifications import (
-    send_email,
-    send_push,
     _format_prediction_email,
     _format_trade_accepted_email,
+    push_dispatcher,
+    send_email,
+    send_push,
 )
 from backend.prediction_log import log_prediction
 from backend.pydantic_models import (
@@ -47,11 +63,12 @@ from backend.pydantic_models import (
     InputResponse,
     Integration,
     IntegrationConnect,
-    NotificationEmailUpdate,
     KalshiFill,
     KalshiPosition,
     ModelInfo,
+    NotificationEmailUpdate,
     OutputRequest,
+    PositionAlerts,
     Prediction,
     PredictionUpdate,
     PushTokenRegister,
@@ -59,6 +76,8 @@ from backend.pydantic_models import (
     TrackedPositionCreate,
     UserProgress,
 )
+from backend.snapshot_recorder import get_market_history
+from backend.uploads import store_upload
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +95,7 @@ def root():
 def _get_fernet():
     """Get Fernet cipher for encrypting/decrypting credentials."""
     import os
+
     from cryptography.fernet import Fernet
 
     key = os.environ.get("ENCRYPTION_KEY")
@@ -316,6 +336,25 @@ def list_markets(
     ]
 
 
+@router.get("/markets/{ticker}/history")
+def market_history(
+    ticker: str,
+    start: datetime | None = Query(None, description="ISO timestamp; defaults to 24h before end"),
+    end: datetime | None = Query(None, description="ISO timestamp; defaults to now"),
+    resolution: str = Query("auto", pattern="^(auto|raw|1h)$"),
+):
+    """Recorded price/volume/open-interest history for a market, for charts and backtests."""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=24)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return get_market_history(ticker, start, end, resolution)
+
+
 _MARKET_ANALYSIS_PROMPT = """\
 You are a Kalshi prediction market strategist. Given live market data, output a trading recommendation.
 
@@ -444,45 +483,84 @@ def list_models_endpoint():
 # ── Predictions: Pipeline ──
 
 
+async def _get_recommendation(
+    prediction_id: str,
+    runner,
+    model_name: str,
+    image_key: str,
+    context: str | None,
+    image_sha256: str | None = None,
+    image_dhash: int | None = None,
+) -> tuple[dict, bool]:
+    """Model recommendation matched to a real Kalshi market.
+
+    Reuses a recent recommendation for the same (or a near-duplicate) image when
+    the model allows it. Returns (recommendation, reused).
+    """
+    loop = asyncio.get_event_loop()
+    if image_sha256:
+        try:
+            reused = await loop.run_in_executor(
+                None, find_reusable_recommendation, runner, model_name, context, image_sha256, image_dhash,
+            )
+            if reused:
+                return reused, True
+        except Exception:
+            logger.exception("Recommendation reuse lookup failed for %s", prediction_id)
+
+    # Run model (blocking call in thread pool to not block event loop)
+    recommendation = await loop.run_in_executor(None, runner.run, image_key, context)
+
+    # Match extracted ticker to a real Kalshi market
+    ticker = recommendation.get("ticker")
+    title = recommendation.get("title")
+    search_kw = recommendation.get("search_keywords")
+    try:
+        matched = await loop.run_in_executor(
+            None, match_market, ticker, title, search_kw,
+        )
+        if matched:
+            real_ticker = matched.get("ticker")
+            if real_ticker and real_ticker != ticker:
+                recommendation["original_ticker"] = ticker
+                recommendation["ticker"] = real_ticker
+            if matched.get("title") and not recommendation.get("title"):
+                recommendation["title"] = matched.get("title")
+    except Exception:
+        logger.exception("Market matching failed for %s", prediction_id)
+
+    if image_sha256:
+        try:
+            await async_db.run(remember_recommendation, runner, model_name, context, image_sha256, recommendation)
+        except Exception:
+            logger.exception("Failed to store recommendation for reuse (%s)", prediction_id)
+    return recommendation, False
+
+
 async def _run_model_background(
     prediction_id: str,
     model_name: str,
     image_key: str,
     context: str | None,
     expo_push_token: str | None,
+    image_sha256: str | None = None,
+    image_dhash: int | None = None,
 ):
     """Run model in background, update DB, and optionally send push notification."""
     try:
-        runner = get_model(model_name)
+        runner = await async_db.run(get_model, model_name)
         if not runner:
-            update_prediction(prediction_id, {
+            await async_db.update_prediction(prediction_id, {
                 "status": "failed",
                 "completed_at": datetime.now(timezone.utc).isoformat(),
             })
             return
 
-        # Run model (blocking call in thread pool to not block event loop)
         loop = asyncio.get_event_loop()
-        recommendation = await loop.run_in_executor(None, runner.run, image_key, context)
-
-        # Match extracted ticker to a real Kalshi market
+        recommendation, reused = await _get_recommendation(
+            prediction_id, runner, model_name, image_key, context, image_sha256, image_dhash,
+        )
         ticker = recommendation.get("ticker")
-        title = recommendation.get("title")
-        search_kw = recommendation.get("search_keywords")
-        try:
-            matched = await loop.run_in_executor(
-                None, match_market, ticker, title, search_kw,
-            )
-            if matched:
-                real_ticker = matched.get("ticker")
-                if real_ticker and real_ticker != ticker:
-                    recommendation["original_ticker"] = ticker
-                    recommendation["ticker"] = real_ticker
-                if matched.get("title") and not recommendation.get("title"):
-                    recommendation["title"] = matched.get("title")
-                ticker = recommendation["ticker"]
-        except Exception:
-            logger.exception("Market matching failed for %s", prediction_id)
 
         # Enrich with live Kalshi market data
         market_data = None
@@ -500,17 +578,18 @@ async def _run_model_background(
         }
         if market_data:
             updates["market_data"] = market_data
-        update_prediction(prediction_id, updates)
+        await async_db.update_prediction(prediction_id, updates)
 
         # Log the analysis (S3)
         try:
-            append_analysis_log({
+            await async_db.append_analysis_log({
                 "prediction_id": prediction_id,
                 "model": model_name,
                 "image_key": image_key,
                 "context": context,
                 "recommendation": recommendation,
                 "market_data": market_data,
+                "reused": reused,
                 "completed_at": completed_at,
             })
         except Exception:
@@ -546,9 +625,9 @@ async def _run_model_background(
 
         # Send email notification
         try:
-            pred = get_prediction(prediction_id)
+            pred = await async_db.get_prediction(prediction_id)
             if pred:
-                user_email = _get_user_email(pred.get("user_id", ""))
+                user_email = await async_db.run(_get_user_email, pred.get("user_id", ""))
                 if user_email:
                     subj, text, html = _format_prediction_email(pred)
                     await send_email(user_email, subj, text, html)
@@ -557,7 +636,7 @@ async def _run_model_background(
     except Exception as exc:
         logger.exception("Background model run failed for prediction %s: %s", prediction_id, exc)
         failed_at = datetime.now(timezone.utc).isoformat()
-        update_prediction(prediction_id, {
+        await async_db.update_prediction(prediction_id, {
             "status": "failed",
             "error_message": str(exc)[:500],
             "completed_at": failed_at,
@@ -584,11 +663,8 @@ async def predict_input(
     prediction_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
 
-    contents = await image.read()
-    ext = image.filename.rsplit(".", 1)[-1] if image.filename else "jpg"
-    content_type = "image/png" if ext == "png" else "image/jpeg"
-    image_key = f"predictions/{prediction_id}/{image.filename or 'photo.jpg'}"
-    upload_image(contents, image_key, content_type)
+    stored = await store_upload(image)
+    image_key = stored.key
     image_url = get_presigned_url(image_key)
 
     prediction = {
@@ -596,12 +672,14 @@ async def predict_input(
         "user_id": user_id,
         "image_key": image_key,
         "image_url": image_url,
+        "image_sha256": stored.sha256,
+        "image_dhash": f"{stored.dhash:016x}" if stored.dhash is not None else None,
         "context": context,
         "model": "",
         "status": "uploaded",
         "created_at": now,
     }
-    put_prediction(prediction)
+    await async_db.put_prediction(prediction)
 
     return {"prediction_id": prediction_id, "image_key": image_key, "image_url": image_url}
 
@@ -609,46 +687,34 @@ async def predict_input(
 @router.post("/predict/output", response_model=Prediction)
 async def predict_output(req: OutputRequest):
     """Step 2: Run model on an existing prediction, return result."""
-    prediction = get_prediction(req.prediction_id)
+    prediction = await async_db.get_prediction(req.prediction_id)
     if not prediction:
         raise HTTPException(status_code=404, detail="Prediction not found")
 
-    runner = get_model(req.model)
+    runner = await async_db.run(get_model, req.model)
     if not runner:
-        available = [m["name"] for m in list_models()]
+        available = [m["name"] for m in await async_db.run(list_models)]
         raise HTTPException(
             status_code=400,
             detail=f"Unknown model '{req.model}'. Available: {available}",
         )
 
     # Update model name
-    update_prediction(req.prediction_id, {"model": req.model, "status": "processing"})
-
-    # Run model
-    recommendation = runner.run(prediction["image_key"], prediction.get("context"))
+    await async_db.update_prediction(req.prediction_id, {"model": req.model, "status": "processing"})
 
-    # Match extracted ticker to a real Kalshi market
+    loop = asyncio.get_event_loop()
+    image_dhash = prediction.get("image_dhash")
+    recommendation, reused = await _get_recommendation(
+        req.prediction_id, runner, req.model, prediction["image_key"], prediction.get("context"),
+        prediction.get("image_sha256"), int(image_dhash, 16) if image_dhash else None,
+    )
     ticker = recommendation.get("ticker")
-    title = recommendation.get("title")
-    search_kw = recommendation.get("search_keywords")
-    try:
-        matched = match_market(ticker, title, search_kw)
-        if matched:
-            real_ticker = matched.get("ticker")
-            if real_ticker and real_ticker != ticker:
-                recommendation["original_ticker"] = ticker
-                recommendation["ticker"] = real_ticker
-            if matched.get("title") and not recommendation.get("title"):
-                recommendation["title"] = matched.get("title")
-            ticker = recommendation["ticker"]
-    except Exception:
-        logger.exception("Market matching failed for %s", req.prediction_id)
 
     # Enrich with live Kalshi market data
     market_data = None
     if ticker and ticker.upper() != "UNKNOWN":
         try:
-            market_data = enrich_prediction(ticker)
+            market_data = await loop.run_in_executor(None, enrich_prediction, ticker)
         except Exception:
             logger.exception("Market enrichment failed for %s", req.prediction_id)
 
@@ -660,17 +726,18 @@ async def predict_output(req: OutputRequest):
     }
     if market_data:
         updates["market_data"] = market_data
-    result = update_prediction(req.prediction_id, updates)
+    result = await async_db.update_prediction(req.prediction_id, updates)
 
     # Log the analysis (S3)
     try:
-        append_analysis_log({
+        await async_db.append_analysis_log({
             "prediction_id": req.prediction_id,
             "model": req.model,
             "image_key": prediction["image_key"],
             "context": prediction.get("context"),
             "recommendation": recommendation,
             "market_data": market_data,
+            "reused": reused,
             "completed_at": completed_at,
         })
     except Exception:
@@ -705,9 +772,9 @@ async def create_prediction(
 ):
     """Orchestrator: upload image + kick off model in background.
     Returns immediately with status='processing'. Poll GET /predictions/{id} for result."""
-    runner = get_model(model)
+    runner = await async_db.run(get_model, model)
     if not runner:
-        available = [m["name"] for m in list_models()]
+        available = [m["name"] for m in await async_db.run(list_models)]
         raise HTTPException(
             status_code=400,
             detail=f"Unknown model '{model}'. Available: {available}",
@@ -716,12 +783,9 @@ async def create_prediction(
     prediction_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
 
-    # Upload image to S3
-    contents = await image.read()
-    ext = image.filename.rsplit(".", 1)[-1] if image.filename else "jpg"
-    content_type = "image/png" if ext == "png" else "image/jpeg"
-    image_key = f"predictions/{prediction_id}/{image.filename or 'photo.jpg'}"
-    upload_image(contents, image_key, content_type)
+    # Stream image to S3
+    stored = await store_upload(image)
+    image_key = stored.key
     image_url = get_presigned_url(image_key)
 
     # Create prediction record
@@ -730,12 +794,14 @@ async def create_prediction(
         "user_id": user_id,
         "image_key": image_key,
         "image_url": image_url,
+        "image_sha256": stored.sha256,
+        "image_dhash": f"{stored.dhash:016x}" if stored.dhash is not None else None,
         "context": context,
         "model": model,
         "status": "processing",
         "created_at": now,
     }
-    put_prediction(prediction)
+    await async_db.put_prediction(prediction)
 
     # Log submission to local JSONL
     try:
@@ -754,7 +820,7 @@ async def create_prediction(
 
     # Run model in background
     asyncio.create_task(
-        _run_model_background(prediction_id, model, image_key, context, expo_push_token)
+        _run_model_background(prediction_id, model, image_key, context, expo_push_token, stored.sha256, stored.dhash)
     )
 
     return prediction
@@ -778,15 +844,39 @@ def update_prediction_endpoint(prediction_id: str, updates: PredictionUpdate):
 
 @router.get("/predictions/{prediction_id}", response_model=Prediction)
 def read_prediction(prediction_id: str):
-    item = get_prediction(prediction_id)
+    item = get_prediction(prediction_id) or get_archived("predictions", prediction_id)
     if not item:
         raise HTTPException(status_code=404, detail="Prediction not found")
     return item
 
 
+def _with_archived(items: list[dict], kind: str, user_id: str, key_attr: str, summary_fields=None) -> list[dict]:
+    """Append a user's archived items not already in items (archived items stay
+    in DynamoDB until their TTL passes)."""
+    seen = {item.get(key_attr) for item in items}
+    for item in get_archived_by_user(kind, user_id):
+        if item.get(key_attr) in seen:
+            continue
+        if summary_fields:
+            item = project_item(item, summary_fields)
+        items.append(item)
+    return items
+
+
 @router.get("/predictions", response_model=list[Prediction])
-def list_predictions(user_id: str = Query(...)):
-    return get_predictions_by_user(user_id)
+def list_predictions(
+    user_id: str = Query(...),
+    summary: bool = Query(False),
+    include_archived: bool = Query(False),
+):
+    """List a user's predictions. summary=true omits orderbooks and factor detail;
+    include_archived=true also reads predictions moved to the S3 archive."""
+    items = get_predictions_by_user(user_id, summary=summary)
+    if include_archived:
+        items = _with_archived(
+            items, "predictions", user_id, "prediction_id", PREDICTION_SUMMARY_FIELDS if summary else None
+        )
+    return items
 
 
 # ── Push Tokens ──
@@ -796,6 +886,7 @@ def list_predictions(user_id: str = Query(...)):
 def register_push_token(req: PushTokenRegister):
     """Register an Expo push token for a user."""
     set_push_token_for_user(req.user_id, req.expo_push_token)
+    push_dispatcher.token_registered(req.expo_push_token)
     return {"detail": "Push token registered"}
 
 
@@ -867,50 +958,99 @@ def _enrich_tracked_position(pos: dict) -> dict:
         pos["current_price"] = settlement_price
         pos["unrealized_pnl"] = None
 
-        # Persist settlement to DB
-        update_tracked_position(pos["position_id"], {
+        # Persist settlement to DB; only the writer that flips it out of
+        # 'active' counts it towards progress
+        settled = settle_tracked_position(pos["position_id"], {
             "status": status,
             "settlement_price": settlement_price,
             "realized_pnl": realized_pnl,
             "settled_at": now,
             "updated_at": now,
         })
+        if settled:
+            try:
+                record_settlement(pos["user_id"], won=status == "settled_win")
+            except Exception:
+                logger.exception("Failed to update progress on settlement for %s", pos["position_id"])
 
     return pos
 
 
-@router.post("/tracked-positions", response_model=TrackedPosition)
-def create_tracked_position(req: TrackedPositionCreate):
-    """Accept a prediction — create a tracked position with market context."""
-    now = datetime.now(timezone.utc).isoformat()
-    prediction_id = req.prediction_id or f"sim-{uuid.uuid4()}"
+def _capture_market_snapshot(ticker: str) -> dict | None:
+    """Market context at decision time (for bot training data)."""
+    market = fetch_market(ticker)
+    if not market:
+        return None
+    evt_ticker = market.get("event_ticker")
+    event = fetch_event(evt_ticker) if evt_ticker else None
+    return {
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "yes_bid": market.get("yes_bid"),
+        "yes_ask": market.get("yes_ask"),
+        "no_bid": market.get("no_bid"),
+        "no_ask": market.get("no_ask"),
+        "last_price": market.get("last_price"),
+        "previous_price": market.get("previous_price"),
+        "spread": (market.get("yes_ask") or 0) - (market.get("yes_bid") or 0),
+        "volume": market.get("volume"),
+        "volume_24h": market.get("volume_24h"),
+        "open_interest": market.get("open_interest"),
+        "category": event.get("category") if event else None,
+        "event_title": event.get("title") if event else None,
+        "market_status": market.get("status"),
+    }
+
 
-    # Capture market context at decision time (for bot training data)
-    market_snapshot = None
-    if req.ticker:
+async def _after_position_created(position: dict, counted: bool):
+    """Non-critical follow-up to accepting a trade, off the request path."""
+    user_id = position["user_id"]
+    loop = asyncio.get_event_loop()
+
+    if position.get("ticker"):
         try:
-            market = fetch_market(req.ticker)
-            if market:
-                evt_ticker = market.get("event_ticker")
-                event = fetch_event(evt_ticker) if evt_ticker else None
-                market_snapshot = {
-                    "captured_at": now,
-                    "yes_bid": market.get("yes_bid"),
-                    "yes_ask": market.get("yes_ask"),
-                    "no_bid": market.get("no_bid"),
-                    "no_ask": market.get("no_ask"),
-                    "last_price": market.get("last_price"),
-                    "previous_price": market.get("previous_price"),
-                    "spread": (market.get("yes_ask") or 0) - (market.get("yes_bid") or 0),
-                    "volume": market.get("volume"),
-                    "volume_24h": market.get("volume_24h"),
-                    "open_interest": market.get("open_interest"),
-                    "category": event.get("category") if event else None,
-                    "event_title": event.get("title") if event else None,
-                    "market_status": market.get("status"),
-                }
+            snapshot = await loop.run_in_executor(None, _capture_market_snapshot, position["ticker"])
+            if snapshot:
+                await async_db.update_tracked_position(
+                    position["position_id"], {"market_snapshot_at_entry": snapshot},
+                )
         except Exception:
-            logger.exception("Failed to capture market snapshot for %s", req.ticker)
+            logger.exception("Failed to capture market snapshot for %s", position["ticker"])
+
+    # Update bot milestones
+    try:
+        await async_db.run(sync_milestones if counted else repair_progress, user_id)
+    except Exception:
+        logger.exception("Failed to update progress for %s", user_id)
+
+    # Send email notification for trade accept
+    try:
+        user_email = await async_db.run(_get_user_email, user_id)
+        if user_email:
+            subj, text, html = _format_trade_accepted_email(position)
+            await send_email(user_email, subj, text, html)
+    except Exception:
+        logger.exception("Failed to send trade-accepted email for %s", user_id)
+
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-run
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> None:
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@router.post("/tracked-positions", response_model=TrackedPosition)
+async def create_tracked_position(req: TrackedPositionCreate):
+    """Accept a prediction — create a tracked position.
+
+    The position and its progress counters are written in one transaction;
+    the entry market snapshot, milestones and email follow in the background.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    prediction_id = req.prediction_id or f"sim-{uuid.uuid4()}"
 
     position = {
         "position_id": str(uuid.uuid4()),
@@ -926,39 +1066,37 @@ def create_tracked_position(req: TrackedPositionCreate):
         "status": "active",
         "created_at": now,
     }
-    if market_snapshot:
-        position["market_snapshot_at_entry"] = market_snapshot
-    put_tracked_position(position)
-
-    # Update bot milestones
-    try:
-        record_position_tracked(req.user_id)
-    except Exception:
-        logger.exception("Failed to update progress for %s", req.user_id)
-
-    # Send email notification for trade accept
-    try:
-        user_email = _get_user_email(req.user_id)
-        if user_email:
-            subj, text, html = _format_trade_accepted_email(position)
-            asyncio.get_event_loop().create_task(
-                send_email(user_email, subj, text, html)
-            )
-    except Exception:
-        logger.exception("Failed to send trade-accepted email for %s", req.user_id)
-
+    if req.alerts:
+        position["alerts"] = _validate_alerts(req.alerts)
+    counted = await async_db.run(track_position, position)
+    _spawn(_after_position_created(position, counted))
     return position
 
 
 @router.get("/tracked-positions", response_model=list[TrackedPosition])
-def list_tracked_positions(user_id: str = Query(...)):
-    """List tracked positions with live price enrichment."""
-    positions = get_tracked_positions_by_user(user_id)
+def list_tracked_positions(
+    user_id: str = Query(...),
+    summary: bool = Query(False),
+    include_archived: bool = Query(False),
+):
+    """List tracked positions with live price enrichment.
+
+    summary=true omits the entry-time market snapshot; include_archived=true
+    also reads positions moved to the S3 archive (these are never active, so
+    they are not enriched).
+    """
+    positions = get_tracked_positions_by_user(user_id, summary=summary)
 
     # Enrich active positions with live data
     for pos in positions:
         _enrich_tracked_position(pos)
 
+    if include_archived:
+        positions = _with_archived(
+            positions, "tracked_positions", user_id, "position_id",
+            TRACKED_POSITION_SUMMARY_FIELDS if summary else None,
+        )
+
     # Sort: active first (newest), then settled (newest)
     def sort_key(p):
         is_active = 0 if p.get("status") == "active" else 1
@@ -968,6 +1106,37 @@ def list_tracked_positions(user_id: str = Query(...)):
     return positions
 
 
+def _validate_alerts(alerts: PositionAlerts) -> dict:
+    levels = {k: v for k, v in alerts.model_dump().items() if v is not None}
+    if any(not 0 < level < 100 for level in levels.values()):
+        raise HTTPException(status_code=400, detail="Alert levels must be between 0 and 100 cents")
+    if len(levels) == 2 and levels["stop_loss"] >= levels["take_profit"]:
+        raise HTTPException(status_code=400, detail="stop_loss must be below take_profit")
+    return levels
+
+
+@router.patch("/tracked-positions/{position_id}/alerts", response_model=TrackedPosition)
+def set_position_alerts(position_id: str, alerts: PositionAlerts):
+    """Set take-profit / stop-loss levels (the position side's price, in cents).
+
+    Replaces the position's alerts; a missing or null level clears it. Each
+    alert pushes once when crossed; the monitor picks up changes on its next
+    active-position scan.
+    """
+    pos = get_tracked_position(position_id)
+    if not pos:
+        raise HTTPException(status_code=404, detail="Position not found")
+    if pos.get("status") != "active":
+        raise HTTPException(status_code=400, detail="Alerts can only be set on active positions")
+    updated = update_tracked_position(position_id, {
+        "alerts": _validate_alerts(alerts),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    })
+    if not updated:
+        raise HTTPException(status_code=404, detail="Position not found")
+    return updated
+
+
 @router.delete("/tracked-positions/{position_id}")
 def close_tracked_position(position_id: str):
     """Close/untrack a position."""
@@ -983,6 +1152,12 @@ def close_tracked_position(position_id: str):
         })
 
     delete_tracked_position(position_id)
+
+    # The position no longer exists, so drop what it contributed to progress
+    try:
+        record_position_removed(pos["user_id"], pos)
+    except Exception:
+        logger.exception("Failed to update progress for closed position %s", position_id)
     return {"detail": "Position closed"}
 
 
@@ -1021,39 +1196,56 @@ def get_bot_signals(user_id: str, limit: int = Query(5, ge=1, le=10)):
 
 @router.get("/debug/tables")
 def debug_tables():
-    """Return item counts and recent samples from each DynamoDB table."""
-    from backend.db import (
-        table as trading_table,
-        snapshots_table,
-        predictions_table,
-        integrations_table,
-        tracked_positions_table,
-        user_progress_table,
-        _decimals_to_floats,
-    )
+    """Return item counts and recent samples from each table."""
+    from backend.db import debug_table_summaries
 
-    def _scan_summary(tbl, sort_key: str | None = None, limit: int = 5, redact: list[str] | None = None):
-        count_resp = tbl.scan(Select="COUNT")
-        count = count_resp.get("Count", 0)
-        scan_resp = tbl.scan(Limit=limit)
-        items = _decimals_to_floats(scan_resp.get("Items", []))
-        if sort_key:
-            items.sort(key=lambda x: x.get(sort_key, ""), reverse=True)
-        if redact:
-            for item in items:
-                for key in redact:
-                    if key in item:
-                        item[key] = "***REDACTED***"
-        return {"count": count, "recent": items[:limit]}
+    return debug_table_summaries()
 
-    return {
-        "predictions": _scan_summary(predictions_table, "created_at", limit=10),
-        "trading_logs": _scan_summary(trading_table, "created_at"),
-        "market_snapshots": _scan_summary(snapshots_table, "scraped_at"),
-        "integrations": _scan_summary(integrations_table, redact=["encrypted_private_key", "api_key_id"]),
-        "tracked_positions": _scan_summary(tracked_positions_table, "created_at", limit=10),
-        "user_progress": _scan_summary(user_progress_table),
-    }
+
+@router.get("/debug/event-loop")
+def debug_event_loop():
+    """Event-loop lag since startup (or the last reset) and db executor load."""
+    return {"loop_lag": loop_lag.snapshot(), "db_executor": async_db.executor_stats()}
+
+
+@router.get("/debug/monitor")
+def debug_monitor():
+    """Position monitor cycle metrics (totals, latest and slowest recent cycles)
+    and push dispatcher counters, for this worker."""
+    from backend.monitor_metrics import monitor_metrics
+
+    return {"monitor": monitor_metrics.snapshot(), "push": push_dispatcher.stats}
+
+
+@router.get("/debug/aws")
+def debug_aws():
+    """AWS client config and per-service connection-pool saturation counters."""
+    from backend.aws import pool_stats
+
+    return pool_stats()
+
+
+@router.get("/debug/prediction-log")
+def debug_prediction_log():
+    """Prediction log writer queue depth and write/rotation counters."""
+    from backend.prediction_log import writer_stats
+
+    return writer_stats()
+
+
+@router.get("/debug/prediction-log/query")
+def debug_prediction_log_query(
+    prediction_id: str | None = Query(None),
+    model: str | None = Query(None),
+    status: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Prediction log entries matching the filters, newest first, via the log indexes."""
+    from backend.log_query import query_log
+
+    return query_log(prediction_id=prediction_id, model=model, status=status, since=since, until=until, limit=limit)
 
 
 @router.get("/system-prompt")
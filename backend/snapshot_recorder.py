@@ -0,0 +1,287 @@
+"""Background recorder of Kalshi market snapshots as compact time series.
+
+Every RECORDER_INTERVAL_SECONDS the recorder samples price, volume and open
+interest for every ticker with an active tracked position plus the top
+RECORDER_TOP_MARKETS open markets by 24h volume.
+
+Samples are bucketed into columnar items in the snapshots table rather than
+stored one item per sample:
+
+  event_ticker = "{ticker}#raw", scraped_at = hour start
+      t (seconds into the hour), yes_bid, yes_ask, last_price, volume,
+      open_interest. Expire after RAW_RETENTION_DAYS via the table's TTL.
+  event_ticker = "{ticker}#1h", scraped_at = day start (UTC)
+      t (hour of day), open, high, low, close, volume, open_interest.
+      Kept indefinitely.
+
+When the first sample of a new hour is written, every finished hour of raw
+samples newer than the ticker's last hourly point is rolled up into the hourly
+buckets, so hours missed while the recorder was down are caught up. A ticker
+that drops out of the selection is rolled up once its last hour ends. A range
+query touches at most one item per hour (raw) or per day (hourly).
+
+Only one worker records at a time: each cycle first takes or renews the
+RECORDER_LEASE in the monitor-leases table, and workers that don't hold it skip
+the cycle.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from backend.db import (
+    acquire_lease,
+    append_series_samples,
+    get_all_users_with_active_positions,
+    get_series_buckets,
+    release_lease,
+)
+from backend.kalshi_api import fetch_market, fetch_markets
+
+logger = logging.getLogger(__name__)
+
+RECORDER_INTERVAL_SECONDS = int(os.environ.get("RECORDER_INTERVAL_SECONDS", "300"))
+RECORDER_TOP_MARKETS = int(os.environ.get("RECORDER_TOP_MARKETS", "50"))
+RAW_RETENTION_DAYS = int(os.environ.get("SNAPSHOT_RAW_RETENTION_DAYS", "7"))
+# Ranges up to this long are answered from raw samples when resolution=auto
+RAW_QUERY_MAX_SPAN = timedelta(hours=48)
+RECORDER_LEASE = "recorder"
+# Outlives one missed cycle, so a slow cycle doesn't hand recording over
+RECORDER_LEASE_TTL_SECONDS = int(os.environ.get("RECORDER_LEASE_TTL_SECONDS", str(2 * RECORDER_INTERVAL_SECONDS + 60)))
+
+RAW_FIELDS = ("yes_bid", "yes_ask", "last_price", "volume", "open_interest")
+HOURLY_FIELDS = ("open", "high", "low", "close", "volume", "open_interest")
+
+
+def _raw_key(ticker: str) -> str:
+    return f"{ticker}#raw"
+
+
+def _hourly_key(ticker: str) -> str:
+    return f"{ticker}#1h"
+
+
+def _hour_start(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _day_start(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _price(sample: dict) -> float | None:
+    """Last traded price, falling back to the bid/ask midpoint."""
+    if sample.get("last_price") is not None:
+        return sample["last_price"]
+    bid, ask = sample.get("yes_bid"), sample.get("yes_ask")
+    if bid is not None and ask is not None:
+        return (bid + ask) / 2
+    return None
+
+
+# ── Recording ──
+
+
+def _select_markets() -> dict[str, dict]:
+    """Ticker -> market dict for tracked tickers and the top markets by volume."""
+    markets = fetch_markets()
+    top = sorted(markets, key=lambda m: m.get("volume_24h") or 0, reverse=True)[:RECORDER_TOP_MARKETS]
+    selected = {m["ticker"]: m for m in top if m.get("ticker")}
+    by_ticker = {m.get("ticker"): m for m in markets}
+
+    for positions in get_all_users_with_active_positions().values():
+        for pos in positions:
+            ticker = pos.get("ticker")
+            if not ticker or ticker in selected:
+                continue
+            market = by_ticker.get(ticker) or fetch_market(ticker)
+            if market:
+                selected[ticker] = market
+    return selected
+
+
+# Ticker -> hour of the last sample this process recorded, to roll up tickers
+# that leave the selection
+_recorded: dict[str, datetime] = {}
+
+
+def record_sample(ticker: str, market: dict, now: datetime) -> None:
+    """Append one sample for a ticker, rolling up finished hours if this is
+    the first sample of a new hour."""
+    hour = _hour_start(now)
+    columns = {"t": [int((now - hour).total_seconds())]}
+    for field in RAW_FIELDS:
+        columns[field] = [market.get(field)]
+    expires_at = int((hour + timedelta(days=RAW_RETENTION_DAYS, hours=1)).timestamp())
+    count = append_series_samples(_raw_key(ticker), hour.isoformat(), columns, expires_at=expires_at)
+    _recorded[ticker] = hour
+    if count == 1:
+        rollup_pending(ticker, now)
+
+
+def record_snapshots(now: datetime | None = None) -> int:
+    """Take one sample of every selected market. Returns the number recorded."""
+    now = now or datetime.now(timezone.utc)
+    recorded = 0
+    selected = _select_markets()
+    for ticker, market in selected.items():
+        try:
+            record_sample(ticker, market, now)
+            recorded += 1
+        except Exception:
+            logger.exception("Failed to record snapshot for %s", ticker)
+    # Tickers no longer selected get no next-hour sample to trigger their rollup
+    for ticker, hour in list(_recorded.items()):
+        if ticker not in selected and hour < _hour_start(now):
+            try:
+                rollup_pending(ticker, now)
+                del _recorded[ticker]
+            except Exception:
+                logger.exception("Failed to roll up %s", ticker)
+    return recorded
+
+
+# ── Rollups ──
+
+
+def _raw_points(buckets: list[dict]) -> list[dict]:
+    points = []
+    for bucket in buckets:
+        start = datetime.fromisoformat(bucket["scraped_at"])
+        for i, offset in enumerate(bucket.get("t", [])):
+            point = {"ts": start + timedelta(seconds=int(offset))}
+            for field in RAW_FIELDS:
+                values = bucket.get(field, [])
+                point[field] = values[i] if i < len(values) else None
+            points.append(point)
+    return points
+
+
+def _ohlc(points: list[dict]) -> dict | None:
+    prices = [p for p in (_price(pt) for pt in points) if p is not None]
+    if not prices:
+        return None
+    return {
+        "open": prices[0],
+        "high": max(prices),
+        "low": min(prices),
+        "close": prices[-1],
+        "volume": points[-1].get("volume"),
+        "open_interest": points[-1].get("open_interest"),
+    }
+
+
+def _rollup_points(raw: list[dict]) -> list[dict]:
+    """Group raw points by hour into OHLC points."""
+    by_hour: dict[datetime, list[dict]] = {}
+    for point in raw:
+        by_hour.setdefault(_hour_start(point["ts"]), []).append(point)
+    rolled = []
+    for hour, points in sorted(by_hour.items()):
+        bar = _ohlc(points)
+        if bar:
+            rolled.append({"ts": hour, **bar})
+    return rolled
+
+
+def rollup_pending(ticker: str, now: datetime) -> int:
+    """Aggregate every finished hour of raw samples newer than the ticker's
+    last hourly point into its hourly series. Returns the hours rolled up."""
+    current = _hour_start(now)
+    floor = _hour_start(now - timedelta(days=RAW_RETENTION_DAYS))
+    hourly = _hourly_points(get_series_buckets(
+        _hourly_key(ticker), _day_start(floor).isoformat(), _day_start(current).isoformat(),
+    ))
+    since = max(floor, hourly[-1]["ts"] + timedelta(hours=1)) if hourly else floor
+    if since >= current:
+        return 0
+    raw = get_series_buckets(_raw_key(ticker), since.isoformat(), (current - timedelta(hours=1)).isoformat())
+    bars = _rollup_points(_raw_points(raw))
+    for bar in bars:
+        columns = {"t": [bar["ts"].hour]}
+        for field in HOURLY_FIELDS:
+            columns[field] = [bar[field]]
+        append_series_samples(_hourly_key(ticker), _day_start(bar["ts"]).isoformat(), columns)
+    return len(bars)
+
+
+# ── Queries ──
+
+
+def _hourly_points(buckets: list[dict]) -> list[dict]:
+    points = []
+    for bucket in buckets:
+        start = datetime.fromisoformat(bucket["scraped_at"])
+        for i, hour in enumerate(bucket.get("t", [])):
+            point = {"ts": start + timedelta(hours=int(hour))}
+            for field in HOURLY_FIELDS:
+                values = bucket.get(field, [])
+                point[field] = values[i] if i < len(values) else None
+            points.append(point)
+    return points
+
+
+def get_market_history(
+    ticker: str,
+    start: datetime,
+    end: datetime,
+    resolution: str = "auto",
+    now: datetime | None = None,
+) -> dict:
+    """Samples for a ticker between start and end, at "raw" or "1h" resolution.
+
+    "auto" picks raw for short ranges still inside the raw retention window and
+    hourly otherwise. Hourly results include a live rollup of raw samples for
+    hours that haven't been rolled up yet (e.g. the current hour).
+    """
+    now = now or datetime.now(timezone.utc)
+    raw_floor = now - timedelta(days=RAW_RETENTION_DAYS)
+    if resolution == "auto":
+        resolution = "raw" if end - start <= RAW_QUERY_MAX_SPAN and start >= raw_floor else "1h"
+
+    if resolution == "raw":
+        buckets = get_series_buckets(_raw_key(ticker), _hour_start(start).isoformat(), _hour_start(end).isoformat())
+        points = _raw_points(buckets)
+    else:
+        buckets = get_series_buckets(_hourly_key(ticker), _day_start(start).isoformat(), _day_start(end).isoformat())
+        points = _hourly_points(buckets)
+        tail_start = max(_hour_start(start), _hour_start(raw_floor))
+        if points:
+            tail_start = max(tail_start, points[-1]["ts"] + timedelta(hours=1))
+        if tail_start <= end:
+            raw = get_series_buckets(_raw_key(ticker), tail_start.isoformat(), _hour_start(end).isoformat())
+            points.extend(_rollup_points(_raw_points(raw)))
+
+    points = [{**p, "ts": p["ts"].isoformat()} for p in points if start <= p["ts"] <= end]
+    return {"ticker": ticker, "resolution": resolution, "points": points}
+
+
+# ── Loop ──
+
+
+async def snapshot_recorder_loop():
+    """Record market snapshots forever; cancel the task to stop."""
+    logger.info("Snapshot recorder started (interval=%ds)", RECORDER_INTERVAL_SECONDS)
+    loop = asyncio.get_running_loop()
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                if await loop.run_in_executor(
+                    None, acquire_lease, RECORDER_LEASE, owner, RECORDER_LEASE_TTL_SECONDS, time.time(),
+                ):
+                    recorded = await loop.run_in_executor(None, record_snapshots)
+                    logger.info("Recorded %d market snapshots in %.1fs", recorded, time.monotonic() - started)
+            except Exception:
+                logger.exception("Snapshot recorder cycle failed")
+            await asyncio.sleep(max(0.0, RECORDER_INTERVAL_SECONDS - (time.monotonic() - started)))
+    finally:
+        # Hand recording over now instead of after the lease TTL
+        try:
+            await loop.run_in_executor(None, release_lease, RECORDER_LEASE, owner)
+        except Exception:
+            logger.exception("Failed to release the recorder lease")
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture
+def make_position():
+    """Factory for active tracked positions as the monitor scan returns them;
+    keyword levels (take_profit=..., stop_loss=...) become its alerts."""
+
+    def make(position_id, ticker, user_id="u1", side="yes", entry_price=40, **alerts):
+        return {"position_id": position_id, "user_id": user_id, "ticker": ticker, "side": side,
+                "entry_price": entry_price, "status": "active", "alerts": alerts}
+
+    return make
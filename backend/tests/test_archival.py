@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from backend import archival, local_db
+
+NOW = datetime(2026, 9, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.object(local_db, "LOCAL_STORAGE_DIR", tmp_path / "objects"),
+        patch.multiple(
+            archival,
+            scan_archivable=local_db.scan_archivable,
+            mark_archived=local_db.mark_archived,
+            put_object=local_db.put_object,
+            get_object=local_db.get_object,
+            get_presigned_url=local_db.get_presigned_url,
+            list_object_keys=local_db.list_object_keys,
+        ),
+    ):
+        yield local_db
+
+
+def test_archives_old_items_and_reads_them_back(store):
+    store.put_prediction({"prediction_id": "old1", "user_id": "u1", "status": "completed",
+                          "created_at": "2026-01-05T10:00:00+00:00", "recommendation": {"ticker": "A"}})
+    store.put_prediction({"prediction_id": "old2", "user_id": "u1", "status": "completed",
+                          "created_at": "2026-01-06T10:00:00+00:00", "image_key": "uploads/old2.png",
+                          "image_url": "https://expired"})
+    store.put_prediction({"prediction_id": "new", "user_id": "u1", "status": "completed",
+                          "created_at": "2026-08-30T10:00:00+00:00"})
+    store.put_tracked_position({"position_id": "live", "user_id": "u1", "status": "active",
+                                "created_at": "2026-01-05T10:00:00+00:00"})
+
+    assert archival.run_archival(NOW) == {"predictions": 2, "tracked_positions": 0}
+
+    assert archival.get_archived("predictions", "old1")["recommendation"] == {"ticker": "A"}
+    with patch.object(archival, "get_presigned_url", return_value="https://fresh") as sign:
+        assert archival.get_archived("predictions", "old2")["image_url"] == "https://fresh"
+        assert {p.get("image_url") for p in archival.get_archived_by_user("predictions", "u1")} == {None, "https://fresh"}
+    sign.assert_called_with("uploads/old2.png")
+    assert archival.get_archived("predictions", "new") is None
+    assert {p["prediction_id"] for p in archival.get_archived_by_user("predictions", "u1")} == {"old1", "old2"}
+
+    flagged = store.get_prediction("old1")
+    assert flagged["archive_key"].startswith("archive/predictions/dt=2026-01-05/")
+    assert flagged["expires_at"] > NOW.timestamp()
+    assert "archived_at" not in store.get_tracked_position("live")
+
+    # Already-archived items are skipped on the next run
+    assert archival.run_archival(NOW) == {"predictions": 0, "tracked_positions": 0}
+
+
+def test_items_updated_after_archiving_are_archived_again(store):
+    store.put_tracked_position({"position_id": "p1", "user_id": "u1", "status": "settled_win", "user_notes": "v1",
+                                "created_at": "2026-01-05T10:00:00+00:00", "updated_at": "2026-01-09T10:00:00+00:00"})
+    assert archival.run_archival(NOW)["tracked_positions"] == 1
+    first_key = store.get_tracked_position("p1")["archive_key"]
+
+    # An edit during the grace window cancels the expiry...
+    store.update_tracked_position("p1", {"user_notes": "v2", "updated_at": "2026-09-02T10:00:00+00:00"})
+    assert "expires_at" not in store.get_tracked_position("p1")
+
+    # ...and the next run archives the edited copy
+    assert archival.run_archival(NOW)["tracked_positions"] == 1
+    flagged = store.get_tracked_position("p1")
+    assert flagged["archive_key"] != first_key and "expires_at" in flagged
+    assert archival.get_archived("tracked_positions", "p1")["user_notes"] == "v2"
+    # Both runs left a by-user pointer; the user listing still has the item once, as edited
+    assert [p["user_notes"] for p in archival.get_archived_by_user("tracked_positions", "u1")] == ["v2"]
+
+
+def test_item_updated_mid_batch_is_left_for_the_next_run(store):
+    store.put_tracked_position({"position_id": "p1", "user_id": "u1", "status": "settled_win",
+                                "created_at": "2026-01-05T10:00:00+00:00", "updated_at": "2026-01-09T10:00:00+00:00"})
+
+    def mark_after_a_concurrent_edit(*args):
+        store.update_tracked_position("p1", {"user_notes": "edited", "updated_at": "2026-09-01T00:00:01+00:00"})
+        return store.mark_archived(*args)
+
+    with patch.object(archival, "mark_archived", mark_after_a_concurrent_edit):
+        assert archival.run_archival(NOW)["tracked_positions"] == 0
+    assert "archived_at" not in store.get_tracked_position("p1")
+
+    assert archival.run_archival(NOW)["tracked_positions"] == 1
+    assert [p["user_notes"] for p in archival.get_archived_by_user("tracked_positions", "u1")] == ["edited"]
+
+
+def test_a_second_run_cannot_flag_an_item_again(store):
+    store.put_prediction({"prediction_id": "p1", "user_id": "u1", "status": "completed",
+                          "created_at": "2026-01-05T10:00:00+00:00"})
+    assert store.mark_archived("predictions", "p1", "archive/a", 1, None) is True
+    assert store.mark_archived("predictions", "p1", "archive/b", 2, None) is False
+    assert store.get_prediction("p1")["archive_key"] == "archive/a"
+
+
+def test_only_the_lease_holder_runs_the_job():
+    async def stop_after_one_interval(seconds):
+        if stop_after_one_interval.calls:
+            raise asyncio.CancelledError
+        stop_after_one_interval.calls += 1
+
+    for held in (True, False):
+        stop_after_one_interval.calls = 0
+        with (
+            patch.object(archival.asyncio, "sleep", stop_after_one_interval),
+            patch.object(archival, "acquire_lease", return_value=held) as acquire,
+            patch.object(archival, "release_lease") as release,
+            patch.object(archival, "run_archival", return_value={}) as run,
+        ):
+            with pytest.raises(asyncio.CancelledError):
+                asyncio.run(archival.archival_loop())
+        assert acquire.call_args.args[0] == archival.ARCHIVAL_LEASE
+        assert run.called is held
+        release.assert_called_once()
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from backend import async_db
+
+
+def test_wrapped_calls_run_on_the_bounded_db_pool():
+    lock = threading.Lock()
+    running = peak = 0
+    threads = set()
+
+    def blocking_get(prediction_id):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+            threads.add(threading.current_thread().name)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return {"prediction_id": prediction_id}
+
+    async def run():
+        return await asyncio.gather(*(async_db.get_prediction(f"p{i}") for i in range(2 * async_db.DB_EXECUTOR_WORKERS)))
+
+    # Looked up on every call, so patching backend.db is honoured
+    with patch("backend.db.get_prediction", blocking_get):
+        results = asyncio.run(run())
+
+    assert results[3] == {"prediction_id": "p3"}
+    assert all(name.startswith("db") for name in threads)
+    assert peak == async_db.DB_EXECUTOR_WORKERS
+    assert async_db.executor_stats()["threads"] <= async_db.DB_EXECUTOR_WORKERS
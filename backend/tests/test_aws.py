@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import backend.db as db
+from backend import aws
+
+
+def test_importing_db_creates_no_clients():
+    assert isinstance(db.table, aws.Lazy)
+    assert isinstance(db.s3_client, aws.Lazy)
+    # Other tests may already have resolved clients here, so import fresh
+    fresh = subprocess.run(
+        [sys.executable, "-c", "import backend.db; from backend import aws; "
+                               "print(sorted(aws._clients), sorted(aws._resources))"],
+        capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parents[2],
+    )
+    assert fresh.stdout.strip() == "[] []"
+
+
+def test_lazy_resolves_once():
+    created = []
+    lazy = aws.Lazy(lambda: created.append(1) or {"a": 1})
+    assert created == []
+    assert lazy.get("a") == 1
+    assert lazy.keys() is not None
+    assert created == [1]
+
+
+def test_pool_stats_count_saturation():
+    stats = aws._PoolStats("dynamodb", pool_size=2)
+    for _ in range(3):
+        stats.before_call()
+    stats.after_call()
+    stats.after_call_error()
+    snap = stats.snapshot()
+    assert snap["in_flight"] == 1
+    assert snap["peak_in_flight"] == 3
+    assert snap["saturated_calls"] == 1
+    assert snap["errors"] == 1
+
+
+def test_client_config_uses_settings():
+    config = aws.client_config()
+    assert config.max_pool_connections == aws.AWS_MAX_POOL_CONNECTIONS
+    assert config.retries == {"mode": aws.AWS_RETRY_MODE, "max_attempts": aws.AWS_MAX_ATTEMPTS}
@@ -0,0 +1,126 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from backend import bot_engine, local_db
+
+POSITIONS = [
+    {"entry_price": 40, "status": "active"},
+    {"entry_price": 30, "status": "settled_win"},
+    {"entry_price": 55.5, "status": "settled_loss"},
+    {"entry_price": 20, "status": "closed"},
+]
+
+
+def test_incremental_deltas_match_full_recount():
+    with (
+        patch.object(bot_engine, "get_tracked_positions_by_user", return_value=POSITIONS),
+        patch.object(bot_engine, "get_archived_by_user", return_value=[]),
+    ):
+        recount = bot_engine._recount_positions("u1", {})
+
+    totals = {"total_positions": 0, "settled_positions": 0, "paper_balance": bot_engine.STARTING_PAPER_BALANCE}
+    for pos in POSITIONS:
+        for key, delta in bot_engine._position_deltas(pos["entry_price"], pos["status"]).items():
+            totals[key] += delta
+
+    assert totals == recount
+
+
+def test_settlement_is_one_atomic_update():
+    progress = bot_engine._recompute_milestones({
+        "user_id": "u1",
+        "milestones": [{**m, "current": 0, "completed": False, "completed_at": None} for m in bot_engine.MILESTONES],
+        "total_positions": 1,
+        "settled_positions": 1,
+        "paper_balance": 10060,
+    })
+    for m in progress["milestones"]:
+        m["completed"] = False
+    with (
+        patch.object(bot_engine, "increment_user_progress", return_value=progress) as incr,
+        patch.object(bot_engine, "update_user_progress") as update,
+        patch.object(bot_engine, "get_tracked_positions_by_user") as recount_query,
+    ):
+        result = bot_engine.record_settlement("u1", won=True)
+
+    incr.assert_called_once_with(
+        "u1", {"settled_positions": 1, "paper_balance": 100},
+        defaults={"paper_balance": bot_engine.STARTING_PAPER_BALANCE},
+    )
+    recount_query.assert_not_called()
+    # m1 and m3 become complete, so the milestones are written back once
+    update.assert_called_once()
+    assert {m["id"] for m in result["milestones"] if m["completed"]} == {"m1", "m3"}
+
+
+def test_repair_retries_when_a_concurrent_update_lands_mid_recount(tmp_path):
+    positions = [{"position_id": "p1", "user_id": "u1", "entry_price": 40, "status": "active"}]
+    reads = 0
+
+    def positions_with_a_concurrent_track(user_id):
+        nonlocal reads
+        reads += 1
+        snapshot = [dict(p) for p in positions]
+        if reads == 1:
+            # Another request tracks p2 (position + counter increment) right after this read
+            positions.append({"position_id": "p2", "user_id": "u1", "entry_price": 30, "status": "active"})
+            local_db.increment_user_progress("u1", {"total_positions": 1, "paper_balance": -30})
+        return snapshot
+
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.object(bot_engine, "get_user_progress", local_db.get_user_progress),
+        patch.object(bot_engine, "put_user_progress", local_db.put_user_progress),
+        patch.object(bot_engine, "update_user_progress_if_unchanged", local_db.update_user_progress_if_unchanged),
+        patch.object(bot_engine, "get_tracked_positions_by_user", side_effect=positions_with_a_concurrent_track),
+        patch.object(bot_engine, "get_archived_by_user", return_value=[]),
+    ):
+        bot_engine.get_or_create_progress("u1")
+        bot_engine.repair_progress("u1")
+        progress = local_db.get_user_progress("u1")
+
+    assert reads == 2
+    assert progress["total_positions"] == 2
+    assert progress["paper_balance"] == bot_engine.STARTING_PAPER_BALANCE - 70
+
+
+def test_recount_includes_archived_positions_once():
+    live = [{"position_id": "p1", "entry_price": 40, "status": "settled_win"},
+            {"position_id": "p2", "entry_price": 30, "status": "settled_loss", "archived_at": "2026-09-01"}]
+    # p2 is archived but not yet expired; p3's DynamoDB copy is already gone
+    archived = [{"position_id": "p2", "entry_price": 30, "status": "settled_loss"},
+                {"position_id": "p3", "entry_price": 20, "status": "settled_win"}]
+    with (
+        patch.object(bot_engine, "get_tracked_positions_by_user", return_value=live),
+        patch.object(bot_engine, "get_archived_by_user", return_value=archived) as read_archive,
+    ):
+        recount = bot_engine._recount_positions("u1", {})
+
+    read_archive.assert_called_once_with("tracked_positions", "u1")
+    assert recount["total_positions"] == 3
+    assert recount["settled_positions"] == 3
+    assert recount["paper_balance"] == bot_engine.STARTING_PAPER_BALANCE - 90 + 200
+
+
+def test_only_the_lease_holder_repairs():
+    async def stop_after_one_interval(seconds):
+        if stop_after_one_interval.calls:
+            raise asyncio.CancelledError
+        stop_after_one_interval.calls += 1
+
+    for held in (True, False):
+        stop_after_one_interval.calls = 0
+        with (
+            patch.object(bot_engine.asyncio, "sleep", stop_after_one_interval),
+            patch.object(bot_engine, "acquire_lease", return_value=held) as acquire,
+            patch.object(bot_engine, "release_lease") as release,
+            patch.object(bot_engine, "get_all_progress_user_ids", return_value=["u1", "u2"]),
+            patch.object(bot_engine, "repair_progress") as repair,
+        ):
+            with pytest.raises(asyncio.CancelledError):
+                asyncio.run(bot_engine.progress_repair_loop())
+        assert acquire.call_args.args[0] == bot_engine.PROGRESS_REPAIR_LEASE
+        assert repair.call_count == (2 if held else 0)
+        release.assert_called_once()
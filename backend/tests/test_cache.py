@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import backend.db as db
+from backend.cache import TTLCache
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=60)
+    with patch("backend.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=5)
+    with patch("backend.cache.time.monotonic", return_value=1010.0):
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+    assert len(cache) == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_presigned_url_reused_until_safety_margin():
+    s3 = MagicMock()
+    s3.generate_presigned_url.side_effect = lambda *a, **kw: f"https://signed/{kw['Params']['Key']}"
+    db._presigned_url_cache.clear()
+    with (
+        patch.object(db, "s3_client", s3),
+        patch.object(db, "_s3_available", True),
+        patch("backend.cache.time.monotonic", return_value=0.0),
+    ):
+        assert db.get_presigned_url("k1") == "https://signed/k1"
+        assert db.get_presigned_url("k1") == "https://signed/k1"
+        assert s3.generate_presigned_url.call_count == 1
+    with (
+        patch.object(db, "s3_client", s3),
+        patch.object(db, "_s3_available", True),
+        patch("backend.cache.time.monotonic", return_value=3600.0 - db.PRESIGNED_URL_SAFETY_MARGIN),
+    ):
+        db.get_presigned_url("k1")
+        assert s3.generate_presigned_url.call_count == 2
+    db._presigned_url_cache.clear()
+
+
+def test_presigned_url_reuse_is_bounded_by_credential_expiry():
+    s3 = MagicMock()
+    s3.generate_presigned_url.side_effect = lambda *a, **kw: f"https://signed/{kw['Params']['Key']}"
+    s3._request_signer._credentials._expiry_time = datetime.now(timezone.utc) + timedelta(minutes=20)
+    db._presigned_url_cache.clear()
+    with (
+        patch.object(db, "s3_client", s3),
+        patch.object(db, "_s3_available", True),
+        patch("backend.cache.time.monotonic", return_value=0.0),
+    ):
+        db.get_presigned_url("k1")
+        db.get_presigned_url("k1")
+        assert s3.generate_presigned_url.call_count == 1
+    with (
+        patch.object(db, "s3_client", s3),
+        patch.object(db, "_s3_available", True),
+        # Well inside the URL's hour, but past the credentials' expiry less the margin
+        patch("backend.cache.time.monotonic", return_value=20 * 60.0 - db.PRESIGNED_URL_SAFETY_MARGIN),
+    ):
+        db.get_presigned_url("k1")
+        assert s3.generate_presigned_url.call_count == 2
+    db._presigned_url_cache.clear()
@@ -0,0 +1,50 @@
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from backend.models import custom
+
+
+class NoSuchKey(ClientError):
+    pass
+
+
+@pytest.fixture
+def s3():
+    client = MagicMock()
+    client.exceptions.NoSuchKey = NoSuchKey
+    client.exceptions.ClientError = ClientError
+    client.put_object.return_value = {"ETag": '"v2"'}
+    custom._registry, custom._registry_etag, custom._registry_checked_at = None, None, 0.0
+    with patch.object(custom, "s3_client", client), patch.object(custom, "_s3_available", True):
+        yield client
+    custom._registry, custom._registry_etag, custom._registry_checked_at = None, None, 0.0
+
+
+def _body(registry: dict) -> dict:
+    return {"Body": io.BytesIO(json.dumps(registry).encode()), "ETag": '"v1"'}
+
+
+def test_registry_cached_and_revalidated_with_etag(s3):
+    not_modified = ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject")
+    s3.get_object.side_effect = [_body({"m": {"name": "m"}}), not_modified]
+
+    with patch("backend.models.custom.time.monotonic", return_value=100.0):
+        assert custom.get_custom_model_config("m") == {"name": "m"}
+        assert custom.get_custom_models() == [{"name": "m"}]
+    assert s3.get_object.call_count == 1
+
+    with patch("backend.models.custom.time.monotonic", return_value=100.0 + custom.CUSTOM_REGISTRY_REVALIDATE_SECONDS):
+        assert custom.get_custom_model_config("m") == {"name": "m"}
+    assert s3.get_object.call_args.kwargs["IfNoneMatch"] == '"v1"'
+
+
+def test_writes_update_cache_immediately(s3):
+    s3.get_object.return_value = _body({})
+    custom.create_custom_model({"name": "new", "display_name": "New"})
+    assert custom.get_custom_model_config("new")["display_name"] == "New"
+    assert s3.get_object.call_count == 1
+    assert custom._registry_etag == '"v2"'
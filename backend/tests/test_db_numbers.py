@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+import boto3
+from botocore.stub import Stubber
+
+from backend.db import _install_native_numbers, _NativeDeserializer, _NativeSerializer
+
+
+def _resource():
+    resource = boto3.resource(
+        "dynamodb",
+        region_name="us-east-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+    )
+    _install_native_numbers(resource)
+    return resource
+
+
+def test_serializer_accepts_floats():
+    ser = _NativeSerializer()
+    assert ser.serialize(0.1) == {"N": "0.1"}
+    assert ser.serialize(42) == {"N": "42"}
+    assert ser.serialize(Decimal("1.5")) == {"N": "1.5"}
+    assert ser.serialize({"a": [1, 2.5, None, True]}) == {
+        "M": {"a": {"L": [{"N": "1"}, {"N": "2.5"}, {"NULL": True}, {"BOOL": True}]}}
+    }
+
+
+def test_deserializer_returns_native_numbers():
+    de = _NativeDeserializer()
+    assert de.deserialize({"N": "42"}) == 42
+    assert isinstance(de.deserialize({"N": "42"}), int)
+    assert de.deserialize({"N": "1E+2"}) == 100
+    assert de.deserialize({"N": "0.73"}) == 0.73
+    assert de.deserialize({"NS": ["1", "2.5"]}) == {1, 2.5}
+
+
+def test_put_and_get_round_trip_without_mutating_input():
+    resource = _resource()
+    table = resource.Table("predictions")
+    item = {"prediction_id": "p1", "market_data": {"midpoint": 42.5, "orderbook_yes": [[1, 10]]}}
+    wire = {"prediction_id": {"S": "p1"}, "market_data": {"M": {
+        "midpoint": {"N": "42.5"},
+        "orderbook_yes": {"L": [{"L": [{"N": "1"}, {"N": "10"}]}]},
+    }}}
+
+    with Stubber(resource.meta.client) as stub:
+        # The stubber checks request params before serialization runs
+        stub.add_response("put_item", {}, {"TableName": "predictions", "Item": item})
+        stub.add_response("get_item", {"Item": wire}, {"TableName": "predictions", "Key": {"prediction_id": "p1"}})
+        table.put_item(Item=item)
+        got = table.get_item(Key={"prediction_id": "p1"})["Item"]
+
+    assert item["market_data"]["midpoint"] == 42.5
+    assert got == item
@@ -0,0 +1,81 @@
+import io
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from backend import dedup, local_db
+from backend.models.gemini_model import GeminiModel
+from backend.models.random_model import RandomModel
+
+
+def _png(img: Image.Image, fmt: str = "PNG", **kwargs) -> io.BytesIO:
+    buf = io.BytesIO()
+    img.save(buf, fmt, **kwargs)
+    buf.seek(0)
+    return buf
+
+
+@pytest.fixture
+def gradient():
+    img = Image.new("RGB", (400, 300))
+    img.putdata([((x * 255) // 400, (y * 255) // 300, 128) for y in range(300) for x in range(400)])
+    return img
+
+
+@pytest.fixture
+def store(tmp_path):
+    with (
+        patch.object(local_db, "LOCAL_STORAGE_DIR", tmp_path),
+        patch.object(dedup, "find_similar_images", local_db.find_similar_images),
+        patch.object(dedup, "get_cached_recommendation", local_db.get_cached_recommendation),
+        patch.object(dedup, "put_cached_recommendation", local_db.put_cached_recommendation),
+    ):
+        yield local_db
+
+
+def test_perceptual_hash_survives_reencoding(gradient):
+    original = dedup.perceptual_hash(_png(gradient))
+    reencoded = dedup.perceptual_hash(_png(gradient.resize((200, 150)).convert("RGB"), "JPEG", quality=60))
+    assert original is not None
+    assert dedup.hamming(original, reencoded) <= dedup.DHASH_MAX_DISTANCE
+    assert dedup.perceptual_hash(io.BytesIO(b"not an image")) is None
+
+
+def test_huge_images_are_not_decoded(gradient):
+    # A small PNG whose header claims more pixels than the cap
+    with patch.object(dedup, "DHASH_MAX_PIXELS", 100 * 100), patch.object(Image.Image, "convert") as convert:
+        assert dedup.perceptual_hash(_png(gradient)) is None
+    convert.assert_not_called()
+
+
+def test_near_duplicate_reuses_recommendation(store):
+    model = GeminiModel()
+    recommendation = {"ticker": "KXFED", "side": "yes"}
+    dedup.remember_recommendation(model, "gemini", None, "a" * 64, recommendation)
+    store.put_image_fingerprint("a" * 64, 0xF0F0F0F0F0F0F0F0)
+
+    assert dedup.find_reusable_recommendation(model, "gemini", None, "a" * 64) == recommendation
+    near = 0xF0F0F0F0F0F0F0F3  # 2 bits away
+    assert dedup.find_reusable_recommendation(model, "gemini", None, "b" * 64, near) == recommendation
+    assert dedup.find_reusable_recommendation(model, "gemini", "different context", "a" * 64) is None
+    assert dedup.find_reusable_recommendation(model, "gemini", None, "c" * 64, ~near & (2**64 - 1)) is None
+
+
+def test_random_model_results_are_never_reused(store):
+    model = RandomModel()
+    dedup.remember_recommendation(model, "random", None, "a" * 64, {"ticker": "X"})
+    assert dedup.find_reusable_recommendation(model, "random", None, "a" * 64) is None
+
+
+def test_band_lookup_reads_only_the_newest_recent_images(store):
+    dhash = 0xF0F0F0F0F0F0F0F0
+    with patch("backend.local_db.time.time", return_value=1_000):
+        store.put_image_fingerprint("old" + "0" * 61, dhash)
+    for i in range(5):
+        with patch("backend.local_db.time.time", return_value=2_000 + i):
+            store.put_image_fingerprint(f"{i}" * 64, dhash)
+
+    with patch("backend.db.DHASH_BAND_SCAN_LIMIT", 3):
+        assert set(store.find_similar_images(dhash)) == {"4" * 64, "3" * 64, "2" * 64}
+    assert set(store.find_similar_images(dhash, newer_than=1_500)) == {f"{i}" * 64 for i in range(5)}
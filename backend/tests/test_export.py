@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pyarrow.parquet as pq
+import pytest
+
+from backend import export, local_db
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    log_path = tmp_path / "prediction_log.jsonl"
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.object(local_db, "LOCAL_STORAGE_DIR", tmp_path / "objects"),
+        patch.object(export, "scan_window", local_db.scan_window),
+        patch.object(export, "LOG_PATH", str(log_path)),
+    ):
+        yield local_db, log_path
+
+
+def _read(root, dataset):
+    return pq.read_table(root / dataset).to_pylist()
+
+
+def test_incremental_export_flattens_and_partitions(store, tmp_path):
+    db, log_path = store
+    root = tmp_path / "exports"
+    db.put_prediction({
+        "prediction_id": "p1", "user_id": "u1", "model": "taruns_model", "status": "completed",
+        "created_at": "2026-03-02T10:00:00+00:00", "completed_at": "2026-03-02T10:00:30+00:00",
+        "recommendation": {"ticker": "T", "side": "yes", "confidence": 0.7, "factors": [{}, {}, {}]},
+        "market_data": {"status": "found", "yes_ask": 41, "event_category": "Sports"},
+    })
+    db.put_prediction({"prediction_id": "p2", "user_id": "u1", "model": "random", "status": "processing",
+                       "created_at": "2026-03-10T11:59:00+00:00"})
+    db.put_tracked_position({"position_id": "s1", "user_id": "u1", "ticker": "T", "side": "yes", "entry_price": 41,
+                             "status": "settled_win", "realized_pnl": 59, "model": "taruns_model",
+                             "created_at": "2026-02-20T09:00:00+00:00", "settled_at": "2026-03-03T09:00:00+00:00"})
+    log_path.write_text(json.dumps({"prediction_id": "p1", "status": "completed", "reused": True,
+                                    "logged_at": "2026-03-02T10:00:31+00:00"}) + "\n")
+
+    assert export.run_export(root, now=NOW) == {
+        "predictions": 1, "tracked_positions": 1, "settlements": 1, "analysis_log": 1,
+    }
+    [prediction] = _read(root, "predictions")
+    assert prediction["ticker"] == "T" and prediction["yes_ask"] == 41.0
+    assert prediction["factor_count"] == 3 and prediction["category"] == "Sports"
+    assert (root / "predictions" / "week=2026-W10").is_dir()
+    assert (root / "tracked_positions" / "week=2026-W08").is_dir()
+    assert _read(root, "settlements")[0]["realized_pnl"] == 59.0
+
+    # Only new rows are appended on the next run
+    db.update_prediction("p2", {"status": "completed", "completed_at": "2026-03-10T12:00:00+00:00"})
+    with open(log_path, "a") as f:
+        f.write(json.dumps({"prediction_id": "p2", "logged_at": "2026-03-10T12:00:01+00:00"}) + "\n")
+        f.write('{"prediction_id": "partial')
+    later = datetime(2026, 3, 10, 13, 0, tzinfo=timezone.utc)
+    assert export.run_export(root, now=later) == {
+        "predictions": 1, "tracked_positions": 0, "settlements": 0, "analysis_log": 1,
+    }
+    assert sorted(p["prediction_id"] for p in _read(root, "predictions")) == ["p1", "p2"]
+    assert len(_read(root, "analysis_log")) == 2
@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock, patch
+
+import backend.db as db
+
+
+def _patched(table: MagicMock, resource: MagicMock | None = None):
+    db._integrations_cache.clear()
+    db._no_push_token_cache.clear()
+    return (
+        patch.object(db, "integrations_table", table),
+        patch.object(db, "dynamodb", resource or MagicMock()),
+    )
+
+
+def test_reads_cached_until_a_write_invalidates():
+    table = MagicMock()
+    table.query.return_value = {"Items": [{"user_id": "u1", "platform_account": "kalshi#personal", "email": "a@x"}]}
+    p1, p2 = _patched(table)
+    with p1, p2:
+        assert db.get_integrations_by_user("u1")[0]["email"] == "a@x"
+        db.get_integrations_by_user("u1")[0]["email"] = "mutated"
+        assert db.get_integrations_by_user("u1")[0]["email"] == "a@x"
+        assert table.query.call_count == 1
+
+        db.update_integration_email("u1", "kalshi#personal", "b@x")
+        db.get_integrations_by_user("u1")
+        assert table.query.call_count == 2
+    db._integrations_cache.clear()
+
+
+def test_push_tokens_batch_fetched_for_uncached_users():
+    table = MagicMock()
+    table.query.side_effect = [
+        {"Items": [{"user_id": "u1", "platform_account": "push_token", "expo_push_token": "t1"}]},
+        # u4's token sits under a sort key the batch doesn't look up
+        {"Items": [{"user_id": "u4", "platform_account": "alpaca#live", "expo_push_token": "t4"}]},
+    ]
+    resource = MagicMock()
+    resource.batch_get_item.side_effect = [
+        {
+            "Responses": {db.INTEGRATIONS_TABLE_NAME: [
+                {"user_id": "u2", "platform_account": "kalshi#agent", "expo_push_token": "t2"},
+            ]},
+            "UnprocessedKeys": {db.INTEGRATIONS_TABLE_NAME: {"Keys": [{"user_id": "u3", "platform_account": "push_token"}]}},
+        },
+        {"Responses": {db.INTEGRATIONS_TABLE_NAME: [
+            {"user_id": "u3", "platform_account": "push_token", "expo_push_token": "t3"},
+        ]}},
+    ]
+    p1, p2 = _patched(table, resource)
+    with p1, p2, patch.object(db.time, "sleep") as sleep:
+        db.get_integrations_by_user("u1")  # warm the cache for u1
+        tokens = db.get_push_tokens_for_users(["u1", "u2", "u3", "u4"])
+    assert tokens == {"u1": "t1", "u2": "t2", "u3": "t3", "u4": "t4"}
+    first_keys = resource.batch_get_item.call_args_list[0].kwargs["RequestItems"][db.INTEGRATIONS_TABLE_NAME]["Keys"]
+    assert {k["user_id"] for k in first_keys} == {"u2", "u3", "u4"}
+    sleep.assert_called_once_with(db._BATCH_GET_BACKOFF_BASE)
+    # Batch results may be partial, so only the full per-user queries were cached
+    assert db._integrations_cache.get("u2") is None
+    assert db._integrations_cache.get("u4") is not None
+    db._integrations_cache.clear()
+
+
+def test_users_without_a_token_are_queried_once():
+    table = MagicMock()
+    table.query.return_value = {"Items": [{"user_id": "u1", "platform_account": "kalshi#personal"}]}
+    resource = MagicMock()
+    resource.batch_get_item.return_value = {"Responses": {db.INTEGRATIONS_TABLE_NAME: []}}
+    p1, p2 = _patched(table, resource)
+    with p1, p2:
+        assert db.get_push_tokens_for_users(["u1"]) == {}
+        db._integrations_cache.clear()  # the integration entry expires before the next rescan
+        assert db.get_push_tokens_for_users(["u1"]) == {}
+        assert table.query.call_count == 1 and resource.batch_get_item.call_count == 2
+
+        # A new registration lands on the record the batch reads
+        db.set_push_token_for_user("u1", "t1")
+        resource.batch_get_item.return_value = {"Responses": {db.INTEGRATIONS_TABLE_NAME: [
+            {"user_id": "u1", "platform_account": "push_token", "expo_push_token": "t1"},
+        ]}}
+        assert db.get_push_tokens_for_users(["u1"]) == {"u1": "t1"}
+    table.put_item.assert_called_once_with(
+        Item={"user_id": "u1", "platform_account": "push_token", "expo_push_token": "t1"},
+    )
+    db._integrations_cache.clear()
+    db._no_push_token_cache.clear()
+
+
+def test_the_standalone_record_wins_over_an_older_token():
+    integrations = [{"platform_account": "kalshi#personal", "expo_push_token": "old"},
+                    {"platform_account": "push_token", "expo_push_token": "new"}]
+    assert db._first_push_token(integrations) == "new"
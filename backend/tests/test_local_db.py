@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+import pytest
+
+from backend import local_db
+
+
+@pytest.fixture
+def store(tmp_path):
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.object(local_db, "LOCAL_STORAGE_DIR", tmp_path / "objects"),
+    ):
+        yield local_db
+
+
+def test_positions_round_trip_and_settle_once(store):
+    store.put_tracked_position({"position_id": "p1", "user_id": "u1", "status": "active", "entry_price": 40.5,
+                                "ticker": "T", "side": "yes", "created_at": "2026-01-01"})
+    store.put_tracked_position({"position_id": "p2", "user_id": "u2", "status": "closed"})
+
+    assert store.get_tracked_position("p1")["entry_price"] == 40.5
+    assert list(store.get_all_users_with_active_positions()) == ["u1"]
+    summary = store.get_tracked_positions_by_user("u1", summary=True)[0]
+    assert "entry_price" in summary and "ticker" in summary
+
+    assert store.settle_tracked_position("p1", {"status": "settled_win"})["status"] == "settled_win"
+    assert store.settle_tracked_position("p1", {"status": "settled_loss"}) is None
+    assert store.get_all_users_with_active_positions() == {}
+
+
+def test_progress_increment_requires_existing_record(store):
+    assert store.increment_user_progress("u1", {"total_positions": 1}) is None
+    store.put_user_progress({"user_id": "u1", "total_positions": 2})
+    item = store.increment_user_progress("u1", {"total_positions": 1, "paper_balance": -40},
+                                         defaults={"paper_balance": 10000})
+    assert item["total_positions"] == 3
+    assert item["paper_balance"] == 9960
+    assert store.get_all_progress_user_ids() == ["u1"]
+
+
+def test_objects_stored_on_local_filesystem(store):
+    key = store.upload_image(b"\x89PNG", "images/a.png", "image/png")
+    assert store.get_image_bytes(key) == b"\x89PNG"
+    store.append_analysis_log({"id": 1})
+    assert store.get_analysis_log() == [{"id": 1}]
@@ -0,0 +1,61 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+from backend.log_query import query_log
+from backend.prediction_log import PredictionLogWriter, index_path, log_segments
+
+
+def _entry(i: int, hour: int) -> str:
+    return json.dumps({
+        "prediction_id": f"p{i}",
+        "model": "gemini" if i % 2 else "taruns_model",
+        "status": "failed" if i % 3 == 0 else "completed",
+        "logged_at": f"2026-10-19T{hour:02d}:{i % 60:02d}:00+00:00",
+    }) + "\n"
+
+
+def test_indexed_queries_across_rotated_and_live_files(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    writer = PredictionLogWriter(path, max_bytes=4096)
+    try:
+        for i in range(120):
+            writer.write(_entry(i, hour=i // 40))
+            if i % 10 == 9:
+                assert writer.flush()
+    finally:
+        writer.stop()
+
+    segments = log_segments(path)
+    assert len(segments) > 2
+    # Rotated files stay readable as ordinary gzip
+    with gzip.open(segments[0], "rt") as f:
+        assert json.loads(f.readline())["prediction_id"] == "p0"
+    assert all(open(index_path(s)).read() for s in segments)
+
+    for i in (0, 57, 119):
+        [found] = query_log(prediction_id=f"p{i}", path=path)
+        assert json.loads(_entry(i, hour=i // 40)) == found
+
+    failures = query_log(model="taruns_model", status="failed", path=path)
+    assert {e["prediction_id"] for e in failures} == {f"p{i}" for i in range(120) if i % 6 == 0}
+
+    hour_one = query_log(
+        since=datetime(2026, 10, 19, 1, tzinfo=timezone.utc),
+        until=datetime(2026, 10, 19, 1, 59, tzinfo=timezone.utc),
+        limit=1000, path=path,
+    )
+    assert sorted(int(e["prediction_id"][1:]) for e in hour_one) == list(range(40, 80))
+    assert [e["prediction_id"] for e in query_log(limit=2, path=path)] == ["p119", "p118"]
+
+
+def test_indexes_existing_unindexed_log_on_open(tmp_path):
+    path = tmp_path / "prediction_log.jsonl"
+    path.write_text(_entry(1, hour=0) + _entry(2, hour=0))
+    writer = PredictionLogWriter(str(path))
+    try:
+        writer.write(_entry(3, hour=0))
+        assert writer.flush()
+    finally:
+        writer.stop()
+    assert [e["prediction_id"] for e in query_log(limit=10, path=str(path))] == ["p3", "p2", "p1"]
@@ -0,0 +1,23 @@
+import asyncio
+import time
+
+from backend.loop_monitor import loop_lag
+
+
+def test_a_blocking_callback_shows_up_as_a_stall():
+    async def run():
+        loop_lag.reset()
+        sampler = asyncio.create_task(loop_lag.run())
+        await asyncio.sleep(2 * loop_lag.interval)
+        time.sleep(0.3)  # blocks the loop, as a sync call in an async handler would
+        await asyncio.sleep(2 * loop_lag.interval)
+        sampler.cancel()
+        return loop_lag.snapshot()
+
+    snapshot = asyncio.run(run())
+    loop_lag.reset()
+
+    assert snapshot["samples"] >= 2
+    assert snapshot["stalls"] >= 1
+    assert snapshot["max_lag_ms"] >= 250
+    assert snapshot["stalled_seconds"] >= 0.25
@@ -0,0 +1,107 @@
+from unittest.mock import patch
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+import backend.db as db
+from backend import local_db, monitor_leases
+from backend.monitor_leases import PartitionLeases, partition_lease, partition_of
+
+
+@pytest.fixture
+def store(tmp_path):
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.multiple(
+            monitor_leases,
+            acquire_lease=local_db.acquire_lease,
+            release_lease=local_db.release_lease,
+            list_leases=local_db.list_leases,
+        ),
+    ):
+        yield local_db
+
+
+def test_workers_split_partitions_without_overlap(store):
+    a, b, c = (PartitionLeases(owner=name, partitions=8, ttl_seconds=90) for name in "abc")
+    assert a.refresh(now=1000) == set(range(8))
+
+    # b joins: nothing is free until a sees two workers and gives up half
+    assert b.refresh(now=1010) == set()
+    assert len(a.refresh(now=1020)) == 4
+    assert len(b.refresh(now=1030)) == 4
+    assert not a.owned & b.owned
+
+    c.refresh(now=1040)
+    for worker in (a, b, c, a, b, c):
+        worker.refresh(now=1050)
+    assert a.owned | b.owned | c.owned == set(range(8))
+    assert not (a.owned & b.owned or a.owned & c.owned or b.owned & c.owned)
+    assert max(len(w.owned) for w in (a, b, c)) == 3
+
+
+def test_crashed_worker_partitions_are_taken_over_after_the_ttl(store):
+    a, b = PartitionLeases(owner="a", partitions=4), PartitionLeases(owner="b", partitions=4)
+    a.refresh(now=1000)
+    assert b.refresh(now=1050) == set()
+    assert b.refresh(now=1000 + monitor_leases.MONITOR_LEASE_TTL_SECONDS + 1) == set(range(4))
+
+
+def test_release_all_hands_partitions_over_immediately(store):
+    a, b = PartitionLeases(owner="a", partitions=4), PartitionLeases(owner="b", partitions=4)
+    a.refresh(now=1000)
+    a.release_all()
+    assert b.refresh(now=1001) == set(range(4))
+
+
+def test_ownership_is_by_ticker_partition_and_lapses(store):
+    a = PartitionLeases(owner="a", partitions=4)
+    a.refresh(now=1000)
+    assert a.owns("KXTICKER", now=1001)
+    assert not a.owns("KXTICKER", now=1000 + monitor_leases.MONITOR_LEASE_TTL_SECONDS)
+    assert partition_of("KXTICKER", 4) == partition_of("KXTICKER", 4) < 4
+
+
+def test_checkpoint_writes_are_fenced_on_the_partition_lease(store):
+    a, b = PartitionLeases(owner="a", partitions=1), PartitionLeases(owner="b", partitions=1)
+    a.refresh(now=1000)
+    fence = {"lease": partition_lease(0), "now": 1001}
+    assert store.put_monitor_checkpoint("checkpoint#0", {"cycle": "a1"}, 5000, owner="a", **fence)
+    assert not store.put_monitor_checkpoint("checkpoint#0", {"cycle": "b1"}, 5000, owner="b", **fence)
+
+    # a stalls past its TTL and b takes over; a's late write no longer lands
+    late = 1000 + monitor_leases.MONITOR_LEASE_TTL_SECONDS + 1
+    assert b.refresh(now=late) == {0}
+    assert not store.put_monitor_checkpoint("checkpoint#0", {"cycle": "a2"}, 5000, lease=partition_lease(0),
+                                            owner="a", now=late)
+    assert store.get_monitor_checkpoint("checkpoint#0") == {"cycle": "a1"}
+    # Checkpoints are kept out of the lease scan every heartbeat runs
+    assert all(not lease["lease"].startswith("checkpoint#") for lease in store.list_leases())
+
+
+def test_dynamodb_checkpoint_write_checks_the_lease_in_the_same_transaction():
+    resource = boto3.resource("dynamodb", region_name="us-east-1", aws_access_key_id="t", aws_secret_access_key="t")
+    db._install_native_numbers(resource)
+    expected = {"TransactItems": [
+        {"ConditionCheck": {
+            "TableName": db.MONITOR_LEASES_TABLE_NAME,
+            "Key": {"lease": "partition#3"},
+            "ConditionExpression": "#owner = :owner AND expires_at >= :now",
+            "ExpressionAttributeNames": {"#owner": "owner"},
+            "ExpressionAttributeValues": {":owner": "a", ":now": 1000},
+        }},
+        {"Put": {
+            "TableName": db.MONITOR_CHECKPOINTS_TABLE_NAME,
+            "Item": {"checkpoint": "checkpoint#3", "state": "{}", "expires_at": 5000},
+        }},
+    ]}
+    with patch.object(db, "dynamodb", resource), Stubber(resource.meta.client) as stub:
+        stub.add_client_error(
+            "transact_write_items",
+            service_error_code="TransactionCanceledException",
+            modeled_fields={"CancellationReasons": [{"Code": "ConditionalCheckFailed"}, {"Code": "None"}]},
+            expected_params=expected,
+        )
+        assert db.put_monitor_checkpoint("checkpoint#3", {}, 5000, lease="partition#3", owner="a", now=1000) is False
+        stub.assert_no_pending_responses()
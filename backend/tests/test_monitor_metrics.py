@@ -0,0 +1,66 @@
+import asyncio
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend import monitor_metrics, position_monitor
+
+
+def test_checked_cycle_is_recorded_and_logged(caplog, make_position):
+    grouped = {"u1": [make_position("p1", "A"), make_position("p2", "B"), make_position("p3", "C")], "u2": []}
+    markets = {"A": {"yes_ask": 45}, "B": {"result": "yes"}}
+    metrics = monitor_metrics.MonitorMetrics()
+    dispatcher = MagicMock(flush=AsyncMock())
+
+    def enqueue(*args, **kwargs):
+        done = asyncio.get_running_loop().create_future()
+        done.set_result(True)
+        return done
+
+    dispatcher.enqueue.side_effect = enqueue
+    monitor = position_monitor.PositionMonitor()
+    with (
+        patch("backend.db.get_all_users_with_active_positions", return_value=grouped),
+        patch("backend.db.get_push_tokens_for_users", return_value={"u1": "tok1"}),
+        patch("backend.db.settle_tracked_position", side_effect=lambda pid, fields: {**fields}),
+        patch("backend.db.update_tracked_position"),
+        patch("backend.bot_engine.record_settlements"),
+        patch.object(position_monitor, "fetch_market", side_effect=lambda t: markets.get(t)),
+        patch.object(position_monitor, "push_dispatcher", dispatcher),
+        patch.object(position_monitor, "monitor_metrics", metrics),
+        caplog.at_level(logging.INFO, logger="backend.monitor_metrics"),
+    ):
+        async def run():
+            await monitor.rescan(1000)
+            return await monitor.check_due(1030)
+
+        assert asyncio.run(run()) == 3
+
+    snapshot = metrics.snapshot()
+    cycle = snapshot["last_cycle"]
+    assert snapshot["cycles"] == 1
+    assert {k: cycle[k] for k in ("users", "positions", "tickers", "kalshi_calls", "kalshi_errors",
+                                   "settlements", "price_moves", "pushes_sent", "pushes_failed")} == {
+        "users": 1, "positions": 3, "tickers": 3, "kalshi_calls": 3, "kalshi_errors": 1,
+        "settlements": 1, "price_moves": 1, "pushes_sent": 1, "pushes_failed": 0}
+    assert cycle["schedule_lag_ms"] == 30000.0
+    assert sum(cycle["kalshi_latency_ms"].values()) == 3
+    assert cycle["schedule"]["tickers"] == 3
+
+    logged = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Monitor cycle ")]
+    assert json.loads(logged[0][len("Monitor cycle "):])["cycle_id"] == cycle["cycle_id"]
+
+
+def test_latency_buckets_and_slowest_cycles():
+    metrics = monitor_metrics.MonitorMetrics()
+    for seconds in (0.01, 0.3, 20.0):
+        cycle = monitor_metrics.CycleMetrics()
+        cycle.record_fetch(seconds, ok=True)
+        record = metrics.finish(cycle)
+        record["duration_ms"] = seconds * 1000  # stand in for real cycle time
+
+    snapshot = metrics.snapshot()
+    assert snapshot["kalshi_latency_ms"]["50"] == 1
+    assert snapshot["kalshi_latency_ms"]["500"] == 1
+    assert snapshot["kalshi_latency_ms"]["inf"] == 1
+    assert [c["duration_ms"] for c in snapshot["slowest_recent"]] == [20000.0, 300.0, 10.0]
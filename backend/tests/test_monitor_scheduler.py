@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from backend.monitor_scheduler import (
+    MAX_CHECK_INTERVAL,
+    MIN_CHECK_INTERVAL,
+    MONITOR_INTERVAL_SECONDS,
+    TickerScheduler,
+    wanted_interval,
+)
+
+NOW = datetime(2026, 10, 19, 12, tzinfo=timezone.utc)
+
+
+def _closing_in(**delta) -> dict:
+    return {"status": "active", "yes_ask": 50, "close_time": (NOW + timedelta(**delta)).isoformat()}
+
+
+def test_interval_follows_close_time_and_moves():
+    assert wanted_interval(_closing_in(minutes=30), None, NOW) == 5 * 60
+    assert wanted_interval(_closing_in(hours=12), None, NOW) == 30 * 60
+    assert wanted_interval(_closing_in(days=3), None, NOW) == MONITOR_INTERVAL_SECONDS
+    assert wanted_interval(_closing_in(days=30), None, NOW) == MAX_CHECK_INTERVAL
+    assert wanted_interval(_closing_in(minutes=-5), None, NOW) == MIN_CHECK_INTERVAL
+    assert wanted_interval({"status": "determined"}, None, NOW) == MIN_CHECK_INTERVAL
+    # A 6¢ move quarters the interval, a 3¢ move halves it
+    assert wanted_interval(_closing_in(days=3), 44, NOW) == MONITOR_INTERVAL_SECONDS / 4
+    assert wanted_interval(_closing_in(days=3), 47, NOW) == MONITOR_INTERVAL_SECONDS / 2
+
+
+@patch("backend.monitor_scheduler.MONITOR_BUDGET_FACTOR", 100)
+def test_scheduler_orders_checks_and_drops_gone_tickers():
+    scheduler = TickerScheduler()
+    scheduler.sync(["NEAR", "FAR", "GONE"], now=0)
+    assert sorted(scheduler.pop_due(0)) == ["FAR", "GONE", "NEAR"]
+    assert scheduler.pop_due(0) == []
+
+    scheduler.reschedule("NEAR", {"status": "closed"}, now=0)
+    scheduler.reschedule("FAR", _closing_in(days=30), now=0)
+    scheduler.reschedule("GONE", None, now=0)
+    scheduler.sync(["NEAR", "FAR"], now=0)
+
+    assert scheduler.next_due() == MIN_CHECK_INTERVAL
+    assert scheduler.pop_due(MIN_CHECK_INTERVAL) == ["NEAR"]
+    assert scheduler.pop_due(MAX_CHECK_INTERVAL) == ["FAR"]
+    assert len(scheduler) == 2
+
+
+def test_total_rate_stays_within_the_hourly_budget():
+    scheduler = TickerScheduler()
+    tickers = [f"T{i}" for i in range(10)]
+    scheduler.sync(tickers, now=0)
+    scheduler.pop_due(0)
+    # Every market closes within the hour, so each wants a check every 5 minutes
+    intervals = [scheduler.reschedule(t, {"status": "active", "close_time": (NOW + timedelta(minutes=30)).isoformat()},
+                                      now=NOW.timestamp()) for t in tickers]
+    assert intervals[-1] == MONITOR_INTERVAL_SECONDS
+    assert scheduler.snapshot(NOW.timestamp())["checks_per_hour"] <= len(tickers)
+
+
+def test_quiet_markets_free_budget_for_busy_ones():
+    scheduler = TickerScheduler()
+    scheduler.sync(["HOT"] + [f"Q{i}" for i in range(20)], now=0)
+    scheduler.pop_due(0)
+    for i in range(20):
+        scheduler.reschedule(f"Q{i}", _closing_in(days=30), now=NOW.timestamp())
+    assert scheduler.reschedule("HOT", _closing_in(minutes=30), now=NOW.timestamp()) == 5 * 60
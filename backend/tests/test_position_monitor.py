@@ -0,0 +1,302 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend import position_monitor
+
+
+def test_cycle_fetches_each_ticker_once_and_digests_per_user(make_position):
+    grouped = {
+        "u1": [make_position("p1", "A", "u1"), make_position("p2", "B", "u1")],
+        "u2": [make_position("p3", "A", "u2", side="no", entry_price=55)],
+        "u3": [make_position("p4", "B", "u3")],
+    }
+    markets = {"A": {"yes_ask": 45}, "B": {"result": "yes"}}
+    fetched = []
+
+    def fake_fetch(ticker):
+        fetched.append(ticker)
+        return markets[ticker]
+
+    dispatcher = MagicMock(flush=AsyncMock())
+    monitor = position_monitor.PositionMonitor()
+    with (
+        patch("backend.db.get_all_users_with_active_positions", return_value=grouped),
+        patch("backend.db.get_push_tokens_for_users", return_value={"u1": "tok1", "u2": "tok2"}),
+        patch("backend.db.settle_tracked_position", side_effect=lambda pid, fields: {**fields}) as settle,
+        patch("backend.db.update_tracked_position") as update,
+        patch("backend.bot_engine.record_settlements") as record,
+        patch.object(position_monitor, "fetch_market", side_effect=fake_fetch),
+        patch.object(position_monitor, "push_dispatcher", dispatcher),
+    ):
+        async def run():
+            await monitor.rescan(0)
+            return await monitor.check_due(0)
+
+        assert asyncio.run(run()) == 2
+
+    assert sorted(fetched) == ["A", "B"]
+    # u3 has no push token but its position is still settled
+    assert sorted(call.args[0] for call in settle.call_args_list) == ["p2", "p4"]
+    # p3 is a NO at 55 with YES at 45: unchanged, so neither updated nor notified
+    assert [call.args[0] for call in update.call_args_list] == ["p1"]
+    assert sorted((c.args[0], c.kwargs["settled"], c.kwargs["won"]) for c in record.call_args_list) == [
+        ("u1", 1, 1), ("u3", 1, 1)]
+    bodies = {call.args[0]: call.args[2] for call in dispatcher.enqueue.call_args_list}
+    assert bodies == {"tok1": "Settled: B W +60¢ | Moved: A +5¢"}
+
+
+def test_fetches_respect_the_concurrency_limit():
+    in_flight = peak = 0
+
+    def slow_fetch(ticker):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        time.sleep(0.02)
+        in_flight -= 1
+        return {"ticker": ticker} if ticker != "gone" else None
+
+    with (
+        patch.object(position_monitor, "MONITOR_FETCH_CONCURRENCY", 3),
+        patch.object(position_monitor, "MONITOR_FETCH_RATE", 0),
+        patch.object(position_monitor, "fetch_market", side_effect=slow_fetch),
+    ):
+        result = asyncio.run(position_monitor.fetch_markets_for([f"T{i}" for i in range(12)] + ["gone"]))
+    assert len(result) == 12 and "gone" not in result
+    assert peak <= 3
+
+
+def test_scheduled_checks_hold_price_moves_for_the_digest_cooldown(make_position):
+    grouped = {"u1": [make_position("p1", "A", "u1", entry_price=40)]}
+    prices = iter([43, 45, 46])
+    dispatcher = MagicMock(flush=AsyncMock())
+    monitor = position_monitor.PositionMonitor()
+    with (
+        patch("backend.db.get_all_users_with_active_positions", return_value=grouped),
+        patch("backend.db.get_push_tokens_for_users", return_value={"u1": "tok1"}),
+        patch("backend.db.update_tracked_position"),
+        patch.object(position_monitor, "fetch_market", side_effect=lambda t: {"yes_ask": next(prices)}),
+        patch.object(position_monitor, "push_dispatcher", dispatcher),
+        patch.object(position_monitor, "MONITOR_DIGEST_COOLDOWN_SECONDS", 3600),
+    ):
+        async def run():
+            await monitor.rescan(0)
+            assert await monitor.check_due(0) == 1
+            for now in (5000, 6000):
+                monitor.scheduler._push("A", now)  # force the ticker due
+                await monitor.check_due(now)
+
+        asyncio.run(run())
+
+    # First move goes out; the next two are summed and wait for the cooldown
+    assert [call.args[2] for call in dispatcher.enqueue.call_args_list] == ["Moved: A +3¢", "Moved: A +2¢"]
+    assert monitor.digests.pending == {"u1": {"A": 1}}
+
+
+def test_settlements_update_progress_once_per_user(make_position):
+    grouped = {
+        "u1": [make_position(f"p{i}", ticker, "u1") for i, ticker in enumerate("ABCDE")],
+        "u2": [make_position("q1", "A", "u2", side="no")],
+    }
+    markets = {"A": {"result": "yes"}, "B": {"result": "no"}, "C": {"result": "yes"},
+               "D": {"result": "yes"}, "E": {"result": "no"}}
+    with (
+        patch("backend.db.settle_tracked_position", side_effect=lambda pid, fields: {**fields}),
+        patch("backend.bot_engine._apply_progress_deltas") as apply,
+    ):
+        asyncio.run(position_monitor._evaluate(grouped, markets))
+
+    deltas = sorted((c.args[0], c.args[1]["settled_positions"], c.args[1]["paper_balance"])
+                    for c in apply.call_args_list)
+    assert deltas == [("u1", 5, 300), ("u2", 1, 0)]
+
+
+def test_chunks_stop_when_the_lease_lapses_mid_cycle(make_position):
+    from backend.monitor_leases import PartitionLeases
+
+    grouped = {"u1": [make_position("p1", "A", "u1"), make_position("p2", "B", "u1"), make_position("p3", "C", "u1")]}
+    leases = PartitionLeases(owner="w1", partitions=1)
+    leases.owned, leases.valid_until = {0}, float("inf")
+    real_evaluate = position_monitor._evaluate
+    evaluated = []
+
+    async def evaluate_then_lapse(subset, *args, **kwargs):
+        if not evaluated:
+            leases.valid_until = float("-inf")  # the first cycle outlasts the lease
+        evaluated.extend(pos["ticker"] for positions in subset.values() for pos in positions)
+        return await real_evaluate(subset, *args, **kwargs)
+
+    dispatcher = MagicMock(flush=AsyncMock())
+    monitor = position_monitor.PositionMonitor(leases)
+    with (
+        patch("backend.db.acquire_lease", return_value=True),
+        patch("backend.db.put_object"),
+        patch("backend.db.get_all_users_with_active_positions", return_value=grouped),
+        patch("backend.db.get_push_tokens_for_users", return_value={"u1": "tok1"}),
+        patch("backend.db.update_tracked_position"),
+        patch.object(position_monitor, "fetch_market", return_value={"yes_ask": 45}),
+        patch.object(position_monitor, "push_dispatcher", dispatcher),
+        patch.object(position_monitor, "_evaluate", evaluate_then_lapse),
+        patch.object(position_monitor, "MONITOR_CHECKPOINT_TICKERS", 1),
+    ):
+        async def run():
+            await monitor.rescan(0)
+            checked = await monitor.check_due(0)
+            sent_while_lapsed = dispatcher.enqueue.call_count
+            leases.valid_until = float("inf")  # renewed
+            await monitor.check_due(position_monitor.MONITOR_LEASE_RENEW_SECONDS + 1)
+            return checked, sent_while_lapsed
+
+        checked, sent_while_lapsed = asyncio.run(run())
+
+    assert checked == 1
+    # Nothing goes out under a lapsed lease; the rest is checked once it is renewed
+    assert sent_while_lapsed == 0
+    assert evaluated == ["A", "B", "C"]
+    assert [call.args[2] for call in dispatcher.enqueue.call_args_list] == ["Moved: A +5¢, B +5¢, C +5¢"]
+
+
+def test_a_worker_that_lost_its_partition_neither_checkpoints_nor_sends(tmp_path, make_position):
+    from backend import local_db, monitor_leases
+
+    grouped = {"u1": [make_position("p1", "A", "u1")]}
+    dispatcher = MagicMock(flush=AsyncMock())
+    stale, successor = (monitor_leases.PartitionLeases(owner=name, partitions=1) for name in ("stale", "next"))
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.multiple(monitor_leases, acquire_lease=local_db.acquire_lease,
+                       release_lease=local_db.release_lease, list_leases=local_db.list_leases),
+        patch("backend.db.get_monitor_checkpoint", local_db.get_monitor_checkpoint),
+        patch("backend.db.put_monitor_checkpoint", local_db.put_monitor_checkpoint),
+        patch("backend.db.acquire_lease", local_db.acquire_lease),
+        patch("backend.db.put_object"),
+        patch("backend.db.get_all_users_with_active_positions", return_value=grouped),
+        patch("backend.db.get_push_tokens_for_users", return_value={"u1": "tok1"}),
+        patch("backend.db.update_tracked_position"),
+        patch.object(position_monitor, "fetch_market", return_value={"yes_ask": 45}),
+        patch.object(position_monitor, "push_dispatcher", dispatcher),
+    ):
+        async def run():
+            monitor = position_monitor.PositionMonitor(stale, checkpoints=True)
+            await monitor.refresh_leases(1000)
+            await monitor.rescan(1000)
+            # The successor takes the partition over while this worker still
+            # believes its lease is valid (e.g. clock skew)
+            local_db.release_lease("partition#0", "stale")
+            await position_monitor.async_db.run(successor.refresh, 1001)
+            await monitor.check_due(1002)
+            return monitor
+
+        monitor = asyncio.run(run())
+
+    dispatcher.enqueue.assert_not_called()
+    assert local_db.get_monitor_checkpoint("checkpoint#0") is None
+    assert monitor.digests.pending == {"u1": {"A": 5}}  # dropped at this worker's next lease refresh
+
+
+def test_restart_resumes_an_unfinished_cycle_from_the_checkpoint(tmp_path, make_position):
+    from backend import local_db
+
+    grouped = {"u1": [make_position("p1", "A", "u1"), make_position("p2", "B", "u1"), make_position("p3", "C", "u1")]}
+    fetched = []
+    dispatcher = MagicMock(flush=AsyncMock())
+    real_evaluate = position_monitor._evaluate
+    evaluations = 0
+
+    async def crash_on_second_chunk(*args, **kwargs):
+        nonlocal evaluations
+        evaluations += 1
+        if evaluations == 2:
+            raise KeyboardInterrupt  # the process dies mid-cycle
+        return await real_evaluate(*args, **kwargs)
+
+    def fetch(ticker):
+        fetched.append(ticker)
+        return {"yes_ask": 45}
+
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch("backend.db.get_monitor_checkpoint", local_db.get_monitor_checkpoint),
+        patch("backend.db.put_monitor_checkpoint", local_db.put_monitor_checkpoint),
+        patch("backend.db.get_all_users_with_active_positions", return_value=grouped),
+        patch("backend.db.get_push_tokens_for_users", return_value={"u1": "tok1"}),
+        patch("backend.db.update_tracked_position"),
+        patch.object(position_monitor, "fetch_market", side_effect=fetch),
+        patch.object(position_monitor, "push_dispatcher", dispatcher),
+        patch.object(position_monitor, "MONITOR_CHECKPOINT_TICKERS", 1),
+    ):
+        async def first_run():
+            monitor = position_monitor.PositionMonitor(checkpoints=True)
+            await monitor.rescan(1000)
+            with patch.object(position_monitor, "_evaluate", crash_on_second_chunk):
+                await monitor.check_due(1000)
+
+        try:
+            asyncio.run(first_run())
+        except KeyboardInterrupt:
+            pass
+        state = local_db.get_monitor_checkpoint("checkpoint#all")
+        assert state["remaining"] == ["B", "C"]
+        assert state["moves"] == {"u1": {"A": 5}}
+        dispatcher.enqueue.assert_not_called()
+
+        async def resume(now):
+            monitor = position_monitor.PositionMonitor(checkpoints=True)
+            await monitor.rescan(now)
+            return await monitor.check_due(now)
+
+        fetched.clear()
+        assert asyncio.run(resume(1010)) == 2
+        assert sorted(fetched) == ["B", "C"]  # A was finished before the crash
+        bodies = [call.args[2] for call in dispatcher.enqueue.call_args_list]
+        assert bodies == ["Moved: A +5¢, B +5¢, C +5¢"]
+
+        # Another restart finds nothing left to send
+        dispatcher.enqueue.reset_mock()
+        asyncio.run(resume(1020))
+        dispatcher.enqueue.assert_not_called()
+        assert local_db.get_monitor_checkpoint("checkpoint#all")["remaining"] == []
+
+
+def test_one_worker_scans_and_each_reads_only_its_partitions(tmp_path, make_position):
+    from backend import local_db, monitor_leases
+
+    # A and B hash to partition 1, D to partition 0
+    grouped = {"u1": [make_position("p1", "A", "u1"), make_position("p2", "D", "u1")], "u2": [make_position("p3", "B", "u2")]}
+    token_lookups = []
+
+    def tokens_for(user_ids):
+        token_lookups.append(set(user_ids))
+        return {user_id: f"tok-{user_id}" for user_id in user_ids}
+
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.object(local_db, "LOCAL_STORAGE_DIR", tmp_path / "objects"),
+        patch.multiple(monitor_leases, acquire_lease=local_db.acquire_lease,
+                       release_lease=local_db.release_lease, list_leases=local_db.list_leases),
+        patch("backend.db.acquire_lease", local_db.acquire_lease),
+        patch("backend.db.put_object", local_db.put_object),
+        patch("backend.db.get_object", local_db.get_object),
+        patch("backend.db.get_all_users_with_active_positions", return_value=grouped) as scan,
+        patch("backend.db.get_push_tokens_for_users", side_effect=tokens_for),
+    ):
+        async def run():
+            first, second = (position_monitor.PositionMonitor(monitor_leases.PartitionLeases(owner=name, partitions=2))
+                             for name in ("w1", "w2"))
+            # w1 starts alone and takes both partitions, then hands one to w2;
+            # each rescans when it gains a partition
+            for monitor in (first, second, first, second):
+                await monitor.refresh_leases(1000)
+            for monitor in (first, second):
+                await monitor.rescan(1000 + position_monitor.MONITOR_RESCAN_SECONDS)
+            return first, second
+
+        first, second = asyncio.run(run())
+
+    assert first.leases.owned == {0} and second.leases.owned == {1}
+    # Only w1, holding the scan lease, ever scans or looks tokens up
+    assert scan.call_count == 2 and token_lookups == [{"u1", "u2"}] * 2
+    assert first.grouped == {"u1": [grouped["u1"][1]]} and first.tokens == {"u1": "tok-u1"}
+    assert second.grouped == {"u1": [grouped["u1"][0]], "u2": grouped["u2"]}
+    assert second.tokens == {"u1": "tok-u1", "u2": "tok-u2"}
@@ -0,0 +1,84 @@
+import gzip
+import json
+from datetime import date
+from unittest.mock import patch
+
+from backend import prediction_log
+from backend.prediction_log import PredictionLogWriter, log_segments
+
+
+def test_writes_batches_and_rotates_by_size(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    writer = PredictionLogWriter(path, max_bytes=50, keep_files=2)
+    try:
+        for batch in range(4):
+            for i in range(3):
+                assert writer.write(json.dumps({"batch": batch, "i": i}) + "\n")
+            assert writer.flush()
+    finally:
+        writer.stop()
+
+    segments = log_segments(path)
+    # Each ~63-byte batch fills the file, so the last three writes each rotate first; only the newest two rotated files are kept
+    assert len(segments) == 3 and segments[-1] == path
+    assert all(s.endswith(".jsonl.gz") for s in segments[:-1])
+    with gzip.open(segments[0], "rt") as f:
+        assert [json.loads(line)["batch"] for line in f] == [1, 1, 1]
+    with open(path) as f:
+        assert [json.loads(line)["batch"] for line in f] == [3, 3, 3]
+    stats = writer.stats()
+    assert stats["written"] == 12 and stats["rotations"] == 3 and stats["queue_depth"] == 0
+
+
+def test_rotates_when_the_date_changes(tmp_path):
+    path = str(tmp_path / "prediction_log.jsonl")
+    writer = PredictionLogWriter(path)
+    try:
+        writer.write("{}\n")
+        assert writer.flush()
+        writer._opened_on = date(2000, 1, 1)
+        writer.write("{}\n")
+        assert writer.flush()
+    finally:
+        writer.stop()
+    assert len(log_segments(path)) == 2
+
+
+def test_writers_sharing_a_path_lose_no_lines_across_rotations(tmp_path):
+    # Two writers stand in for two worker processes appending to the same file
+    path = str(tmp_path / "prediction_log.jsonl")
+    writers = [PredictionLogWriter(path, max_bytes=200, keep_files=100) for _ in range(2)]
+    try:
+        for i in range(40):
+            for w, writer in enumerate(writers):
+                assert writer.write(json.dumps({"w": w, "i": i}) + "\n")
+            if i % 5 == 4:
+                assert all(writer.flush() for writer in writers)
+    finally:
+        for writer in writers:
+            writer.stop()
+
+    lines = []
+    for segment in log_segments(path):
+        with prediction_log.open_segment(segment) as f:
+            lines += [json.loads(line) for line in f]
+    assert sorted((e["w"], e["i"]) for e in lines) == [(w, i) for w in range(2) for i in range(40)]
+    assert sum(writer.stats()["rotations"] for writer in writers) > 1
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = PredictionLogWriter(str(tmp_path / "log.jsonl"), queue_size=1)
+    with patch.object(writer, "_ensure_started"):
+        assert writer.write("a\n")
+        assert not writer.write("b\n")
+    assert writer.stats()["dropped"] == 1
+
+
+def test_log_prediction_adds_timestamp(tmp_path):
+    writer = PredictionLogWriter(str(tmp_path / "log.jsonl"))
+    with patch.object(prediction_log, "_writer", writer):
+        prediction_log.log_prediction({"prediction_id": "p1"})
+        assert prediction_log.flush()
+        prediction_log.stop()
+    entry = json.loads((tmp_path / "log.jsonl").read_text())
+    assert entry["prediction_id"] == "p1" and "logged_at" in entry
@@ -0,0 +1,98 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend import position_monitor
+from backend.price_alerts import AlertIndex, rules_for
+
+
+def test_no_side_levels_map_to_yes_price_thresholds(make_position):
+    tp, sl = rules_for(make_position("p1", "A", side="no", take_profit=70, stop_loss=40))
+    assert (tp.kind, tp.direction, tp.threshold) == ("take_profit", "below", 30)
+    assert (sl.kind, sl.direction, sl.threshold) == ("stop_loss", "above", 60)
+    assert rules_for({**make_position("p2", "A", take_profit=70), "status": "settled_win"}) == []
+
+
+def test_price_updates_fire_crossed_rules_once(make_position):
+    index = AlertIndex()
+    index.sync([
+        make_position("p1", "A", take_profit=60, stop_loss=30),
+        make_position("p2", "A", take_profit=70),
+        make_position("p3", "A", side="no", take_profit=55),  # YES at 45 or lower
+        make_position("p4", "B", take_profit=10),
+    ])
+    assert len(index) == 5
+
+    assert index.crossed("A", 50) == []
+    fired = index.crossed("A", 65)
+    assert [(r.position_id, r.kind) for r in fired] == [("p1", "take_profit")]
+    assert index.crossed("A", 65) == []  # already fired
+
+    fired = index.crossed("A", 20)
+    assert sorted((r.position_id, r.kind) for r in fired) == [("p1", "stop_loss"), ("p3", "take_profit")]
+    assert len(index) == 2
+
+    # Edited alerts replace the old rules
+    index.set_position(make_position("p2", "A", take_profit=90))
+    assert index.crossed("A", 75) == []
+    assert [r.level for r in index.crossed("A", 95)] == [90]
+    index.remove_position("p4")
+    assert index.crossed("B", 99) == [] and len(index) == 0
+
+
+def test_monitor_pushes_crossed_alerts_and_clears_them(make_position):
+    grouped = {"u1": [make_position("p1", "A", entry_price=50, take_profit=60, stop_loss=30),
+                      make_position("p2", "B", side="no", entry_price=50, stop_loss=40)]}
+    prices = {"A": 62, "B": 62}
+    dispatcher = MagicMock(flush=AsyncMock())
+    monitor = position_monitor.PositionMonitor()
+    with (
+        patch("backend.db.get_all_users_with_active_positions", return_value=grouped),
+        patch("backend.db.get_push_tokens_for_users", return_value={"u1": "tok1"}),
+        patch("backend.db.update_tracked_position"),
+        patch("backend.db.clear_position_alert", return_value=True) as clear,
+        patch.object(position_monitor, "fetch_market", side_effect=lambda t: {"yes_ask": prices[t]}),
+        patch.object(position_monitor, "push_dispatcher", dispatcher),
+        patch.object(position_monitor, "MONITOR_DIGEST_COOLDOWN_SECONDS", 3600),
+    ):
+        async def run():
+            await monitor.rescan(0)
+            await monitor.check_due(0)
+            # A live price for A crossing the stop-loss, between polls
+            await monitor.on_price("A", 29, 10)
+
+        asyncio.run(run())
+
+    bodies = [call.args[2] for call in dispatcher.enqueue.call_args_list]
+    assert bodies[0] == "Alert: A YES take-profit 60¢ hit at 62¢, B NO stop-loss 40¢ hit at 38¢ | Moved: A +12¢, B -12¢"
+    assert bodies[1] == "Alert: A YES stop-loss 30¢ hit at 29¢"
+    assert [call.args for call in clear.call_args_list] == [("p1", "take_profit", 60), ("p2", "stop_loss", 40),
+                                                           ("p1", "stop_loss", 30)]
+    assert len(monitor.alerts) == 0
+
+
+def test_alerts_changed_since_the_scan_are_not_pushed(tmp_path, make_position):
+    from backend import local_db
+
+    position = make_position("p1", "A", take_profit=60)
+    dispatcher = MagicMock(flush=AsyncMock())
+    monitor = position_monitor.PositionMonitor()
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch("backend.db.clear_position_alert", local_db.clear_position_alert),
+        patch("backend.db.get_all_users_with_active_positions", return_value={"u1": [dict(position)]}),
+        patch("backend.db.get_push_tokens_for_users", return_value={"u1": "tok1"}),
+        patch.object(position_monitor, "push_dispatcher", dispatcher),
+    ):
+        local_db.put_tracked_position({**position, "alerts": {"take_profit": 70}})  # edited after the scan
+
+        async def run():
+            await monitor.rescan(0)
+            await monitor.on_price("A", 65, 10)
+            await monitor.on_price("A", 75, 20)  # the scan's index no longer has a rule to fire
+
+        asyncio.run(run())
+
+        dispatcher.enqueue.assert_not_called()
+        assert local_db.get_tracked_position("p1")["alerts"] == {"take_profit": 70}
+        assert local_db.clear_position_alert("p1", "take_profit", 70) is True
+        assert local_db.clear_position_alert("p1", "take_profit", 70) is False
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import httpx
+
+from backend import notifications
+from backend.notifications import PushDispatcher
+
+
+def _expo(receipts: dict | None = None):
+    """Fake Expo API: every push is accepted except tokens containing 'dead'."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append((request.url.path, body))
+        if request.url.path.endswith("/getReceipts"):
+            return httpx.Response(200, json={"data": {i: receipts[i] for i in body["ids"] if i in receipts}})
+        tickets = [
+            {"status": "error", "message": "not registered", "details": {"error": "DeviceNotRegistered"}}
+            if "dead" in message["to"] else {"status": "ok", "id": f"ticket-{message['to']}"}
+            for message in body
+        ]
+        return httpx.Response(200, json={"data": tickets})
+
+    return requests, httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_pushes_are_batched_and_ticket_errors_map_back_to_tokens():
+    requests, client = _expo()
+    dispatcher = PushDispatcher(client)
+
+    async def run():
+        futures = [dispatcher.enqueue(f"tok{i}", "t", "b", user_id=f"u{i}") for i in range(230)]
+        futures.append(dispatcher.enqueue("dead-tok", "t", "b", user_id="u-dead"))
+        await dispatcher.flush()
+        return [f.result() for f in futures]
+
+    with patch("backend.db.remove_push_token") as remove:
+        results = asyncio.run(run())
+
+    assert [len(body) for _, body in requests] == [100, 100, 31]
+    assert results == [True] * 230 + [False]
+    remove.assert_called_once_with("u-dead", "dead-tok")
+    assert "dead-tok" in dispatcher.invalid_tokens
+    assert len(dispatcher._tickets) == 230
+
+
+def test_invalid_tokens_are_skipped_afterwards():
+    requests, client = _expo()
+    dispatcher = PushDispatcher(client)
+    dispatcher.invalid_tokens["tok-gone"] = time.time()
+
+    async def run():
+        future = dispatcher.enqueue("tok-gone", "t", "b")
+        await dispatcher.flush()
+        return future.result()
+
+    assert asyncio.run(run()) is False
+    assert requests == []
+
+
+def test_reregistered_tokens_are_sent_again():
+    requests, client = _expo()
+    dispatcher = PushDispatcher(client)
+    dispatcher.invalid_tokens["tok-back"] = time.time()
+    dispatcher.token_registered("tok-back")
+
+    async def run():
+        future = dispatcher.enqueue("tok-back", "t", "b")
+        await dispatcher.flush()
+        return future.result()
+
+    assert asyncio.run(run()) is True
+    assert len(requests) == 1
+
+
+def test_transient_failures_are_retried_honouring_retry_after():
+    responses = [httpx.Response(429, headers={"Retry-After": "7"}), httpx.Response(503),
+                 httpx.Response(200, json={"data": [{"status": "ok", "id": "ticket-1"}]})]
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+    dispatcher = PushDispatcher(client)
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+
+    async def run():
+        future = dispatcher.enqueue("tok1", "t", "b")
+        await dispatcher.flush()
+        return future.result()
+
+    with patch.object(notifications.asyncio, "sleep", fake_sleep):
+        assert asyncio.run(run()) is True
+    # After the enqueue's flush timer: Retry-After first, then the doubled backoff
+    assert waits[-2:] == [7.0, 2 * notifications.EXPO_RETRY_BASE_SECONDS]
+    assert dispatcher.stats["retries"] == 2 and dispatcher.stats["errors"] == 0
+
+
+def test_batch_fails_after_the_last_attempt():
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        return httpx.Response(502)
+
+    dispatcher = PushDispatcher(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def fake_sleep(seconds):
+        pass
+
+    async def run():
+        future = dispatcher.enqueue("tok1", "t", "b")
+        await dispatcher.flush()
+        return future.result()
+
+    with patch.object(notifications.asyncio, "sleep", fake_sleep):
+        assert asyncio.run(run()) is False
+    assert len(attempts) == notifications.EXPO_MAX_ATTEMPTS
+    assert dispatcher.stats["errors"] == 1
+
+
+def test_receipts_are_polled_in_bulk_once_old_enough():
+    receipts = {"ticket-tok1": {"status": "ok"},
+                "ticket-tok2": {"status": "error", "details": {"error": "DeviceNotRegistered"}}}
+    requests, client = _expo(receipts)
+    dispatcher = PushDispatcher(client)
+
+    async def run():
+        for token in ("tok1", "tok2"):
+            dispatcher.enqueue(token, "t", "b", user_id="u1")
+        await dispatcher.flush()
+        sent_at = min(sent for _, _, sent in dispatcher._tickets.values())
+        too_soon = await dispatcher.check_receipts(now=sent_at + 60)
+        ready = await dispatcher.check_receipts(now=sent_at + notifications.RECEIPT_DELAY_SECONDS)
+        return too_soon, ready
+
+    with patch("backend.db.remove_push_token") as remove:
+        assert asyncio.run(run()) == (0, 2)
+
+    receipt_requests = [body for path, body in requests if path.endswith("/getReceipts")]
+    assert len(receipt_requests) == 1
+    assert sorted(receipt_requests[0]["ids"]) == ["ticket-tok1", "ticket-tok2"]
+    remove.assert_called_once_with("u1", "tok2")
+    assert dispatcher._tickets == {}
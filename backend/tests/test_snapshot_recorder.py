@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from backend import local_db, snapshot_recorder
+
+T0 = datetime(2026, 3, 2, 10, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def series(tmp_path):
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.object(snapshot_recorder, "append_series_samples", local_db.append_series_samples),
+        patch.object(snapshot_recorder, "get_series_buckets", local_db.get_series_buckets),
+        patch.dict(snapshot_recorder._recorded, clear=True),
+    ):
+        yield
+
+
+def _market(price: int, volume: int = 1) -> dict:
+    return {"yes_bid": price - 1, "yes_ask": price + 1, "last_price": price, "volume": volume, "open_interest": 7}
+
+
+def _record(minutes: int, price: int, volume: int, ticker: str = "MKT"):
+    snapshot_recorder.record_sample(ticker, _market(price, volume), T0 + timedelta(minutes=minutes))
+
+
+def _hourly_closes(ticker: str) -> list[tuple[int, int]]:
+    return [(t, close) for bucket in local_db.get_series_buckets(f"{ticker}#1h", "", "~")
+            for t, close in zip(bucket["t"], bucket["close"])]
+
+
+def test_samples_bucketed_per_hour_and_rolled_up(series):
+    for minutes, price in [(0, 40), (20, 55), (40, 35), (55, 45)]:
+        _record(minutes, price, volume=100 + minutes)
+    assert len(local_db.get_series_buckets("MKT#raw", T0.isoformat(), T0.isoformat())) == 1
+    assert local_db.get_series_buckets("MKT#1h", "", "~") == []
+
+    _record(65, 50, volume=200)  # first sample of 11:00 rolls up 10:00
+
+    hourly = local_db.get_series_buckets("MKT#1h", "", "~")
+    assert len(hourly) == 1
+    assert hourly[0]["t"] == [10]
+    assert (hourly[0]["open"], hourly[0]["high"], hourly[0]["low"], hourly[0]["close"]) == ([40], [55], [35], [45])
+    assert hourly[0]["volume"] == [155]
+
+
+def test_every_finished_hour_is_rolled_up_after_a_gap(series):
+    _record(0, 40, volume=1)
+    _record(65, 50, volume=1)  # rolls up 10:00
+    _record(90, 55, volume=1)
+    # The recorder missed 12:00 and 13:00; the next sample catches 11:00 up
+    _record(4 * 60 + 5, 60, volume=1)
+    assert _hourly_closes("MKT") == [(10, 40), (11, 55)]
+    _record(4 * 60 + 30, 65, volume=1)
+    assert _hourly_closes("MKT") == [(10, 40), (11, 55)]
+
+
+def test_tickers_leaving_the_selection_are_rolled_up_after_their_hour(series):
+    selections = [{"A": _market(40), "B": _market(60)}, {"A": _market(45)}, {"A": _market(50)}]
+    with patch.object(snapshot_recorder, "_select_markets", side_effect=selections):
+        snapshot_recorder.record_snapshots(T0 + timedelta(minutes=10))
+        snapshot_recorder.record_snapshots(T0 + timedelta(minutes=40))
+        assert _hourly_closes("B") == []  # its hour isn't over yet
+        snapshot_recorder.record_snapshots(T0 + timedelta(minutes=70))
+    assert _hourly_closes("A") == [(10, 45)]
+    assert _hourly_closes("B") == [(10, 60)]
+    assert "B" not in snapshot_recorder._recorded
+
+
+def test_history_resolution_selection(series):
+    for minutes, price in [(0, 40), (30, 60), (65, 50)]:
+        _record(minutes, price, volume=1)
+    now = T0 + timedelta(hours=1, minutes=10)
+
+    raw = snapshot_recorder.get_market_history("MKT", T0, now, now=now)
+    assert raw["resolution"] == "raw"
+    assert [p["last_price"] for p in raw["points"]] == [40, 60, 50]
+
+    hourly = snapshot_recorder.get_market_history("MKT", T0 - timedelta(days=3), now, now=now)
+    assert hourly["resolution"] == "1h"
+    # 10:00 comes from the stored rollup, 11:00 is rolled up live from raw samples
+    assert [(p["open"], p["close"]) for p in hourly["points"]] == [(40, 60), (50, 50)]
@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+import boto3
+from botocore.stub import ANY, Stubber
+
+import backend.db as db
+from backend import bot_engine, local_db
+from backend.db import _install_native_numbers
+
+POSITION = {"position_id": "p1", "user_id": "u1", "ticker": "T", "entry_price": 40, "status": "active"}
+
+
+def _resource():
+    resource = boto3.resource("dynamodb", region_name="us-east-1", aws_access_key_id="t", aws_secret_access_key="t")
+    _install_native_numbers(resource)
+    return resource
+
+
+def test_position_and_counters_written_in_one_transaction():
+    resource = _resource()
+    expected = {"TransactItems": [
+        {"Put": {
+            "TableName": db.TRACKED_POSITIONS_TABLE_NAME,
+            "Item": POSITION,
+            "ConditionExpression": "attribute_not_exists(position_id)",
+        }},
+        {"Update": {
+            "TableName": db.USER_PROGRESS_TABLE_NAME,
+            "Key": {"user_id": "u1"},
+            "ConditionExpression": "attribute_exists(user_id)",
+            "UpdateExpression": ANY,
+            "ExpressionAttributeNames": ANY,
+            "ExpressionAttributeValues": ANY,
+        }},
+    ]}
+    with patch.object(db, "dynamodb", resource), Stubber(resource.meta.client) as stub:
+        stub.add_response("transact_write_items", {}, expected)
+        assert db.put_tracked_position_with_progress(POSITION, {"total_positions": 1, "paper_balance": -40}) is True
+        stub.assert_no_pending_responses()
+
+
+def test_missing_progress_record_falls_back_to_plain_put():
+    resource = _resource()
+    with (
+        patch.object(db, "dynamodb", resource),
+        patch.object(db, "put_tracked_position") as put,
+        Stubber(resource.meta.client) as stub,
+    ):
+        stub.add_client_error(
+            "transact_write_items",
+            service_error_code="TransactionCanceledException",
+            modeled_fields={"CancellationReasons": [{"Code": "None"}, {"Code": "ConditionalCheckFailed"}]},
+        )
+        assert db.put_tracked_position_with_progress(POSITION, {"total_positions": 1}) is False
+    put.assert_called_once_with(POSITION)
+
+
+def test_track_position_counts_atomically_on_sqlite(tmp_path):
+    with (
+        patch.object(local_db, "SQLITE_PATH", str(tmp_path / "kalshi.sqlite3")),
+        patch.object(bot_engine, "put_tracked_position_with_progress", local_db.put_tracked_position_with_progress),
+    ):
+        assert bot_engine.track_position(dict(POSITION)) is False  # no progress record yet
+        local_db.put_user_progress({"user_id": "u1", "total_positions": 1})
+        assert bot_engine.track_position({**POSITION, "position_id": "p2"}) is True
+        progress = local_db.get_user_progress("u1")
+        assert progress["total_positions"] == 2
+        assert progress["paper_balance"] == bot_engine.STARTING_PAPER_BALANCE - 40
+        assert len(local_db.get_tracked_positions_by_user("u1")) == 2
+
+
+def test_updating_a_deleted_position_does_not_recreate_it():
+    resource = _resource()
+    table = resource.Table(db.TRACKED_POSITIONS_TABLE_NAME)
+    with patch.object(db, "tracked_positions_table", table), Stubber(resource.meta.client) as stub:
+        stub.add_client_error(
+            "update_item",
+            service_error_code="ConditionalCheckFailedException",
+            expected_params={
+                "TableName": db.TRACKED_POSITIONS_TABLE_NAME,
+                "Key": {"position_id": "p1"},
+                "UpdateExpression": "SET #market_snapshot_at_entry = :val0 REMOVE expires_at",
+                "ConditionExpression": "attribute_exists(#position_id)",
+                "ExpressionAttributeNames": {"#market_snapshot_at_entry": "market_snapshot_at_entry",
+                                             "#position_id": "position_id"},
+                "ExpressionAttributeValues": {":val0": {"ticker": "T"}},
+                "ReturnValues": "ALL_NEW",
+            },
+        )
+        assert db.update_tracked_position("p1", {"market_snapshot_at_entry": {"ticker": "T"}}) is None
+        stub.assert_no_pending_responses()
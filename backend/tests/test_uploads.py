@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import io
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from backend import uploads
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def _upload(data: bytes, size: int | None = None) -> UploadFile:
+    return UploadFile(io.BytesIO(data), size=len(data) if size is None else size, filename="shot.png")
+
+
+def test_sniff_image_type():
+    assert uploads.sniff_image_type(PNG) == "image/png"
+    assert uploads.sniff_image_type(b"\xff\xd8\xff\xe0\x00\x10JFIF") == "image/jpeg"
+    assert uploads.sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert uploads.sniff_image_type(b"\x00\x00\x00\x18ftypheic") == "image/heic"
+    assert uploads.sniff_image_type(b"%PDF-1.7") is None
+
+
+def test_store_upload_streams_file_object_under_content_hash():
+    image = _upload(PNG)
+    with (
+        patch.object(uploads.async_db, "image_exists", new=AsyncMock(return_value=False)),
+        patch.object(uploads.async_db, "upload_image_stream", new=AsyncMock()) as upload,
+    ):
+        stored = asyncio.run(uploads.store_upload(image))
+    assert stored.key == f"images/{hashlib.sha256(PNG).hexdigest()}.png"
+    assert stored.content_type == "image/png"
+    fileobj = upload.call_args.args[0]
+    assert fileobj is image.file and fileobj.tell() == 0
+
+
+def test_store_upload_skips_existing_image():
+    with (
+        patch.object(uploads.async_db, "image_exists", new=AsyncMock(return_value=True)),
+        patch.object(uploads.async_db, "upload_image_stream", new=AsyncMock()) as upload,
+    ):
+        asyncio.run(uploads.store_upload(_upload(PNG)))
+    upload.assert_not_called()
+
+
+@pytest.mark.parametrize("data,size,status", [(b"not an image", None, 415), (PNG, 10**9, 413)])
+def test_store_upload_rejects_before_uploading(data, size, status):
+    with patch.object(uploads.async_db, "upload_image_stream", new=AsyncMock()) as upload:
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(uploads.store_upload(_upload(data, size)))
+    assert exc.value.status_code == status
+    upload.assert_not_called()
+
+
+def test_middleware_rejects_oversized_body_from_content_length():
+    app = FastAPI()
+    app.add_middleware(uploads.UploadSizeLimitMiddleware, max_body_bytes=1024)
+
+    @app.post("/predict")
+    def predict():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/predict", content=b"x" * 2048).status_code == 413
+    assert client.post("/predict", content=b"x" * 512).status_code == 200
+
+
+def test_middleware_cuts_off_a_chunked_body_over_the_limit():
+    app = FastAPI()
+    app.add_middleware(uploads.UploadSizeLimitMiddleware, max_body_bytes=1024)
+    stored = []
+
+    @app.post("/predict")
+    def predict(image: UploadFile = File(...)):
+        stored.append(image.filename)
+        return {"ok": True}
+
+    def chunked(parts):
+        yield from parts  # no Content-Length: sent with Transfer-Encoding: chunked
+
+    boundary = "b0undary"
+    head = f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="shot.png"\r\n\r\n'.encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    client = TestClient(app)
+
+    resp = client.post("/predict", content=chunked([head] + [PNG * 4] * 50 + [tail]), headers=headers)
+    assert resp.status_code == 413
+    assert stored == []
+    assert client.post("/predict", content=chunked([head, PNG, tail]), headers=headers).status_code == 200
+    assert stored == ["shot.png"]
@@ -0,0 +1,136 @@
+"""Size-bounded, streaming image uploads.
+
+Starlette spools multipart file parts to a temporary file (in memory only up to
+1MB), so an UploadFile can be handed to storage as a file object and streamed
+in chunks instead of being read into one bytes object per request.
+
+Images are stored content-addressed (see backend.dedup).
+
+Oversized bodies are rejected from the Content-Length header before the form
+is parsed, and a body without one (chunked) is cut off with a 413 as soon as
+more than the limit has been received. The parsed part size and the first
+bytes of the file are checked before anything is uploaded.
+"""
+
+import asyncio
+import logging
+import os
+from typing import NamedTuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+from backend import async_db
+from backend.dedup import content_hash, perceptual_hash
+
+logger = logging.getLogger(__name__)
+
+MAX_IMAGE_UPLOAD_BYTES = int(os.environ.get("MAX_IMAGE_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+# Allowance for multipart boundaries and the other form fields
+FORM_OVERHEAD_BYTES = 64 * 1024
+UPLOAD_PATHS = frozenset({"/predict", "/predict/input"})
+
+_SNIFF_BYTES = 16
+_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/heic": "heic",
+}
+
+
+def sniff_image_type(header: bytes) -> str | None:
+    """Content type from an image's magic bytes, or None if it isn't one we accept."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header[4:8] == b"ftyp" and header[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "image/heic"
+    return None
+
+
+def _too_large_detail() -> str:
+    return f"Image exceeds the {MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)}MB upload limit"
+
+
+def _check_size(size: int | None) -> None:
+    if size is not None and size > MAX_IMAGE_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=_too_large_detail())
+
+
+class StoredUpload(NamedTuple):
+    key: str
+    content_type: str
+    sha256: str
+    dhash: int | None
+
+
+def _fingerprint(fileobj) -> tuple[str, int | None]:
+    return content_hash(fileobj), perceptual_hash(fileobj)
+
+
+async def store_upload(image: UploadFile) -> StoredUpload:
+    """Validate an uploaded image and stream it to storage under its content hash.
+
+    Identical images share one object; an upload whose key already exists is not
+    re-sent. Raises 413 for oversized and 415 for non-image payloads.
+    """
+    _check_size(image.size)
+    header = await image.read(_SNIFF_BYTES)
+    content_type = sniff_image_type(header)
+    if content_type is None:
+        raise HTTPException(status_code=415, detail="Upload is not a supported image (JPEG, PNG, GIF, WebP, HEIC)")
+    await image.seek(0)
+
+    loop = asyncio.get_running_loop()
+    sha256, dhash = await loop.run_in_executor(None, _fingerprint, image.file)
+    image_key = f"images/{sha256}.{_EXTENSIONS[content_type]}"
+    if await async_db.image_exists(image_key):
+        logger.info("Image %s already stored, skipping upload", image_key)
+    else:
+        await async_db.upload_image_stream(image.file, image_key, content_type)
+        if dhash is not None:
+            await async_db.put_image_fingerprint(sha256, dhash)
+    return StoredUpload(image_key, content_type, sha256, dhash)
+
+
+class UploadSizeLimitMiddleware:
+    """Reject upload requests whose body is over the limit before the multipart
+    form is parsed (and spooled to disk): at once from a declared
+    Content-Length, otherwise as soon as the bytes received pass it."""
+
+    def __init__(self, app, max_body_bytes: int | None = None):
+        self.app = app
+        self.max_body_bytes = max_body_bytes or MAX_IMAGE_UPLOAD_BYTES + FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if not (scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in UPLOAD_PATHS):
+            await self.app(scope, receive, send)
+            return
+        length = dict(scope["headers"]).get(b"content-length")
+        if length and length.isdigit() and int(length) > self.max_body_bytes:
+            logger.warning("Rejected %s upload of %s bytes", scope["path"], length.decode())
+            response = JSONResponse({"detail": _too_large_detail()}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    logger.warning("Rejected %s upload after %d bytes", scope["path"], received)
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes the response
+                    raise HTTPException(status_code=413, detail=_too_large_detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
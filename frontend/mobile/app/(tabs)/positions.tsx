@@ -29,7 +29,7 @@ export default function PositionsScreen() {
   const loadData = useCallback(async () => {
     try {
       const [trackedData, liveData] = await Promise.all([
-        getTrackedPositions(USER_ID).catch(() => [] as TrackedPosition[]),
+        getTrackedPositions(USER_ID, true).catch(() => [] as TrackedPosition[]),
         getPositions(USER_ID).catch(() => [] as KalshiPosition[]),
       ]);
       setTracked(trackedData);
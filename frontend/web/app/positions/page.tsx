@@ -21,7 +21,7 @@ export default function PositionsPage() {
   const loadData = useCallback(async () => {
     try {
       const [trackedData, liveData] = await Promise.all([
-        getTrackedPositions(USER_ID).catch(() => [] as TrackedPosition[]),
+        getTrackedPositions(USER_ID, true).catch(() => [] as TrackedPosition[]),
         getPositions(USER_ID).catch(() => [] as KalshiPosition[]),
       ]);
       setTracked(trackedData);
@@ -146,9 +146,12 @@ export async function updatePrediction(
   });
 }
 
-export async function getPredictions(userId: string): Promise<Prediction[]> {
+export async function getPredictions(
+  userId: string,
+  summary: boolean = false
+): Promise<Prediction[]> {
   return request<Prediction[]>(
-    `/predictions?user_id=${encodeURIComponent(userId)}`
+    `/predictions?user_id=${encodeURIComponent(userId)}&summary=${summary}`
   );
 }
 
@@ -287,10 +290,11 @@ export async function acceptTrade(params: {
 }
 
 export async function getTrackedPositions(
-  userId: string
+  userId: string,
+  summary: boolean = false
 ): Promise<TrackedPosition[]> {
   return request<TrackedPosition[]>(
-    `/tracked-positions?user_id=${encodeURIComponent(userId)}`
+    `/tracked-positions?user_id=${encodeURIComponent(userId)}&summary=${summary}`
   );
 }
 
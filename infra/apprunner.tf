@@ -53,6 +53,8 @@ data "aws_iam_policy_document" "dynamodb_access" {
       "dynamodb:Scan",
       "dynamodb:UpdateItem",
       "dynamodb:DeleteItem",
+      "dynamodb:BatchGetItem",
+      "dynamodb:ConditionCheckItem",
     ]
     resources = [
       aws_dynamodb_table.trading_logs.arn,
@@ -65,6 +67,8 @@ data "aws_iam_policy_document" "dynamodb_access" {
       "${aws_dynamodb_table.integrations.arn}/index/*",
       aws_dynamodb_table.tracked_positions.arn,
       "${aws_dynamodb_table.tracked_positions.arn}/index/*",
+      aws_dynamodb_table.monitor_leases.arn,
+      aws_dynamodb_table.monitor_checkpoints.arn,
     ]
   }
 
@@ -212,6 +216,8 @@ resource "aws_apprunner_service" "backend" {
           GEMINI_API_KEY           = var.gemini_api_key
           ENCRYPTION_KEY           = var.encryption_key
           TRACKED_POSITIONS_TABLE_NAME = aws_dynamodb_table.tracked_positions.name
+          MONITOR_LEASES_TABLE_NAME    = aws_dynamodb_table.monitor_leases.name
+          MONITOR_CHECKPOINTS_TABLE_NAME = aws_dynamodb_table.monitor_checkpoints.name
           MAILGUN_API_KEY             = var.mailgun_api_key
           MAILGUN_DOMAIN              = var.mailgun_domain
         }
@@ -59,6 +59,12 @@ resource "aws_dynamodb_table" "predictions" {
     projection_type = "ALL"
   }
 
+  # Set on archived items, which are then read back from S3 (backend/archival.py)
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
   tags = {
     Environment = var.environment
     App         = "kalshi-use"
@@ -83,6 +89,24 @@ resource "aws_s3_bucket_public_access_block" "images" {
   restrict_public_buckets = true
 }
 
+# The near-duplicate image index is only read for recent uploads
+resource "aws_s3_bucket_lifecycle_configuration" "images" {
+  bucket = aws_s3_bucket.images.id
+
+  rule {
+    id     = "expire-image-index"
+    status = "Enabled"
+
+    filter {
+      prefix = "image_index/"
+    }
+
+    expiration {
+      days = 2
+    }
+  }
+}
+
 resource "aws_dynamodb_table" "market_snapshots" {
   name         = "kalshi-use-market-snapshots"
   billing_mode = "PAY_PER_REQUEST"
@@ -111,6 +135,12 @@ resource "aws_dynamodb_table" "market_snapshots" {
     projection_type = "ALL"
   }
 
+  # Raw snapshot series buckets expire; hourly rollups have no expires_at
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
   tags = {
     Environment = var.environment
     App         = "kalshi-use"
@@ -160,6 +190,56 @@ resource "aws_dynamodb_table" "tracked_positions" {
     projection_type = "ALL"
   }
 
+  # Set on archived items, which are then read back from S3 (backend/archival.py)
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    App         = "kalshi-use"
+  }
+}
+
+resource "aws_dynamodb_table" "monitor_leases" {
+  name         = "kalshi-use-monitor-leases"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "lease"
+
+  attribute {
+    name = "lease"
+    type = "S"
+  }
+
+  # Expired worker heartbeats and partition leases are cleaned up by TTL
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    App         = "kalshi-use"
+  }
+}
+
+resource "aws_dynamodb_table" "monitor_checkpoints" {
+  name         = "kalshi-use-monitor-checkpoints"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "checkpoint"
+
+  attribute {
+    name = "checkpoint"
+    type = "S"
+  }
+
+  # Checkpoints of partitions nobody resumes expire by TTL
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
   tags = {
     Environment = var.environment
     App         = "kalshi-use"